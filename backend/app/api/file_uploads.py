@@ -1,24 +1,41 @@
-import os
+import json
+import asyncio
 import base64
 import uuid
 from io import BytesIO
 from datetime import datetime
-from typing import List
-from dotenv import load_dotenv
-from app.database.get_client import get_client
-from app.schemas.jd import JD
+from typing import List, Optional
+from app.schemas.jd import JDExportRequest
 from app.prompts.prompts import JD_PROMPT
 from fastapi import Body
 from bson.objectid import ObjectId #type: ignore
-from app.utils.pdf_gen import generate_pdf
 from app.utils.log_err import log_error
-from fastapi.responses import StreamingResponse
-from fastapi import APIRouter, File, HTTPException, UploadFile, Form, Request
+from fastapi.responses import StreamingResponse, Response
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile, Form, Request
 from app.utils.file_pro import _process_file
-load_dotenv()
+from app.database.cv_documents import load_cv_document, normalize_skills
+from app.utils.matching import jd_match_text
+from app.utils.pdf_cache import jd_content_hash, stream_jd_zip, stream_merged_jd_pdf
+from app.utils.jd_stream import stream_jd
+from app.utils.settings import get_settings
+from app.utils.metrics import get_metrics
 
 app = APIRouter()
 
+def _upload_summary(file_counter: int, correct_files: int) -> str:
+    """
+    Build the summary message returned for a batch of uploaded files.
+    """
+    # Calculate incorrect files
+    incorrect_files = file_counter - correct_files
+    return f"You have uploaded {file_counter} files, {correct_files} files are correct processed and {incorrect_files} files are not processed."
+
+def _ndjson(record: dict) -> bytes:
+    """
+    Serialize one record of a newline-delimited JSON stream.
+    """
+    return (json.dumps(record, default=str) + "\n").encode("utf-8")
+
 @app.post("/upload-files-process/")
 async def upload_files(
     request: Request,
@@ -42,32 +59,32 @@ async def upload_files(
     user_email = "test@test.com"  # Will come from session cookie after auth implementation
     
     # Initialize counters and response data
-    file_counter = 0
+    file_counter = len(files)
     correct_files = 0
     frontend_response = {}
     
     try:
-        for file in files:
-            file_counter += 1
-            
-            # Process each file
-            result = await _process_file(
+        # Process all files concurrently; the blob, parse and LLM stages inside
+        # _process_file are bounded by the app-wide semaphores set up at startup
+        results = await asyncio.gather(*(
+            _process_file(
                 request=request, 
                 file=file,
                 user_id=user_id,
                 user_email=user_email
             )
-            
+            for file in files
+        ))
+        
+        # Collect results in input order
+        for file, result in zip(files, results):
             # If processing was successful, add to correct files counter
             if result["success"]:
                 correct_files += 1
                 frontend_response[file.filename] = result["data"]
                 
-        # Calculate incorrect files
-        incorrect_files = file_counter - correct_files
-        
         return {
-            "message": f"You have uploaded {file_counter} files, {correct_files} files are correct processed and {incorrect_files} files are not processed.",
+            "message": _upload_summary(file_counter, correct_files),
             "details": frontend_response
         }
             
@@ -84,56 +101,444 @@ async def upload_files(
         # Return appropriate HTTP exception
         raise HTTPException(status_code=500, detail="Error processing uploaded files.")
 
+@app.post("/upload-files-process-stream/")
+async def upload_files_stream(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    session_cookie: str = Form(...),
+):
+    """
+    Upload files and stream each file's result as soon as it is processed.
+
+    Sends newline-delimited JSON by default, or Server-Sent Events when the
+    client accepts text/event-stream. One record is sent per file in completion
+    order, followed by a summary record with the same message as
+    /upload-files-process/.
+
+    Args:
+        request (Request): FastAPI request object
+        files (List[UploadFile]): List of files to upload and process
+        session_cookie (str): Session cookie for authentication
+
+    Returns:
+        StreamingResponse: A stream of per-file results and a final summary.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+    user_email = "test@test.com"  # Will come from session cookie after auth implementation
+    
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+    
+    def _encode(record: dict) -> bytes:
+        if use_sse:
+            return f"event: {record['type']}\ndata: {json.dumps(record, default=str)}\n\n".encode("utf-8")
+        return _ndjson(record)
+    
+    async def _process_indexed(index: int, file: UploadFile):
+        result = await _process_file(
+            request=request,
+            file=file,
+            user_id=user_id,
+            user_email=user_email
+        )
+        return index, file, result
+    
+    async def _results():
+        tasks = [asyncio.create_task(_process_indexed(index, file)) for index, file in enumerate(files)]
+        correct_files = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, file, result = await next_done
+                if result["success"]:
+                    correct_files += 1
+                yield _encode({
+                    "type": "file",
+                    "index": index,
+                    "filename": file.filename,
+                    "success": result["success"],
+                    "data": result["data"]
+                })
+            yield _encode({
+                "type": "summary",
+                "message": _upload_summary(len(files), correct_files)
+            })
+        except Exception as e:
+            # Log all exceptions
+            await log_error(
+                request=request,
+                error=str(e),
+                endpoint="upload-files-process-stream",
+                user_id=user_id,
+                user_email=user_email
+            )
+            yield _encode({"type": "error", "message": "Error processing uploaded files."})
+        finally:
+            # Stop remaining work if the client went away
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(
+        _results(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/upload-jobs/")
+async def create_upload_job(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    session_cookie: str = Form(...),
+):
+    """
+    Store uploaded files as a background job and return its id immediately.
+
+    Args:
+        request (Request): FastAPI request object
+        files (List[UploadFile]): List of files to upload and process
+        session_cookie (str): Session cookie for authentication
+
+    Returns:
+        dict: The job id and its initial status.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+    user_email = "test@test.com"  # Will come from session cookie after auth implementation
+
+    max_file_size = get_settings().max_upload_file_bytes
+    for file in files:
+        if file.size is not None and file.size > max_file_size:
+            raise HTTPException(status_code=413, detail=f"{file.filename} is larger than {max_file_size} bytes")
+
+    try:
+        # Pass the spooled upload files so the store streams them instead of reading them into memory
+        job_files = [(file.filename, file.content_type, file.file, file.size) for file in files]
+        job_id = await request.app.upload_jobs.submit(user_id, user_email, job_files)
+        
+        return {
+            "message": f"{len(job_files)} files are queued for processing",
+            "job_id": job_id,
+            "status": "queued"
+        }
+    
+    except Exception as e:
+        # Log all exceptions
+        await log_error(
+            request=request,
+            error=str(e),
+            endpoint="upload-jobs",
+            user_id=user_id,
+            user_email=user_email
+        )
+        
+        raise HTTPException(status_code=500, detail="Error queueing uploaded files.")
+
+
+@app.get("/upload-jobs/{job_id}")
+async def get_upload_job(request: Request, job_id: str):
+    """
+    Return the progress of an upload job.
+
+    Args:
+        request (Request): FastAPI request object
+        job_id (str): The ID of the upload job
+
+    Returns:
+        dict: Job status, counters and per-file progress with the extracted data
+              of finished files.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+
+    job = await request.app.upload_jobs.store.get_job(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    
+    return {
+        "job_id": job["_id"],
+        "status": job["status"],
+        "total": job["total"],
+        "processed": job["processed"],
+        "succeeded": job["succeeded"],
+        "files": [
+            {
+                "filename": file_entry["filename"],
+                "status": file_entry["status"],
+                "data": file_entry["data"]
+            }
+            for file_entry in job["files"]
+        ]
+    }
+
+
+@app.get("/upload-jobs/{job_id}/results")
+async def stream_upload_job_results(request: Request, job_id: str):
+    """
+    Stream the results of an upload job as newline-delimited JSON.
+
+    One record is sent per file as soon as it finishes, followed by a summary
+    record once the whole job is complete.
+
+    Args:
+        request (Request): FastAPI request object
+        job_id (str): The ID of the upload job
+
+    Returns:
+        StreamingResponse: An application/x-ndjson stream of results.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+
+    job_queue = request.app.upload_jobs
+    if not await job_queue.store.get_job(job_id, user_id):
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    
+    async def _results():
+        sent = set()
+        while True:
+            job = await job_queue.store.get_job(job_id, user_id)
+            if job is None:
+                # Removed while the stream was open
+                yield _ndjson({"type": "error", "message": "Upload job not found."})
+                return
+            for file_entry in job["files"]:
+                if file_entry["status"] in ("done", "failed") and file_entry["index"] not in sent:
+                    sent.add(file_entry["index"])
+                    yield _ndjson({
+                        "type": "file",
+                        "index": file_entry["index"],
+                        "filename": file_entry["filename"],
+                        "success": file_entry["status"] == "done",
+                        "data": file_entry["data"]
+                    })
+            if job["status"] == "completed":
+                yield _ndjson({
+                    "type": "summary",
+                    "message": _upload_summary(job["total"], job["succeeded"])
+                })
+                return
+            await job_queue.wait_for_progress()
+    
+    return StreamingResponse(_results(), media_type="application/x-ndjson")
+
+
+def _encode_cursor(document: dict) -> str:
+    """
+    Encode the sort position of the last returned CV as an opaque cursor.
+    """
+    position = {"uploaded_at": document["uploaded_at"].isoformat(), "_id": str(document["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> dict:
+    position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return {"uploaded_at": datetime.fromisoformat(position["uploaded_at"]), "_id": ObjectId(position["_id"])}
+
+
+@app.get("/search-candidates/")
+async def search_candidates(
+    request: Request,
+    skills: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+):
+    """
+    Search the uploaded CVs of the user by skills and keywords, newest first.
+
+    Args:
+        request (Request): FastAPI request object
+        skills (str): Comma-separated skills; every skill must match
+        q (str): Keywords searched in the skills, experience and education text
+        limit (int): Maximum number of candidates to return (1-100)
+        cursor (str): The next_cursor of the previous page
+
+    Returns:
+        dict: The matching candidates (without the extracted text) and the
+              cursor of the next page, or None on the last page.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+    
+    limit = max(1, min(limit, 100))
+    query = {"user_id": user_id}
+    skill_tokens = normalize_skills(skills)
+    if skill_tokens:
+        query["skill_tokens"] = {"$all": skill_tokens}
+    if q:
+        query["$text"] = {"$search": q}
+    if cursor:
+        try:
+            position = _decode_cursor(cursor)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query["$or"] = [
+            {"uploaded_at": {"$lt": position["uploaded_at"]}},
+            {"uploaded_at": position["uploaded_at"], "_id": {"$lt": position["_id"]}},
+        ]
+    
+    try:
+        # Inclusive projection so the extracted text is never read
+        projection = {"file_name": 1, "file_type": 1, "file_url": 1, "uploaded_at": 1, "extracted_data": 1}
+        documents = await request.app.mongodb["cv-data"].find(query, projection) \
+            .sort([("uploaded_at", -1), ("_id", -1)]) \
+            .limit(limit + 1) \
+            .to_list(length=limit + 1)
+        
+        next_cursor = _encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+        candidates = [
+            await load_cv_document(document, include_text=False)
+            for document in documents[:limit]
+        ]
+        
+        return {
+            "candidates": candidates,
+            "next_cursor": next_cursor
+        }
+    
+    except Exception as e:
+        # Log all exceptions
+        await log_error(
+            request=request,
+            error=str(e),
+            endpoint="search-candidates",
+            user_id=user_id
+        )
+        
+        raise HTTPException(status_code=500, detail="Error searching candidates.")
+
+
+@app.get("/cv-data/{cv_id}")
+async def get_cv_data(request: Request, cv_id: str):
+    """
+    Return a stored CV in the legacy layout, with extracted fields at the top
+    level and the full extracted text.
+
+    Args:
+        request (Request): FastAPI request object
+        cv_id (str): The ID of the cv-data document
+
+    Returns:
+        dict: The stored CV document.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+    
+    if not ObjectId.is_valid(cv_id):
+        raise HTTPException(status_code=400, detail="Invalid CV ID format")
+    
+    try:
+        document = await request.app.mongodb["cv-data"].find_one({"_id": ObjectId(cv_id), "user_id": user_id})
+        if not document:
+            raise HTTPException(status_code=404, detail="CV not found")
+        
+        return await load_cv_document(document, request.app.blob_storage)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        # Log all exceptions
+        await log_error(
+            request=request,
+            error=str(e),
+            endpoint="get-cv-data",
+            user_id=user_id,
+            cv_id=cv_id
+        )
+        
+        raise HTTPException(status_code=500, detail="Error retrieving CV.")
+
+
+async def _store_job_description(request: Request, background_tasks: BackgroundTasks,
+                                 generated: dict, user_id: str, user_email: str) -> dict:
+    """
+    Persist a generated job description to jd-data.
+
+    Args:
+        request (Request): FastAPI request object
+        background_tasks (BackgroundTasks): Tasks run after the response is sent
+        generated (dict): The generated JD fields
+        user_id (str): The ID of the user
+        user_email (str): The email of the user
+
+    Returns:
+        dict: The stored document, with its id as a string
+    """
+    # Create data dictionary from response
+    data_dict = {
+        "job_title": generated["job_title"],
+        "job_description": generated["job_description"],
+        "job_experience": generated["job_experience"],
+        "job_education": generated["job_education"],
+        "job_skills": generated["job_skills"],
+        "job_responsibilities": generated["job_responsibilities"],
+        "Linkedin_url": generated.get("Linkedin_url"),
+        "user_id": user_id,
+        "user_email": user_email,
+        "uploaded_at": datetime.now(),
+        "is_exported": 0
+    }
+    
+    # Use the app-wide MongoDB connection
+    collection = request.app.mongodb["jd-data"]
+    result = await collection.insert_one(data_dict)
+    
+    # Convert ObjectId to string for the response
+    data_dict["_id"] = str(result.inserted_id)
+    
+    # Pre-render the PDF after responding so the first download is served from cache
+    background_tasks.add_task(request.app.pdf_cache.get_or_render, data_dict["_id"], dict(data_dict))
+    return data_dict
+
+
 @app.post("/create-job-description/")
 async def create_job_description(
     request: Request,
+    background_tasks: BackgroundTasks,
     information: str = Form(...),
     session_cookie: str = Form(...),  # session cookie(after the auth) 
+    bypass_cache: bool = Form(False),
 ):
     """
     Create a job description based on provided information.
 
+    Requirements matching an earlier generation are served from the JD cache
+    without calling the LLM.
+
     Args:
         request (Request): FastAPI request object
         information (str): The information about the job description provided by the user.
         session_cookie (str): Session cookie for authentication.
+        bypass_cache (bool): Always generate a new job description (the cache is still refreshed).
 
     Returns:
-        dict: A dictionary containing the job description and status message.
+        dict: A dictionary containing the job description, status message and
+              cache result ("exact", "similar" or None).
     """
     # TODO: Implement proper session validation when auth is implemented
     user_id = "123"  # Will come from session cookie after auth implementation
     user_email = "test@test.com"  # Will come from session cookie after auth implementation
 
     try:
-        # Generate job description using LLM
-        response = await request.app.structured_llm_jd.ainvoke(JD_PROMPT.format(user_requirements=information))
-        
-        # Create data dictionary from response
-        data_dict = {
-            "job_title": response.job_title,
-            "job_description": response.job_description,
-            "job_experience": response.job_experience,
-            "job_education": response.job_education,
-            "job_skills": response.job_skills,
-            "job_responsibilities": response.job_responsibilities,
-            "Linkedin_url": response.Linkedin_url,
-            "user_id": user_id,
-            "user_email": user_email,
-            "uploaded_at": datetime.now(),
-            "is_exported": 0
-        }
+        jd_cache = request.app.jd_cache
+        generated, cache_result = None, None
+        if bypass_cache:
+            jd_cache.bypassed += 1
+        else:
+            generated, cache_result = await jd_cache.get(information)
         
-        # Use the app-wide MongoDB connection
-        collection = request.app.mongodb["jd-data"]
-        result = await collection.insert_one(data_dict)
+        if generated is None:
+            # Generate job description using LLM
+            response = await request.app.structured_llm_jd.ainvoke(JD_PROMPT.format(user_requirements=information))
+            generated = response.model_dump()
+            await jd_cache.set(information, generated)
         
-        # Convert ObjectId to string for the response
-        data_dict["_id"] = str(result.inserted_id)
+        data_dict = await _store_job_description(request, background_tasks, generated, user_id, user_email)
         
         return {
             "message": "Job description created successfully",
-            "job_description": data_dict
+            "job_description": data_dict,
+            "cache": cache_result
         }
             
     except Exception as e:
@@ -150,6 +555,101 @@ async def create_job_description(
         raise HTTPException(status_code=500, detail="Error creating job description.")
 
 
+@app.post("/create-job-description-stream/")
+async def create_job_description_stream(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    information: str = Form(...),
+    session_cookie: str = Form(...),  # session cookie(after the auth) 
+    bypass_cache: bool = Form(False),
+):
+    """
+    Create a job description and stream its fields while they are generated.
+
+    Sends newline-delimited JSON by default, or Server-Sent Events when the
+    client accepts text/event-stream. "partial" records carry the fields that
+    changed since the previous record (each value is the full text so far);
+    the last record is "done" with the validated, stored job description, as
+    returned by /create-job-description/. A JD cache hit is sent as a single
+    "done" record.
+
+    Args:
+        request (Request): FastAPI request object
+        information (str): The information about the job description provided by the user.
+        session_cookie (str): Session cookie for authentication.
+        bypass_cache (bool): Always generate a new job description (the cache is still refreshed).
+
+    Returns:
+        StreamingResponse: A stream of partial fields and the final job description.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+    user_email = "test@test.com"  # Will come from session cookie after auth implementation
+    
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+    
+    def _encode(record: dict) -> bytes:
+        if use_sse:
+            return f"event: {record['type']}\ndata: {json.dumps(record, default=str)}\n\n".encode("utf-8")
+        return _ndjson(record)
+    
+    async def _events():
+        try:
+            jd_cache = request.app.jd_cache
+            generated, cache_result = None, None
+            if bypass_cache:
+                jd_cache.bypassed += 1
+            else:
+                generated, cache_result = await jd_cache.get(information)
+            
+            if generated is None:
+                # Stream the tool call arguments and send each field as it grows
+                prompt = JD_PROMPT.format(user_requirements=information)
+                async for kind, value in stream_jd(request.app.streaming_llm_jd, prompt):
+                    if kind == "partial":
+                        yield _encode({"type": "partial", "fields": value})
+                    else:
+                        generated = value.model_dump()
+                await jd_cache.set(information, generated)
+            
+            data_dict = await _store_job_description(request, background_tasks, generated, user_id, user_email)
+            yield _encode({
+                "type": "done",
+                "message": "Job description created successfully",
+                "job_description": data_dict,
+                "cache": cache_result
+            })
+        except Exception as e:
+            # Log all exceptions
+            await log_error(
+                request=request,
+                error=str(e),
+                endpoint="create-job-description-stream",
+                user_id=user_id,
+                user_email=user_email
+            )
+            yield _encode({"type": "error", "message": "Error creating job description."})
+    
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches etag: "*", or one of its
+    comma-separated ETags compared weakly (a W/ prefix is ignored).
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in tags:
+        return True
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
 @app.get("/get-job-description-pdf/{job_id}")
 async def get_job_description_pdf(request: Request, job_id: str):
     """
@@ -160,8 +660,12 @@ async def get_job_description_pdf(request: Request, job_id: str):
         job_id (str): The ID of the job description to export.
 
     Returns:
-        StreamingResponse: A PDF file of the job description.
+        Response: A PDF file of the job description, or 304 Not Modified when
+                  the If-None-Match header matches its ETag.
     """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+
     try:
         # Validate job_id format
         if not ObjectId.is_valid(job_id):
@@ -171,42 +675,264 @@ async def get_job_description_pdf(request: Request, job_id: str):
         collection = request.app.mongodb["jd-data"]
         job_id_obj = ObjectId(job_id)
         
-        # Increment export counter and retrieve job description in one operation
-        result = await collection.find_one_and_update(
-            {"_id": job_id_obj}, 
-            {"$inc": {"is_exported": 1}},
-            return_document=True  # Return the updated document
-        )
-        
+        result = await collection.find_one({"_id": job_id_obj, "user_id": user_id})
         if not result:
             raise HTTPException(status_code=404, detail="Job description not found")
         
-        # Generate PDF
-        pdf_buffer = await generate_pdf(result)
+        # A revalidation of an unchanged PDF is not an export, and needs no render
+        etag = f'"{jd_content_hash(result)}"'
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        # Serve the cached render, rendering only when the JD content changed
+        pdf_bytes, _ = await request.app.pdf_cache.get_or_render(job_id, result)
+        await collection.update_one({"_id": job_id_obj, "user_id": user_id}, {"$inc": {"is_exported": 1}})
         
         # Create a safe filename
         safe_title = result.get("job_title", "job-description").replace(" ", "-").lower()
         filename = f"{safe_title}-{datetime.now().strftime('%Y-%m-%d')}.pdf"
         
-        # Return streaming response
-        return StreamingResponse(
-            iter([pdf_buffer.getvalue()]),
+        return Response(
+            content=pdf_bytes,
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}"
+                "Content-Disposition": f"attachment; filename={filename}",
+                "ETag": etag,
+                "Cache-Control": "private, no-cache"
             }
         )
     
+    except HTTPException:
+        raise
+    
     except Exception as e:
         # Log all exceptions
         await log_error(
             request=request,
             error=str(e),
             endpoint="export-job-description-pdf",
-            job_id=job_id
+            job_id=job_id,
+            user_id=user_id
         )
             
         # Otherwise, convert to a generic HTTP 500 error
         raise HTTPException(status_code=500, detail="Error exporting PDF.")
 
 
+@app.post("/export-job-descriptions/")
+async def export_job_descriptions(request: Request, export_request: JDExportRequest):
+    """
+    Export many job descriptions in one request, as a ZIP of PDFs or one merged PDF.
+
+    PDFs are rendered in parallel on the extraction process pool. The ZIP
+    archive is streamed as renders complete and never held in memory. The
+    merged PDF is streamed too, but pypdf keeps the page objects of every job
+    description in memory until the last one is appended, so its memory use
+    grows with the number of job ids.
+
+    Args:
+        request (Request): FastAPI request object
+        export_request (JDExportRequest): The job description ids and the export format
+
+    Returns:
+        StreamingResponse: The ZIP archive, streamed as PDFs are rendered, or
+                           the merged PDF in the order of job_ids.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+
+    if not export_request.job_ids:
+        raise HTTPException(status_code=400, detail="No job IDs provided")
+    if not all(ObjectId.is_valid(job_id) for job_id in export_request.job_ids):
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    
+    try:
+        collection = request.app.mongodb["jd-data"]
+        job_ids = list(dict.fromkeys(ObjectId(job_id) for job_id in export_request.job_ids))
+        
+        # Fetch every job description of the user with one query and bump all export counters at once
+        documents = await collection.find({"_id": {"$in": job_ids}, "user_id": user_id}).to_list(length=len(job_ids))
+        if documents:
+            await collection.update_many(
+                {"_id": {"$in": [document["_id"] for document in documents]}, "user_id": user_id},
+                {"$inc": {"is_exported": 1}}
+            )
+    
+    except Exception as e:
+        # Log all exceptions
+        await log_error(
+            request=request,
+            error=str(e),
+            endpoint="export-job-descriptions",
+            user_id=user_id
+        )
+        
+        raise HTTPException(status_code=500, detail="Error exporting job descriptions.")
+    
+    if not documents:
+        raise HTTPException(status_code=404, detail="Job descriptions not found")
+    
+    # Keep the requested order
+    position = {job_id: index for index, job_id in enumerate(job_ids)}
+    documents.sort(key=lambda document: position[document["_id"]])
+    concurrency = get_settings().pdf_render_concurrency
+    date = datetime.now().strftime('%Y-%m-%d')
+    
+    if export_request.format == "pdf":
+        return StreamingResponse(
+            stream_merged_jd_pdf(request.app.pdf_cache, documents, concurrency),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename=job-descriptions-{date}.pdf"}
+        )
+    
+    return StreamingResponse(
+        stream_jd_zip(request.app.pdf_cache, documents, concurrency),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=job-descriptions-{date}.zip"}
+    )
+
+
+def _mongodb_pool_stats(app) -> Optional[dict]:
+    if not app.is_warm("mongodb_client"):
+        return None
+    from app.database.get_client import pool_stats
+    return pool_stats.stats()
+
+
+def _pipeline_stats(app) -> dict:
+    """
+    Collect the statistics of every pipeline component.
+    """
+    def _stats(name):
+        # Clients that have not been used yet are reported as None instead of being built
+        client = getattr(app, name) if app.is_warm(name) else None
+        return client.stats() if client else None
+
+    return {
+        "stages": get_metrics().stats(),
+        "extraction": _stats("extraction_executor"),
+        "cv_cache": _stats("cv_cache"),
+        "jd_cache": _stats("jd_cache"),
+        "cv_text": _stats("cv_text"),
+        "cv_batcher": _stats("cv_batcher"),
+        "write_buffers": _stats("write_buffers"),
+        "pdf_cache": _stats("pdf_cache"),
+        "llm": _stats("llm_scheduler"),
+        "mongodb_pool": _mongodb_pool_stats(app)
+    }
+
+
+@app.get("/pipeline-stats/")
+async def pipeline_stats(request: Request):
+    """
+    Return runtime statistics of the CV processing pipeline.
+
+    Args:
+        request (Request): FastAPI request object
+
+    Returns:
+        dict: Per-stage timings, extraction executor, cache, CV text, batch extraction,
+              write buffer, PDF cache, LLM scheduler and MongoDB pool statistics.
+    """
+    return _pipeline_stats(request.app)
+
+
+@app.get("/rank-candidates/{job_id}")
+async def rank_candidates(request: Request, job_id: str, top_k: int = 20):
+    """
+    Rank the user's uploaded CVs against a job description.
+
+    Scores come from one matrix product over the user's precomputed CV
+    vectors; the index is built from cv-data on first use.
+
+    Args:
+        request (Request): FastAPI request object
+        job_id (str): The ID of the job description
+        top_k (int): Number of candidates to return (1-100)
+
+    Returns:
+        dict: The best matching candidates with their similarity scores.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+    
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    
+    try:
+        job_data = await request.app.mongodb["jd-data"].find_one({"_id": ObjectId(job_id), "user_id": user_id})
+        if not job_data:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        
+        cv_collection = request.app.mongodb["cv-data"]
+        ranked = await request.app.cv_matcher.rank(
+            user_id,
+            jd_match_text(job_data),
+            top_k=max(1, min(top_k, 100)),
+            collection=cv_collection
+        )
+        
+        # Fetch all ranked CVs in one query, never reading the extracted text
+        projection = {"file_name": 1, "file_type": 1, "file_url": 1, "uploaded_at": 1, "extracted_data": 1}
+        documents = await cv_collection.find(
+            {"_id": {"$in": [ObjectId(cv_id) for cv_id, _ in ranked]}, "user_id": user_id},
+            projection
+        ).to_list(length=len(ranked))
+        documents_by_id = {str(document["_id"]): document for document in documents}
+        
+        candidates = []
+        for cv_id, score in ranked:
+            # CVs still waiting in the write buffer are skipped
+            if cv_id in documents_by_id:
+                candidate = await load_cv_document(documents_by_id[cv_id], include_text=False)
+                candidates.append({"score": round(score, 4), "candidate": candidate})
+        
+        return {
+            "job_id": job_id,
+            "candidates": candidates
+        }
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        # Log all exceptions
+        await log_error(
+            request=request,
+            error=str(e),
+            endpoint="rank-candidates",
+            user_id=user_id,
+            job_id=job_id
+        )
+        
+        raise HTTPException(status_code=500, detail="Error ranking candidates.")
+
+
+@app.post("/rank-candidates/rebuild-index/")
+async def rebuild_candidate_index(request: Request):
+    """
+    Rebuild the user's CV matching index from the cv-data collection.
+
+    Args:
+        request (Request): FastAPI request object
+
+    Returns:
+        dict: The number of indexed CVs.
+    """
+    # TODO: Implement proper session validation when auth is implemented
+    user_id = "123"  # Will come from session cookie after auth implementation
+    
+    try:
+        indexed = await request.app.cv_matcher.rebuild(user_id, request.app.mongodb["cv-data"])
+        return {"message": f"Indexed {indexed} CVs", "indexed": indexed}
+    
+    except Exception as e:
+        # Log all exceptions
+        await log_error(
+            request=request,
+            error=str(e),
+            endpoint="rebuild-candidate-index",
+            user_id=user_id
+        )
+        
+        raise HTTPException(status_code=500, detail="Error rebuilding candidate index.")
@@ -0,0 +1,228 @@
+import re
+import zlib
+import uuid
+from bson.binary import Binary #type: ignore
+from bson.objectid import ObjectId #type: ignore
+from app.utils.settings import get_settings
+
+# Version of the compact cv-data layout written by build_cv_document
+CV_SCHEMA_VERSION = 2
+
+# Structured fields that the legacy layout copied to the top level of the document
+CV_DATA_FIELDS = ("name", "email", "phone", "address", "education", "experience", "skills", "linkedin_url")
+
+
+def normalize_skills(skills: str) -> list:
+    """
+    Split a free-text skills string into normalized tokens for indexed search.
+
+    Example: "Python, AWS; Machine  Learning" -> ["python", "aws", "machine learning"]
+    """
+    if not skills or skills == "Not Found":
+        return []
+    tokens = []
+    for token in re.split(r"[,;|\n\u2022]+", skills.lower()):
+        token = " ".join(token.split()).strip(" .-*")
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+async def ensure_cv_indexes(collection):
+    """
+    Create the indexes used by candidate search on the cv-data collection.
+    """
+    try:
+        await collection.create_index([("user_id", 1), ("uploaded_at", -1), ("_id", -1)], name="user_recent")
+        await collection.create_index([("user_id", 1), ("skill_tokens", 1), ("uploaded_at", -1)], name="user_skills")
+        await collection.create_index(
+            [
+                ("user_id", 1),
+                ("extracted_data.skills", "text"),
+                ("extracted_data.experience", "text"),
+                ("extracted_data.education", "text"),
+            ],
+            name="user_text"
+        )
+    except Exception as e:
+        print(f"Failed to create cv-data indexes: {str(e)}")
+
+
+def compress_text(text: str, codec: str = "zlib") -> bytes:
+    """
+    Compress extracted CV text.
+
+    Args:
+        text (str): The text to compress
+        codec (str): "zlib", or "zstd" when the zstandard package is installed
+
+    Returns:
+        bytes: The compressed text
+    """
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        import zstandard #type: ignore
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress_text(data: bytes, codec: str = "zlib") -> str:
+    if codec == "zstd":
+        import zstandard #type: ignore
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+
+def text_codec() -> str:
+    """
+    Codec selected by CV_TEXT_CODEC, falling back to zlib when zstandard is missing.
+    """
+    codec = get_settings().cv_text_codec
+    if codec == "zstd":
+        try:
+            import zstandard #type: ignore # noqa: F401
+        except ImportError:
+            print("zstandard is not installed, compressing CV text with zlib")
+            return "zlib"
+    return codec
+
+
+async def store_text(text: str, user_id: str, blob_storage=None) -> dict:
+    """
+    Build the compact representation of the extracted text of a CV.
+
+    The text is compressed and either kept inline or, with CV_TEXT_STORAGE=blob,
+    moved to the blob store with only a reference kept in the document.
+
+    Args:
+        text (str): The extracted text
+        user_id (str): The ID of the user owning the CV
+        blob_storage: The blob storage backend, needed for CV_TEXT_STORAGE=blob
+
+    Returns:
+        dict: Fields to store in the cv-data document
+    """
+    codec = text_codec()
+    compressed = compress_text(text, codec)
+    if get_settings().cv_text_storage == "blob" and blob_storage is not None:
+        text_blob_path = f"{user_id}/extracted-text/{uuid.uuid4().hex}.{codec}"
+        await blob_storage.upload(text_blob_path, compressed, "application/octet-stream", "attachment")
+        return {"text_codec": codec, "text_blob_path": text_blob_path}
+    return {"text_codec": codec, "extracted_text_z": Binary(compressed)}
+
+
+def build_cv_document(file_name: str, file_size: int, file_type: str, file_url: str,
+                      user_id: str, user_email: str, uploaded_at, extracted_data: dict,
+                      text_fields: dict) -> dict:
+    """
+    Build a cv-data document in the compact layout: one copy of the structured
+    fields under extracted_data, normalized skill tokens for search, and the
+    extracted text compressed or offloaded.
+    """
+    return {
+        # Assigned up front so the id is known before the buffered insert is flushed
+        "_id": ObjectId(),
+        "file_name": file_name,
+        "file_size": file_size,
+        "file_type": file_type,
+        "file_url": file_url,
+        "user_id": user_id,
+        "user_email": user_email,
+        "uploaded_at": uploaded_at,
+        "extracted_data": extracted_data,
+        "skill_tokens": normalize_skills(extracted_data.get("skills")),
+        "schema_version": CV_SCHEMA_VERSION,
+        **text_fields,
+    }
+
+
+async def load_text(document: dict, blob_storage=None) -> str:
+    """
+    Return the extracted text of a cv-data document in any layout.
+    """
+    if "extracted_text" in document:
+        return document["extracted_text"]
+    codec = document.get("text_codec", "zlib")
+    if "extracted_text_z" in document:
+        return decompress_text(bytes(document["extracted_text_z"]), codec)
+    if "text_blob_path" in document and blob_storage is not None:
+        return decompress_text(await blob_storage.download(document["text_blob_path"]), codec)
+    return None
+
+
+async def load_cv_document(document: dict, blob_storage=None, include_text: bool = True) -> dict:
+    """
+    Expand a cv-data document to the legacy layout returned by the API, with the
+    structured fields flattened to the top level and extracted_text as a string.
+
+    Args:
+        document (dict): The stored document, in the legacy or the compact layout
+        blob_storage: The blob storage backend, needed for offloaded text
+        include_text (bool): Whether to load the extracted text
+
+    Returns:
+        dict: The document in the legacy layout
+    """
+    legacy = {
+        key: value for key, value in document.items()
+        if key not in ("extracted_text_z", "text_codec", "text_blob_path", "schema_version", "skill_tokens")
+    }
+    extracted_data = document.get("extracted_data") or {}
+    legacy.update(extracted_data)
+    # The top-level file_url is the one stored for the file itself
+    legacy["file_url"] = document.get("file_url", extracted_data.get("file_url"))
+    if "_id" in legacy:
+        legacy["_id"] = str(legacy["_id"])
+    if include_text:
+        legacy["extracted_text"] = await load_text(document, blob_storage)
+    else:
+        legacy.pop("extracted_text", None)
+    return legacy
+
+
+async def migrate_cv_documents(collection, batch_size: int = 500, blob_storage=None,
+                               dry_run: bool = False) -> int:
+    """
+    Rewrite legacy cv-data documents to the compact layout in batches.
+
+    Args:
+        collection: The cv-data collection
+        batch_size (int): Number of documents rewritten per bulk write
+        blob_storage: The blob storage backend, needed for CV_TEXT_STORAGE=blob
+        dry_run (bool): Count the documents without rewriting them
+
+    Returns:
+        int: Number of migrated documents
+    """
+    from pymongo import UpdateOne #type: ignore
+
+    query = {"schema_version": {"$exists": False}}
+    if dry_run:
+        return await collection.count_documents(query)
+
+    migrated = 0
+    last_id = None
+    while True:
+        batch_query = dict(query)
+        if last_id is not None:
+            batch_query["_id"] = {"$gt": last_id}
+        documents = await collection.find(batch_query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not documents:
+            break
+
+        operations = []
+        for document in documents:
+            text_fields = await store_text(document.get("extracted_text") or "", document.get("user_id"), blob_storage)
+            skill_tokens = normalize_skills((document.get("extracted_data") or {}).get("skills"))
+            operations.append(UpdateOne(
+                {"_id": document["_id"], "schema_version": {"$exists": False}},
+                {
+                    "$set": {**text_fields, "skill_tokens": skill_tokens, "schema_version": CV_SCHEMA_VERSION},
+                    "$unset": {field: "" for field in ("extracted_text", *CV_DATA_FIELDS)},
+                }
+            ))
+        result = await collection.bulk_write(operations, ordered=False)
+        migrated += result.modified_count
+        last_id = documents[-1]["_id"]
+        print(f"Migrated {migrated} cv-data documents")
+    return migrated
@@ -1,21 +1,154 @@
-import asyncio
+import threading
 from motor.motor_asyncio import AsyncIOMotorClient #type: ignore
+from pymongo.monitoring import ConnectionPoolListener #type: ignore
 from pymongo.server_api import ServerApi #type: ignore
-import os
-from dotenv import load_dotenv
+from app.utils.settings import get_settings
+
+# One client per URI for the whole process, so every caller shares the same
+# connection pool and server monitors
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class PoolStats(ConnectionPoolListener):
+    """
+    Connection pool statistics collected through pymongo's monitoring API,
+    across every shared client.
+    """
+
+    def __init__(self):
+        self.pools = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+        self.max_in_use = 0
+        self._checkout_started = 0
+
+    @property
+    def in_use(self) -> int:
+        return self.checked_out - self.checked_in
+
+    # ConnectionPoolListener callbacks; these run on pymongo threads and only
+    # update counters, so they take no locks
+    def pool_created(self, event):
+        self.pools += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        self.pools -= 1
+
+    def connection_created(self, event):
+        self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        self._checkout_started += 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def connection_checked_in(self, event):
+        self.checked_in += 1
+
+    def stats(self) -> dict:
+        return {
+            "pools": self.pools,
+            "open_connections": self.connections_created - self.connections_closed,
+            "connections_created": self.connections_created,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "checkouts": self.checked_out,
+            "checkout_failures": self.checkout_failures,
+            "waiting": self._checkout_started - self.checked_out - self.checkout_failures,
+            "pool_clears": self.pool_clears,
+        }
+
+
+pool_stats = PoolStats()
+
+
+def client_options() -> dict:
+    """
+    Options of the shared MongoDB clients, from the MONGO_* settings.
+    """
+    settings = get_settings()
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "maxConnecting": settings.mongo_max_connecting,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+        "readPreference": settings.mongo_read_preference,
+        "retryWrites": settings.mongo_retry_writes,
+        "appname": "hr-first",
+        "event_listeners": [pool_stats],
+    }
+    if settings.mongo_socket_timeout_ms:
+        options["socketTimeoutMS"] = settings.mongo_socket_timeout_ms
+    if settings.mongo_read_concern:
+        options["readConcernLevel"] = settings.mongo_read_concern
+    if settings.mongo_write_concern:
+        write_concern = settings.mongo_write_concern
+        options["w"] = int(write_concern) if write_concern.isdigit() else write_concern
+    if settings.mongo_server_api:
+        options["server_api"] = ServerApi(settings.mongo_server_api)
+    return options
+
+
+def get_mongo_client(uri: str = None):
+    """
+    Return the shared MongoDB client for uri, creating it on first use.
+
+    Args:
+        uri (str): The connection string, defaults to the configured one
+
+    Returns:
+        AsyncIOMotorClient: The shared client
+    """
+    uri = uri or get_settings().mongodb_url
+    if not uri:
+        raise ValueError("MongoDB URI not found in environment variables")
+    with _clients_lock:
+        if uri not in _clients:
+            _clients[uri] = AsyncIOMotorClient(uri, **client_options())
+        return _clients[uri]
+
+
+def close_clients():
+    """
+    Close every shared client.
+    """
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
 
-load_dotenv()
 
 async def get_client():
-    uri = os.getenv('uri')
+    """
+    Return the shared MongoDB client, or None when it cannot be created.
+    """
     try:
-        if not uri:
-            print("Error: MongoDB URI not found in environment variables")
-            return
-        
-        client = AsyncIOMotorClient(uri, server_api=ServerApi('1'))
-        return client
+        return get_mongo_client()
     except Exception as e:
         print(f"Failed to connect to MongoDB: {str(e)}")
         return None
-
@@ -0,0 +1,161 @@
+import asyncio
+from app.utils.settings import get_settings
+
+
+def _is_id_duplicate(error: dict) -> bool:
+    return error.get("code") == 11000 and list(error.get("keyPattern", {"_id": 1})) == ["_id"]
+
+
+class BufferedWriter:
+    """
+    Write-behind buffer for one MongoDB collection.
+
+    Documents are queued in memory and written with unordered insert_many once
+    max_batch documents are pending or flush_interval seconds have passed.
+    insert() blocks while max_pending documents are waiting (backpressure).
+    """
+
+    def __init__(self, collection, max_batch: int = 500, flush_interval: float = 1.0,
+                 max_pending: int = 10000, max_retries: int = 3):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+
+        self._buffer = []
+        self._space = asyncio.Condition()
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+
+        # Metrics
+        self.flushes = 0
+        self.written = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def insert(self, document: dict):
+        """
+        Queue a document for insertion.
+
+        Args:
+            document (dict): The document to insert
+        """
+        async with self._space:
+            await self._space.wait_for(lambda: len(self._buffer) < self.max_pending)
+            self._buffer.append(document)
+            if len(self._buffer) >= self.max_batch:
+                self._flush_requested.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def flush(self):
+        """
+        Write every pending document to the collection.
+        """
+        from pymongo.errors import BulkWriteError #type: ignore
+
+        async with self._flush_lock:
+            while self._buffer:
+                async with self._space:
+                    batch, self._buffer = self._buffer[:self.max_batch], self._buffer[self.max_batch:]
+                    self._space.notify_all()
+
+                for attempt in range(self.max_retries):
+                    try:
+                        await self.collection.insert_many(batch, ordered=False)
+                        self.written += len(batch)
+                        break
+                    except BulkWriteError as e:
+                        # Unordered inserts keep going past failed documents. On a retry,
+                        # an _id duplicate was written by the attempt that failed in transit
+                        errors = e.details.get("writeErrors", [])
+                        failed = len(errors) - (sum(map(_is_id_duplicate, errors)) if attempt else 0)
+                        self.written += len(batch) - failed
+                        self.dropped += failed
+                        if failed:
+                            print(f"Buffered write to {self.collection.name} rejected {failed} documents: {str(e)}")
+                        break
+                    except Exception as e:
+                        if attempt == self.max_retries - 1:
+                            self.dropped += len(batch)
+                            print(f"Buffered write to {self.collection.name} failed, dropping {len(batch)} documents: {str(e)}")
+                        else:
+                            await asyncio.sleep(0.5 * 2 ** attempt)
+                self.flushes += 1
+
+    async def close(self):
+        """
+        Stop the background flusher and drain the buffer.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._buffer),
+            "flushes": self.flushes,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+class WriteBuffers:
+    """
+    One BufferedWriter per collection of a database, created on first use.
+    """
+
+    def __init__(self, db, max_batch: int = 500, flush_interval: float = 1.0, max_pending: int = 10000):
+        self.db = db
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._writers = {}
+
+    def writer(self, collection_name: str) -> BufferedWriter:
+        if collection_name not in self._writers:
+            writer = BufferedWriter(
+                self.db[collection_name],
+                max_batch=self.max_batch,
+                flush_interval=self.flush_interval,
+                max_pending=self.max_pending,
+            )
+            writer.start()
+            self._writers[collection_name] = writer
+        return self._writers[collection_name]
+
+    async def insert(self, collection_name: str, document: dict):
+        await self.writer(collection_name).insert(document)
+
+    async def close(self):
+        await asyncio.gather(*(writer.close() for writer in self._writers.values()))
+
+    def stats(self) -> dict:
+        return {name: writer.stats() for name, writer in self._writers.items()}
+
+
+def create_write_buffers(db) -> WriteBuffers:
+    """
+    Create the write-behind buffers configured by the WRITE_BUFFER_* settings.
+    """
+    settings = get_settings()
+    return WriteBuffers(
+        db,
+        max_batch=settings.write_buffer_batch_size,
+        flush_interval=settings.write_buffer_flush_interval,
+        max_pending=settings.write_buffer_max_pending,
+    )
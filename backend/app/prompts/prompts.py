@@ -15,6 +15,25 @@ cv_data:
 {cv_data}
 """
 
+CV_BATCH_DATA_PROMPT = """
+You are a helpful assistant that extracts data from several CVs at once.
+
+Each CV is enclosed in <cv id="..."> and </cv> tags. For EVERY CV return one entry
+with its document_id set to the id of the tag, and extract the following data:
+- name
+- email
+- phone
+- education
+- experience
+- skills
+
+Never mix data between CVs.
+IMPORTANT: If data is not found, return "Not Found" for that field.
+
+cvs:
+{cvs}
+"""
+
 JD_PROMPT = """
 You are a helpful assistant that creates a job description.
 
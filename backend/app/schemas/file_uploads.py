@@ -3,6 +3,7 @@ NOTE:
 1.Designing a scalable backend for file uploads
 '''
 
+from typing import List
 from pydantic import BaseModel
 
 class CVUserData(BaseModel):
@@ -14,3 +15,9 @@ class CVUserData(BaseModel):
     experience:str
     skills:str
     linkedin_url:str
+
+class CVBatchItem(CVUserData):
+    document_id:str
+
+class CVUserDataBatch(BaseModel):
+    cvs:List[CVBatchItem]
@@ -1,3 +1,4 @@
+from typing import List, Literal
 from pydantic import BaseModel
 
 
@@ -8,5 +9,9 @@ class JD(BaseModel):
     job_education:str
     job_skills:str
     job_responsibilities:str
+    Linkedin_url:str
 
 
+class JDExportRequest(BaseModel):
+    job_ids:List[str]
+    format:Literal["zip", "pdf"] = "zip"
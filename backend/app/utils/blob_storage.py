@@ -0,0 +1,217 @@
+import os
+import uuid
+import base64
+import asyncio
+from pathlib import Path
+from app.utils.settings import get_settings
+
+
+class AzureBlobStorage:
+    """
+    Async Azure Blob Storage backend.
+
+    Uses the aio BlobServiceClient on top of a single shared aiohttp connection
+    pool, so uploads never block the event loop and connections are reused
+    across requests. Files larger than max_single_put_size are split into
+    blocks of max_block_size and uploaded in parallel (max_concurrency).
+    """
+
+    def __init__(self, connection_string: str, container_name: str, pool_size: int = 100,
+                 max_concurrency: int = 4, max_block_size: int = 4 * 1024 * 1024,
+                 max_single_put_size: int = 8 * 1024 * 1024):
+        import aiohttp
+        from azure.core.pipeline.transport import AioHttpTransport #type: ignore
+        from azure.storage.blob.aio import BlobServiceClient #type: ignore
+
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=pool_size))
+        self._service_client = BlobServiceClient.from_connection_string(
+            connection_string,
+            transport=AioHttpTransport(session=self._session, session_owner=False),
+            max_block_size=max_block_size,
+            max_single_put_size=max_single_put_size,
+        )
+        self.container_client = self._service_client.get_container_client(container_name)
+        self.max_concurrency = max_concurrency
+        self._max_block_size = max_block_size
+
+    async def upload(self, blob_path: str, data: bytes, content_type: str,
+                     content_disposition: str = "inline") -> str:
+        """
+        Upload data to blob_path, overwriting any existing blob.
+
+        Args:
+            blob_path (str): Path of the blob inside the container
+            data (bytes): The content to upload
+            content_type (str): MIME type stored with the blob
+            content_disposition (str): Content-Disposition stored with the blob
+
+        Returns:
+            str: URL of the uploaded blob
+        """
+        from azure.storage.blob import ContentSettings #type: ignore
+
+        blob_client = self.container_client.get_blob_client(blob_path)
+        await blob_client.upload_blob(
+            data,
+            overwrite=True,
+            max_concurrency=self.max_concurrency,
+            content_settings=ContentSettings(
+                content_type=content_type,
+                content_disposition=content_disposition
+            )
+        )
+        return blob_client.url
+
+    async def upload_stream(self, blob_path: str, chunks, content_type: str,
+                            content_disposition: str = "inline") -> str:
+        """
+        Upload data from an async iterator of chunks as they arrive.
+
+        Chunks are gathered into blocks of max_block_size that are staged while
+        the rest is still being read, with up to max_concurrency blocks in
+        flight, then committed as one blob. Content smaller than one block is
+        sent with a single put. If the iterator raises, nothing is committed
+        and the staged blocks expire on their own.
+
+        Returns:
+            str: URL of the uploaded blob
+        """
+        from azure.storage.blob import BlobBlock, ContentSettings #type: ignore
+
+        blob_client = self.container_client.get_blob_client(blob_path)
+        block_ids = []
+        in_flight = set()
+        buffer = bytearray()
+
+        async def stage(data: bytes):
+            block_id = base64.b64encode(f"{len(block_ids):08d}".encode()).decode()
+            block_ids.append(block_id)
+            if len(in_flight) >= self.max_concurrency:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                in_flight.difference_update(done)
+                for task in done:
+                    task.result()
+            in_flight.add(asyncio.create_task(blob_client.stage_block(block_id, data)))
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                while len(buffer) >= self._max_block_size:
+                    await stage(bytes(buffer[:self._max_block_size]))
+                    del buffer[:self._max_block_size]
+            if not block_ids:
+                return await self.upload(blob_path, bytes(buffer), content_type, content_disposition)
+            if buffer:
+                await stage(bytes(buffer))
+            await asyncio.gather(*in_flight)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            raise
+
+        await blob_client.commit_block_list(
+            [BlobBlock(block_id=block_id) for block_id in block_ids],
+            content_settings=ContentSettings(
+                content_type=content_type,
+                content_disposition=content_disposition
+            )
+        )
+        return blob_client.url
+
+    async def download(self, blob_path: str) -> bytes:
+        """
+        Download the content of a blob.
+
+        Args:
+            blob_path (str): Path of the blob inside the container
+
+        Returns:
+            bytes: The blob content
+        """
+        blob_client = self.container_client.get_blob_client(blob_path)
+        stream = await blob_client.download_blob(max_concurrency=self.max_concurrency)
+        return await stream.readall()
+
+    async def close(self):
+        await self._service_client.close()
+        await self._session.close()
+
+
+class LocalBlobStorage:
+    """
+    Local filesystem stand-in for AzureBlobStorage.
+
+    Writes blobs under root_dir in a worker thread. Used for offline
+    development and benchmarking.
+    """
+
+    def __init__(self, root_dir: str, base_url: str = None):
+        self.root_dir = Path(root_dir).resolve()
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip("/") if base_url else self.root_dir.as_uri()
+
+    def _path(self, blob_path: str) -> Path:
+        path = (self.root_dir / blob_path).resolve()
+        if self.root_dir not in path.parents:
+            raise ValueError(f"Invalid blob path: {blob_path}")
+        return path
+
+    def _write(self, blob_path: str, data: bytes):
+        path = self._path(blob_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    async def upload(self, blob_path: str, data: bytes, content_type: str,
+                     content_disposition: str = "inline") -> str:
+        await asyncio.to_thread(self._write, blob_path, data)
+        return f"{self.base_url}/{blob_path}"
+
+    async def upload_stream(self, blob_path: str, chunks, content_type: str,
+                            content_disposition: str = "inline") -> str:
+        # Chunks go to a temporary file that replaces the blob once complete
+        path = self._path(blob_path)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+        blob_file = await asyncio.to_thread(open, temp_path, "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(blob_file.write, chunk)
+            blob_file.close()
+            os.replace(temp_path, path)
+        except BaseException:
+            blob_file.close()
+            temp_path.unlink(missing_ok=True)
+            raise
+        return f"{self.base_url}/{blob_path}"
+
+    async def download(self, blob_path: str) -> bytes:
+        return await asyncio.to_thread(self._path(blob_path).read_bytes)
+
+    async def close(self):
+        pass
+
+
+def create_blob_storage():
+    """
+    Create the blob storage backend selected by the STORAGE_BACKEND env variable.
+
+    Returns:
+        AzureBlobStorage | LocalBlobStorage: The configured storage backend
+    """
+    settings = get_settings()
+    backend = settings.storage_backend
+    if backend == "local":
+        return LocalBlobStorage(
+            root_dir=settings.local_storage_dir,
+            base_url=settings.local_storage_base_url,
+        )
+    if backend != "azure":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    return AzureBlobStorage(
+        connection_string=settings.azure_storage_connection_string,
+        container_name=settings.container_name,
+        pool_size=settings.blob_pool_size,
+        max_concurrency=settings.blob_upload_max_concurrency,
+        max_block_size=settings.blob_max_block_size,
+        max_single_put_size=settings.blob_max_single_put_size,
+    )
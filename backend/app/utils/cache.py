@@ -0,0 +1,147 @@
+import hashlib
+from datetime import datetime
+from collections import OrderedDict
+
+
+def content_version(*parts: str) -> str:
+    """
+    Build a short version tag from the prompt/model parts that shape a cached result.
+    """
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class LRUCache:
+    """
+    Small in-process least-recently-used cache.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key not in self._items:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def set(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def delete(self, key):
+        self._items.pop(key, None)
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._items), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+class TieredCache:
+    """
+    In-process LRU tier in front of a MongoDB collection with a TTL index.
+
+    Entries are stored with the version they were produced under, so a prompt
+    or model change never serves stale results; invalidate_stale() removes the
+    old entries. Failures of the Mongo tier are logged and treated as misses.
+    """
+
+    def __init__(self, collection, version: str, max_size: int = 1024, ttl_seconds: int = 30 * 24 * 3600):
+        self.collection = collection
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.memory = LRUCache(max_size)
+        self.hits = 0
+        self.misses = 0
+
+    async def prepare(self):
+        """
+        Create the TTL index and drop entries produced under another version.
+
+        The two steps run independently, so a failed index update never keeps
+        stale entries around.
+        """
+        try:
+            await self._ensure_ttl_index()
+        except Exception as e:
+            print(f"Cache TTL index preparation failed for {self.collection.name}: {str(e)}")
+        try:
+            await self.invalidate_stale()
+        except Exception as e:
+            print(f"Cache invalidation failed for {self.collection.name}: {str(e)}")
+
+    async def _ensure_ttl_index(self):
+        from pymongo.errors import OperationFailure #type: ignore
+
+        try:
+            await self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+        except OperationFailure as e:
+            # IndexOptionsConflict: the index exists with another TTL, which collMod changes in place
+            if e.code != 85:
+                raise
+            await self.collection.database.command({
+                "collMod": self.collection.name,
+                "index": {"keyPattern": {"created_at": 1}, "expireAfterSeconds": self.ttl_seconds},
+            })
+
+    async def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        try:
+            document = await self.collection.find_one({"_id": key, "version": self.version})
+        except Exception as e:
+            print(f"Cache lookup failed for {self.collection.name}: {str(e)}")
+            document = None
+
+        if document is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.memory.set(key, document["value"])
+        return document["value"]
+
+    async def set(self, key: str, value: dict):
+        self.memory.set(key, value)
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {"value": value, "version": self.version, "created_at": datetime.now()},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"Cache write failed for {self.collection.name}: {str(e)}")
+
+    async def invalidate(self, key: str):
+        self.memory.delete(key)
+        await self.collection.delete_one({"_id": key})
+
+    async def invalidate_stale(self) -> int:
+        """
+        Remove every entry that was produced under a different version.
+
+        Returns:
+            int: Number of removed entries
+        """
+        self.memory.clear()
+        result = await self.collection.delete_many({"version": {"$ne": self.version}})
+        return result.deleted_count
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory": self.memory.stats(),
+        }
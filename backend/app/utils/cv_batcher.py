@@ -0,0 +1,171 @@
+import asyncio
+from app.schemas.file_uploads import CVUserData
+from app.utils.settings import get_settings
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (about four characters per token) used for batch packing.
+    """
+    return len(text) // 4 + 1
+
+
+class CVBatchExtractor:
+    """
+    Coalesces concurrent CV extraction requests into batched structured-output calls.
+
+    Requests arriving within max_wait seconds of each other are packed into one
+    CV_BATCH_DATA_PROMPT call until max_batch_tokens or max_batch_size is reached.
+    Results are split back out by document id; any CV missing from a batch
+    response, or every CV of a batch that fails validation, is retried with a
+    single-file call. CVs longer than max_cv_tokens always go out on their own.
+    """
+
+    def __init__(self, structured_llm, structured_llm_batch, cv_prompt: str, batch_prompt: str,
+                 semaphore: asyncio.Semaphore = None, max_batch_tokens: int = 12000,
+                 max_batch_size: int = 8, max_cv_tokens: int = 3000, max_wait: float = 0.05):
+        self.structured_llm = structured_llm
+        self.structured_llm_batch = structured_llm_batch
+        self.cv_prompt = cv_prompt
+        self.batch_prompt = batch_prompt
+        self.semaphore = semaphore or asyncio.Semaphore(8)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_cv_tokens = max_cv_tokens
+        self.max_wait = max_wait
+
+        self._pending = []
+        self._pending_tokens = 0
+        self._timer = None
+        self._tasks = set()
+
+        # Metrics
+        self.batch_calls = 0
+        self.batched_cvs = 0
+        self.single_calls = 0
+        self.fallbacks = 0
+
+    async def extract(self, text_content: str) -> CVUserData:
+        """
+        Extract structured data for one CV, batched with concurrent requests.
+
+        Args:
+            text_content (str): The text content extracted from the CV
+
+        Returns:
+            CVUserData: The structured CV data
+        """
+        tokens = estimate_tokens(text_content)
+        if tokens > self.max_cv_tokens:
+            return await self._extract_single(text_content)
+
+        if self._pending and self._pending_tokens + tokens > self.max_batch_tokens:
+            self._flush()
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text_content, future))
+        self._pending_tokens += tokens
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch):
+        if len(batch) == 1:
+            text_content, future = batch[0]
+            await self._resolve(future, text_content)
+            return
+
+        results = {}
+        try:
+            cvs = "\n".join(
+                f'<cv id="{index}">\n{text_content}\n</cv>'
+                for index, (text_content, _) in enumerate(batch)
+            )
+            async with self.semaphore:
+                response = await self.structured_llm_batch.ainvoke(self.batch_prompt.format(cvs=cvs))
+            self.batch_calls += 1
+            for item in response.cvs:
+                if item.document_id in results:
+                    # Ambiguous answer for this id, re-extract it on its own
+                    results[item.document_id] = None
+                else:
+                    results[item.document_id] = CVUserData(**item.model_dump(exclude={"document_id"}))
+        except Exception as e:
+            print(f"Batch CV extraction failed, falling back to single calls: {str(e)}")
+
+        fallbacks = []
+        for index, (text_content, future) in enumerate(batch):
+            result = results.get(str(index))
+            if result is None:
+                self.fallbacks += 1
+                fallbacks.append(self._resolve(future, text_content))
+            else:
+                self.batched_cvs += 1
+                if not future.done():
+                    future.set_result(result)
+        await asyncio.gather(*fallbacks)
+
+    async def _resolve(self, future: asyncio.Future, text_content: str):
+        try:
+            result = await self._extract_single(text_content)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    async def _extract_single(self, text_content: str) -> CVUserData:
+        async with self.semaphore:
+            response = await self.structured_llm.ainvoke(self.cv_prompt.format(cv_data=text_content))
+        self.single_calls += 1
+        return response
+
+    def stats(self) -> dict:
+        return {
+            "batch_calls": self.batch_calls,
+            "batched_cvs": self.batched_cvs,
+            "single_calls": self.single_calls,
+            "fallbacks": self.fallbacks,
+            "pending": len(self._pending),
+        }
+
+
+def create_cv_batcher(structured_llm, structured_llm_batch, cv_prompt: str, batch_prompt: str,
+                      semaphore: asyncio.Semaphore):
+    """
+    Create the CV batch extractor when CV_BATCH_EXTRACTION is enabled.
+
+    Returns:
+        CVBatchExtractor | None: The batcher, or None when batching is disabled
+    """
+    settings = get_settings()
+    if not settings.cv_batch_extraction:
+        return None
+    return CVBatchExtractor(
+        structured_llm,
+        structured_llm_batch,
+        cv_prompt,
+        batch_prompt,
+        semaphore=semaphore,
+        max_batch_tokens=settings.cv_batch_max_tokens,
+        max_batch_size=settings.cv_batch_max_size,
+        max_cv_tokens=settings.cv_batch_max_cv_tokens,
+        max_wait=settings.cv_batch_max_wait,
+    )
@@ -0,0 +1,260 @@
+import re
+import math
+import threading
+from collections import Counter
+from app.utils.cv_batcher import estimate_tokens
+from app.utils.cache import content_version
+from app.utils.settings import get_settings
+
+# Lines at the top and bottom of each page checked for repeated headers and footers
+_EDGE_LINES = 3
+
+# "Page 2", "Page 2 of 3", "2 of 3", "2/3", optionally between dashes
+_PAGE_LABEL_RE = re.compile(r"^-?\s*(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s*(of|/)\s*\d+)\s*-?$", re.IGNORECASE)
+_BARE_NUMBER_RE = re.compile(r"^-?\s*(\d{1,3})\s*-?$")
+
+# CV section headings and their priority when the text has to be truncated:
+# lower priorities are kept first. Text before the first heading (name and
+# contact details) has priority 0.
+_SECTION_PRIORITIES = {
+    "experience": 0, "work experience": 0, "professional experience": 0, "employment": 0,
+    "employment history": 0, "work history": 0, "skills": 0, "technical skills": 0,
+    "core competencies": 0, "key skills": 0,
+    "education": 1, "qualifications": 1, "academic background": 1,
+    "summary": 2, "professional summary": 2, "profile": 2, "objective": 2, "about me": 2,
+    "certifications": 2, "certificates": 2, "licenses": 2, "projects": 2,
+    "publications": 3, "awards": 3, "achievements": 3, "languages": 3, "volunteering": 3,
+    "volunteer experience": 3, "courses": 3, "training": 3,
+    "interests": 4, "hobbies": 4, "activities": 4, "references": 4, "personal details": 4,
+}
+
+_TRUNCATION_MARKER = "[...]"
+
+
+def _line_key(line: str) -> str:
+    # Page numbers differ between pages, so digits are ignored when comparing
+    # lines with words; lines without letters (years, phone numbers) must match exactly
+    line = line.lower()
+    return re.sub(r"\d+", "#", line) if re.search(r"[a-z]", line) else line
+
+
+def _page_number_lines(page_lines: list) -> set:
+    """
+    (page, position) of the page number lines: the first or last line of a page
+    that is an explicit "Page N (of M)" label, or a bare number that goes up by
+    one from page to page at the same edge.
+    """
+    found = set()
+    for edge in (0, -1):
+        numbered = []
+        for page, lines in enumerate(page_lines):
+            if not lines:
+                continue
+            position = edge % len(lines)
+            if _PAGE_LABEL_RE.match(lines[position]):
+                found.add((page, position))
+                continue
+            match = _BARE_NUMBER_RE.match(lines[position])
+            if match:
+                numbered.append((page, position, int(match.group(1))))
+        # A single bare number cannot be told apart from a year or a count
+        if len(numbered) >= 2 and all(number - page == numbered[0][2] - numbered[0][0]
+                                      for page, _, number in numbered):
+            found.update((page, position) for page, position, _ in numbered)
+    return found
+
+
+def _section_priority(line: str):
+    heading = line.lower().strip(" :-•*|").strip()
+    if len(heading) > 40:
+        return None
+    return _SECTION_PRIORITIES.get(heading)
+
+
+def normalize_cv_text(pages: list) -> str:
+    """
+    Clean the extracted text of a CV before it is sent to the LLM.
+
+    Collapses whitespace inside lines and runs of blank lines, drops page
+    numbers on the first or last line of a page (explicit "Page N" labels, or
+    bare numbers that count the pages), and drops header and footer lines
+    repeated on several pages (their first occurrence is kept, as it is often
+    the candidate's name).
+
+    Args:
+        pages (list): Text of each page (a single item for DOCX)
+
+    Returns:
+        str: The normalized text
+    """
+    page_lines = [[" ".join(line.split()) for line in page.splitlines()] for page in pages]
+    page_lines = [[line for line in lines if line] for lines in page_lines]
+
+    repeated = set()
+    if len(page_lines) >= 2:
+        edge_counts = Counter()
+        for lines in page_lines:
+            edge_counts.update({_line_key(line) for line in lines[:_EDGE_LINES] + lines[-_EDGE_LINES:]})
+        threshold = max(2, math.ceil(len(page_lines) / 2))
+        repeated = {key for key, count in edge_counts.items() if count >= threshold}
+
+    page_numbers = _page_number_lines(page_lines)
+    seen = set()
+    output = []
+    for page, lines in enumerate(page_lines):
+        last = len(lines) - 1
+        for position, line in enumerate(lines):
+            if (page, position) in page_numbers:
+                continue
+            key = _line_key(line)
+            if key in repeated and (position < _EDGE_LINES or position > last - _EDGE_LINES):
+                if key in seen:
+                    continue
+                seen.add(key)
+            output.append(line)
+    return "\n".join(output)
+
+
+class CVTextPreparer:
+    """
+    Text pre-processing stage between extraction and the LLM.
+
+    Normalizes the extracted text and caps the prompt text at max_tokens. When
+    a CV is too long, whole sections are kept in priority order (contact
+    details, experience and skills first; interests and references last), the
+    first section that does not fit is cut where the budget runs out, and the
+    rest are dropped; sections keep their original order. Tokens are counted
+    with tiktoken for the configured model, or estimated when its encoding is
+    unavailable.
+    """
+
+    def __init__(self, max_tokens: int = 6000, model: str = "gpt-4o-mini"):
+        self.max_tokens = max_tokens
+        self.model = model
+        self._encoding = None
+        self._encoding_loaded = False
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.files = 0
+        self.truncated = 0
+        self.raw_tokens = 0
+        self.prompt_tokens = 0
+
+    @property
+    def version(self) -> str:
+        """
+        Version tag of the settings that shape the prompt text, so that cached
+        extractions are not reused after the limit or the truncation rules change.
+        """
+        return content_version(
+            str(self.max_tokens), self.model, repr(sorted(_SECTION_PRIORITIES.items())),
+            _TRUNCATION_MARKER, str(_EDGE_LINES), _PAGE_LABEL_RE.pattern, _BARE_NUMBER_RE.pattern
+        )
+
+    def _encoder(self):
+        with self._lock:
+            if not self._encoding_loaded:
+                self._encoding_loaded = True
+                try:
+                    import tiktoken #type: ignore
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except Exception as e:
+                    print(f"tiktoken encoding unavailable for {self.model}, estimating tokens: {str(e)[:200]}")
+            return self._encoding
+
+    def count_tokens(self, text: str) -> int:
+        encoding = self._encoder()
+        if encoding is None:
+            return estimate_tokens(text)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str) -> str:
+        """
+        Cap text at max_tokens, keeping the most useful sections (see class docstring).
+        """
+        if not self.max_tokens:
+            return text
+        lines = text.split("\n")
+        line_tokens = [self.count_tokens(line) + 1 for line in lines]
+        if sum(line_tokens) <= self.max_tokens:
+            return text
+
+        # Split into sections at recognised headings
+        sections = []
+        for index, line in enumerate(lines):
+            priority = _section_priority(line)
+            if priority is not None or not sections:
+                sections.append({"priority": priority or 0, "start": index, "end": index + 1})
+            else:
+                sections[-1]["end"] = index + 1
+
+        remaining = self.max_tokens - self.count_tokens(_TRUNCATION_MARKER) - 1
+        kept = [None] * len(sections)
+        for number in sorted(range(len(sections)), key=lambda n: (sections[n]["priority"], n)):
+            section = sections[number]
+            tokens = sum(line_tokens[section["start"]:section["end"]])
+            if tokens <= remaining:
+                kept[number] = lines[section["start"]:section["end"]]
+                remaining -= tokens
+                continue
+            # Cut the section where the budget runs out (inside a line when one
+            # line is longer than what is left); lower priority sections are dropped
+            end = section["start"]
+            while end < section["end"] and line_tokens[end] <= remaining:
+                remaining -= line_tokens[end]
+                end += 1
+            partial = []
+            # One token of what is left goes to the line break
+            if end < section["end"] and remaining > 1:
+                line = lines[end]
+                partial = [line[:len(line) * (remaining - 1) // line_tokens[end]]]
+            kept[number] = lines[section["start"]:end] + partial + [_TRUNCATION_MARKER]
+            break
+
+        return "\n".join(line for section in kept if section for line in section)
+
+    def prepare(self, pages: list) -> tuple:
+        """
+        Normalize extracted text and build the prompt text of a CV.
+
+        Args:
+            pages (list): Text of each page (a single item for DOCX)
+
+        Returns:
+            tuple: (text_content, prompt_text, report). text_content is the
+                   normalized text that is stored; prompt_text is the same text
+                   capped at max_tokens; report holds the token counts.
+        """
+        raw_tokens = self.count_tokens("\n".join(pages))
+        text_content = normalize_cv_text(pages)
+        prompt_text = self.truncate(text_content)
+        prompt_tokens = self.count_tokens(prompt_text)
+        report = {
+            "raw_tokens": raw_tokens,
+            "prompt_tokens": prompt_tokens,
+            "saved_tokens": raw_tokens - prompt_tokens,
+            "truncated": prompt_text != text_content,
+        }
+        with self._lock:
+            self.files += 1
+            self.truncated += report["truncated"]
+            self.raw_tokens += raw_tokens
+            self.prompt_tokens += prompt_tokens
+        return text_content, prompt_text, report
+
+    def stats(self) -> dict:
+        return {
+            "files": self.files,
+            "truncated": self.truncated,
+            "raw_tokens": self.raw_tokens,
+            "prompt_tokens": self.prompt_tokens,
+            "saved_tokens": self.raw_tokens - self.prompt_tokens,
+        }
+
+
+def create_cv_text_preparer(model: str) -> CVTextPreparer:
+    """
+    Create the CV text preparer configured by CV_PROMPT_MAX_TOKENS (0 disables truncation).
+    """
+    return CVTextPreparer(max_tokens=get_settings().cv_prompt_max_tokens, model=model)
@@ -0,0 +1,216 @@
+import os
+import time
+import asyncio
+import tempfile
+import multiprocessing
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from app.utils.settings import get_settings
+
+
+def _open_source(source):
+    # Wrap in-memory content in a file object; BytesIO shares the buffer of a
+    # bytes object instead of copying it. Paths are passed through unchanged.
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BytesIO(source)
+    return source
+
+
+def extract_pdf_pages(source) -> list:
+    """
+    Extract the text of each page of a PDF.
+
+    Args:
+        source (bytes | str): The PDF content or the path of a spilled file
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(_open_source(source))
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def extract_pdf_text(source) -> str:
+    """
+    Extract the text of every page of a PDF.
+
+    Args:
+        source (bytes | str): The PDF content or the path of a spilled file
+    """
+    return "".join(page + "\n" for page in extract_pdf_pages(source))
+
+
+def extract_docx_text(source) -> str:
+    """
+    Extract the text of a DOCX document.
+
+    Args:
+        source (bytes | str): The DOCX content or the path of a spilled file
+    """
+    import docx2txt #type: ignore
+
+    return docx2txt.process(_open_source(source)) + "\n"
+
+
+def _default_spill_dir() -> str:
+    # Prefer a RAM-backed tmpfs so spilled files never touch the container disk
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _write_spill_file(data: bytes, spill_dir: str) -> str:
+    fd, path = tempfile.mkstemp(prefix="cv-", dir=spill_dir)
+    with os.fdopen(fd, "wb") as spill_file:
+        spill_file.write(data)
+    return path
+
+
+def _limit_worker_memory(memory_limit_mb: int):
+    # Cap the address space of a pool worker so a malformed document raises
+    # MemoryError instead of taking the whole container down
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"Could not set extraction memory limit: {str(e)}")
+
+
+def _timed_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class ExtractionExecutor:
+    """
+    Runs CPU-bound text extraction off the event loop.
+
+    kind selects the backend: "process" (default, a process pool sized to the
+    number of cores), "thread" or "inline" (runs on the event loop, for debugging).
+    """
+
+    def __init__(self, kind: str = "process", max_workers: int = None,
+                 timeout: float = 60, memory_limit_mb: int = None,
+                 spill_threshold: int = 10 * 1024 * 1024, spill_dir: str = None):
+        self.kind = kind
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir or _default_spill_dir()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_worker_memory if memory_limit_mb else None,
+                initargs=(memory_limit_mb,) if memory_limit_mb else (),
+            )
+        elif kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extraction")
+        elif kind == "inline":
+            self._pool = None
+        else:
+            raise ValueError(f"Unknown extraction executor: {kind}")
+
+        # Metrics
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._parse_seconds = 0.0
+        self._max_parse_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._spilled = 0
+
+    async def run(self, func, *args):
+        """
+        Run func(*args) on the executor and return its result.
+
+        Raises:
+            asyncio.TimeoutError: If the document takes longer than the timeout
+        """
+        submitted = time.perf_counter()
+        self._in_flight += 1
+        try:
+            if self._pool is None:
+                result, elapsed = _timed_call(func, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._pool, _timed_call, func, *args)
+                result, elapsed = await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # The worker keeps running until the parse returns; only the caller is released
+            self._timed_out += 1
+            raise
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+        self._completed += 1
+        self._parse_seconds += elapsed
+        self._max_parse_seconds = max(self._max_parse_seconds, elapsed)
+        self._wait_seconds += max(0.0, time.perf_counter() - submitted - elapsed)
+        return result
+
+    async def extract(self, func, data):
+        """
+        Run an extractor over file content.
+
+        Content is handed to the extractor directly; only files larger than
+        spill_threshold are written to spill_dir and passed by path, which also
+        avoids pickling large payloads into pool workers. Content that is
+        already on disk is passed by path as is.
+
+        Args:
+            func: extract_pdf_pages, extract_pdf_text or extract_docx_text
+            data (bytes | str): The file content or the path of a spooled file
+
+        Returns:
+            str: The extracted text
+        """
+        if isinstance(data, str) or len(data) <= self.spill_threshold:
+            return await self.run(func, data)
+
+        self._spilled += 1
+        spill_path = await asyncio.to_thread(_write_spill_file, data, self.spill_dir)
+        try:
+            return await self.run(func, spill_path)
+        finally:
+            os.remove(spill_path)
+
+    def stats(self) -> dict:
+        """
+        Snapshot of queue depth and parse timings.
+        """
+        return {
+            "executor": self.kind,
+            "workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.max_workers) if self._pool else 0,
+            "completed": self._completed,
+            "failed": self._failed,
+            "timed_out": self._timed_out,
+            "avg_parse_seconds": self._parse_seconds / self._completed if self._completed else 0.0,
+            "max_parse_seconds": self._max_parse_seconds,
+            "avg_queue_wait_seconds": self._wait_seconds / self._completed if self._completed else 0.0,
+            "spilled": self._spilled,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_extraction_executor() -> ExtractionExecutor:
+    """
+    Create the extraction executor configured by the EXTRACTION_* settings.
+    """
+    settings = get_settings()
+    return ExtractionExecutor(
+        kind=settings.extraction_executor,
+        max_workers=settings.extraction_workers,
+        timeout=settings.extraction_timeout,
+        memory_limit_mb=settings.extraction_memory_limit_mb,
+        spill_threshold=settings.extraction_spill_threshold,
+        spill_dir=settings.extraction_spill_dir,
+    )
@@ -0,0 +1,140 @@
+import re
+import random
+import asyncio
+import typing
+from pydantic import BaseModel
+from app.utils.settings import get_settings
+
+_CV_ID_RE = re.compile(r'<cv id="([^"]+)">')
+
+
+class FakeLLMError(Exception):
+    """
+    Injected failure, shaped like the OpenAI client errors (status_code).
+    """
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeStructuredLLM:
+    """
+    Local stand-in for a structured-output chat model.
+
+    Answers after latency (+/- jitter) seconds with an instance of schema whose
+    string fields are placeholders. List fields of models get one item per
+    <cv id="..."> tag in the prompt, so batch extraction splits back correctly.
+    Rate limits (429) and server errors (500) are injected at the given rates,
+    and slow_rate of the calls take ten times longer (tail latency).
+    """
+
+    def __init__(self, schema, latency: float = 0.2, jitter: float = 0.1,
+                 rate_limit_rate: float = 0.0, error_rate: float = 0.0, slow_rate: float = 0.0):
+        self.schema = schema
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.calls = 0
+
+    def _value(self, annotation, field_name: str, prompt: str, document_id: str = None):
+        if field_name == "document_id" and document_id is not None:
+            return document_id
+        if typing.get_origin(annotation) in (list, typing.List):
+            (item_type,) = typing.get_args(annotation)
+            return [self._build(item_type, prompt, cv_id) for cv_id in _CV_ID_RE.findall(prompt)]
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return self._build(annotation, prompt)
+        return f"Fake {field_name}"
+
+    def _build(self, schema, prompt: str, document_id: str = None):
+        return schema(**{
+            name: self._value(field.annotation, name, prompt, document_id)
+            for name, field in schema.model_fields.items()
+        })
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        latency = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(latency * 10 if random.random() < self.slow_rate else latency)
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            raise FakeLLMError("Rate limit reached", 429)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise FakeLLMError("Internal server error", 500)
+        return self._build(self.schema, str(prompt))
+
+
+class FakeToolCallingLLM(FakeStructuredLLM):
+    """
+    Fake chat model bound to one tool schema, for streaming structured output.
+
+    astream yields AIMessageChunks whose tool call arguments are the JSON of
+    a placeholder instance, split into chunk_size pieces spread over the latency.
+    """
+
+    def __init__(self, schema, chunk_size: int = 8, **options):
+        super().__init__(schema, **options)
+        self.chunk_size = chunk_size
+
+    async def astream(self, prompt):
+        from langchain_core.messages import AIMessageChunk
+
+        self.calls += 1
+        roll = random.random()
+        if roll < self.rate_limit_rate:
+            raise FakeLLMError("Rate limit reached", 429)
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise FakeLLMError("Internal server error", 500)
+
+        arguments = self._build(self.schema, str(prompt)).model_dump_json()
+        pieces = [arguments[i:i + self.chunk_size] for i in range(0, len(arguments), self.chunk_size)]
+        latency = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        if random.random() < self.slow_rate:
+            latency *= 10
+        for index, piece in enumerate(pieces):
+            await asyncio.sleep(latency / len(pieces))
+            yield AIMessageChunk(content="", tool_call_chunks=[{
+                "name": self.schema.__name__ if index == 0 else None,
+                "args": piece,
+                "id": "fake-call" if index == 0 else None,
+                "index": 0,
+            }])
+
+
+class FakeChatModel:
+    """
+    Fake counterpart of ChatOpenAI, selected with LLM_BACKEND=fake.
+    """
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.1,
+                 rate_limit_rate: float = 0.0, error_rate: float = 0.0, slow_rate: float = 0.0):
+        self.options = {
+            "latency": latency,
+            "jitter": jitter,
+            "rate_limit_rate": rate_limit_rate,
+            "error_rate": error_rate,
+            "slow_rate": slow_rate,
+        }
+
+    def with_structured_output(self, schema) -> FakeStructuredLLM:
+        return FakeStructuredLLM(schema, **self.options)
+
+    def bind_tools(self, tools: list, **kwargs) -> FakeToolCallingLLM:
+        return FakeToolCallingLLM(tools[0], **self.options)
+
+
+def create_fake_chat_model() -> FakeChatModel:
+    """
+    Create the fake model configured by the FAKE_LLM_* settings.
+    """
+    settings = get_settings()
+    return FakeChatModel(
+        latency=settings.fake_llm_latency,
+        jitter=settings.fake_llm_jitter,
+        rate_limit_rate=settings.fake_llm_rate_limit_rate,
+        error_rate=settings.fake_llm_error_rate,
+        slow_rate=settings.fake_llm_slow_rate,
+    )
@@ -1,10 +1,21 @@
-import os
+import asyncio
 from datetime import datetime
-from fastapi import Request, UploadFile, HTTPException
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.document_loaders import Docx2txtLoader
+from fastapi import Request, UploadFile
+from app.schemas.file_uploads import CVUserData
 from app.utils.log_err import log_error
-from azure.storage.blob import ContentSettings #type: ignore
+from app.utils.extraction import extract_pdf_pages, extract_docx_text
+from app.database.cv_documents import build_cv_document, store_text
+from app.utils.matching import cv_match_text
+from app.utils.ingest import IngestedUpload, ingest_upload
+from app.utils.settings import get_settings
+from app.utils.metrics import get_metrics
+
+def _cv_cache_key(content_digest: str, version: str) -> str:
+    """
+    Content-addressed cache key: SHA-256 of the file bytes plus the prompt/model version.
+    """
+    return f"{content_digest}:{version}"
+
 
 async def _process_file(request: Request, file: UploadFile, user_id: str, user_email: str):
     """
@@ -19,26 +30,55 @@ async def _process_file(request: Request, file: UploadFile, user_id: str, user_e
     Returns:
         dict: Processing result with success status and extracted data
     """
-    container_client = request.app.blob_container_client
+    blob_storage = request.app.blob_storage
     user_folder_name = f"{user_id}"
     blob_path = f"{user_folder_name}/{file.filename}"
+    settings = get_settings()
+    metrics = get_metrics()
+    upload = None
+    file_type, outcome = "other", "failed"
     
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Upload file to blob storage
-        blob_client = container_client.get_blob_client(blob_path)
-        blob_client.upload_blob(file_content, overwrite=True,content_settings=ContentSettings(
-            content_type=file.content_type,
-            content_disposition='inline'
-        ))
+        with metrics.stage("file"):
+            # Stream the file to blob storage in chunks, hashing and spooling it on the way
+            with metrics.stage("upload"):
+                async with request.app.blob_semaphore:
+                    upload, blob_url = await ingest_upload(
+                        file,
+                        blob_storage,
+                        blob_path,
+                        max_size=settings.max_upload_file_bytes,
+                        chunk_size=settings.upload_chunk_size,
+                        spool_threshold=settings.upload_spool_threshold,
+                        spool_dir=settings.upload_spool_dir
+                    )
+            if upload.path is not None:
+                metrics.observe("temp_write", upload.spool_seconds)
+            
+            # Look up results of an earlier upload with identical content
+            with metrics.stage("cache_lookup"):
+                cache_key = _cv_cache_key(upload.digest, request.app.cv_cache.version)
+                cached = await request.app.cv_cache.get(cache_key)
+            
+            # Process file based on content type
+            if file.content_type == "application/pdf":
+                file_type = "pdf"
+                if cached:
+                    result = await _process_cached_file(request, file, upload, cached, user_id, user_email, blob_url, "pdf")
+                else:
+                    result = await _process_pdf_file(request, file, upload, user_id, user_email, blob_url, cache_key)
+            elif file.content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+                file_type = "docx"
+                if cached:
+                    result = await _process_cached_file(request, file, upload, cached, user_id, user_email, blob_url, "docx")
+                else:
+                    result = await _process_docx_file(request, file, upload, user_id, user_email, blob_url, cache_key)
+            else:
+                result = None
         
-        # Process file based on content type
-        if file.content_type == "application/pdf":
-            return await _process_pdf_file(request, file, file_content, user_id, user_email, blob_client.url)
-        elif file.content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            return await _process_docx_file(request, file, file_content, user_id, user_email, blob_client.url)
+        if result is not None:
+            outcome = ("cached" if cached else "processed") if result["success"] else "failed"
+            return result
         else:
             # Log unsupported file type
             await log_error(
@@ -48,6 +88,7 @@ async def _process_file(request: Request, file: UploadFile, user_id: str, user_e
                 user_id=user_id,
                 user_email=user_email
             )
+            outcome = "unsupported"
             return {"success": False, "data": None}
             
     except Exception as e:
@@ -61,45 +102,83 @@ async def _process_file(request: Request, file: UploadFile, user_id: str, user_e
         )
         return {"success": False, "data": None}
     
-async def _process_pdf_file(request: Request, file: UploadFile, file_content: bytes, 
-                           user_id: str, user_email: str, blob_url: str):
+    finally:
+        metrics.files.inc(file_type, outcome)
+        if upload is not None:
+            upload.close()
+    
+async def _process_cached_file(request: Request, file: UploadFile, upload: IngestedUpload, cached: dict,
+                              user_id: str, user_email: str, blob_url: str, file_type: str):
+    """
+    Serve a file from the CV extraction cache, skipping parsing and the LLM call.
+    
+    Args:
+        request (Request): FastAPI request object
+        file (UploadFile): The uploaded file
+        upload (IngestedUpload): The streamed file content
+        cached (dict): Cache entry with the stored CVUserData and extracted text
+        user_id (str): The ID of the user uploading the file
+        user_email (str): The email of the user uploading the file
+        blob_url (str): URL to the uploaded blob
+        file_type (str): The type of the file
+        
+    Returns:
+        dict: Processing result with success status and extracted data
+    """
+    response = _format_cv_data(CVUserData(**cached["cv_data"]), blob_url, file_type)
+    
+    # Store metadata in database for this upload
+    await _store_cv_metadata(
+        request=request,
+        file=file,
+        upload=upload,
+        text_content=cached["text_content"],
+        extracted_data=response,
+        user_id=user_id,
+        user_email=user_email,
+        blob_url=response["file_url"]
+    )
+    
+    return {"success": True, "data": response}
+
+
+async def _process_pdf_file(request: Request, file: UploadFile, upload: IngestedUpload, 
+                           user_id: str, user_email: str, blob_url: str, cache_key: str = None):
     """
     Process a PDF file and extract text and structured data.
     
     Args:
         request (Request): FastAPI request object
         file (UploadFile): The PDF file
-        file_content (bytes): The file content
+        upload (IngestedUpload): The streamed file content
         user_id (str): The ID of the user uploading the file
         user_email (str): The email of the user uploading the file
         blob_url (str): URL to the uploaded blob
+        cache_key (str): Key under which the extraction result is cached
         
     Returns:
         dict: Processing result with success status and extracted data
     """
-    # Save file temporarily
-    temp_file_path = f"temp_{file.filename}"
-    
     try:
-        # Write content to temp file
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(file_content)
+        # Extract text from the content (or its spooled file) on the extraction executor
+        with get_metrics().stage("parse"):
+            async with request.app.parse_semaphore:
+                pages = await request.app.extraction_executor.extract(extract_pdf_pages, upload.source)
         
-        # Extract text using PyPDFLoader
-        loader = PyPDFLoader(temp_file_path)
-        text_content = ""
+        # Normalize the text and cap the prompt size
+        with get_metrics().stage("text_prepare"):
+            text_content, prompt_text, report = await asyncio.to_thread(request.app.cv_text.prepare, pages)
         
-        for page in loader.load():
-            text_content += page.page_content + "\n"
+        get_metrics().record_prompt_tokens(report)
         
         # Extract structured data from CV
-        response = await _extract_cv_data(request, text_content, file.filename, user_id, user_email,blob_url,"pdf")
+        response = await _extract_cv_data(request, text_content, file.filename, user_id, user_email,blob_url,"pdf",cache_key,prompt_text)
         
         # Store metadata in database
         await _store_cv_metadata(
             request=request,
             file=file,
-            file_content=file_content,
+            upload=upload,
             text_content=text_content,
             extracted_data=response,
             user_id=user_id,
@@ -119,53 +198,45 @@ async def _process_pdf_file(request: Request, file: UploadFile, file_content: by
             user_email=user_email
         )
         return {"success": False, "data": None}
-        
-    finally:
-        # Clean up temporary file
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
 
 
-async def _process_docx_file(request: Request, file: UploadFile, file_content: bytes,
-                            user_id: str, user_email: str, blob_url: str):
+async def _process_docx_file(request: Request, file: UploadFile, upload: IngestedUpload,
+                            user_id: str, user_email: str, blob_url: str, cache_key: str = None):
     """
     Process a DOCX file and extract text and structured data.
     
     Args:
         request (Request): FastAPI request object
         file (UploadFile): The DOCX file
-        file_content (bytes): The file content
+        upload (IngestedUpload): The streamed file content
         user_id (str): The ID of the user uploading the file
         user_email (str): The email of the user uploading the file
         blob_url (str): URL to the uploaded blob
+        cache_key (str): Key under which the extraction result is cached
         
     Returns:
         dict: Processing result with success status and extracted data
     """
-    # Save file temporarily
-    temp_file_path = f"temp_{file.filename}"
-    
     try:
-        # Write content to temp file
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(file_content)
+        # Extract text from the content (or its spooled file) on the extraction executor
+        with get_metrics().stage("parse"):
+            async with request.app.parse_semaphore:
+                raw_text = await request.app.extraction_executor.extract(extract_docx_text, upload.source)
         
-        # Extract text using Docx2txtLoader
-        loader = Docx2txtLoader(temp_file_path)
-        documents = loader.load()
-        text_content = ""
+        # Normalize the text and cap the prompt size
+        with get_metrics().stage("text_prepare"):
+            text_content, prompt_text, report = await asyncio.to_thread(request.app.cv_text.prepare, [raw_text])
         
-        for doc in documents:
-            text_content += doc.page_content + "\n"
+        get_metrics().record_prompt_tokens(report)
         
         # Extract structured data from CV
-        response = await _extract_cv_data(request, text_content, file.filename, user_id, user_email,blob_url,"docx")
+        response = await _extract_cv_data(request, text_content, file.filename, user_id, user_email,blob_url,"docx",cache_key,prompt_text)
         
         # Store metadata in database
         await _store_cv_metadata(
             request=request,
             file=file,
-            file_content=file_content,
+            upload=upload,
             text_content=text_content,
             extracted_data=response,
             user_id=user_id,
@@ -185,14 +256,35 @@ async def _process_docx_file(request: Request, file: UploadFile, file_content: b
             user_email=user_email
         )
         return {"success": False, "data": None}
-        
-    finally:
-        # Clean up temporary file
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
 
 
-async def _extract_cv_data(request: Request, text_content: str, filename: str, user_id: str, user_email: str,blob_url:str,file_type:str):
+def _format_cv_data(response: CVUserData, blob_url: str, file_type: str):
+    """
+    Convert extracted CV data to the dictionary returned to the frontend.
+    
+    Args:
+        response (CVUserData): The structured CV data
+        blob_url (str): URL to the uploaded blob
+        file_type (str): The type of the file
+    Returns:
+        dict: Extracted CV data as a dictionary
+    """
+    if file_type == "docx":
+        blob_url = f"https://view.officeapps.live.com/op/view.aspx?src={blob_url}"
+    return {
+        "name": response.name,
+        "email": response.email,
+        "phone": response.phone,
+        "address": getattr(response, "address", "Not Found"),
+        "education": response.education,
+        "experience": response.experience,
+        "skills": response.skills,
+        "linkedin_url": response.linkedin_url,
+        "file_url": blob_url
+    }
+
+
+async def _extract_cv_data(request: Request, text_content: str, filename: str, user_id: str, user_email: str,blob_url:str,file_type:str,cache_key:str=None,prompt_text:str=None):
     """
     Extract structured data from CV text content using LLM.
     
@@ -204,41 +296,33 @@ async def _extract_cv_data(request: Request, text_content: str, filename: str, u
         user_email (str): The email of the user
         blob_url (str): URL to the uploaded blob
         file_type (str): The type of the file
+        cache_key (str): Key under which a successful extraction is cached
+        prompt_text (str): Text sent to the LLM, defaults to text_content
     Returns:
         dict: Extracted CV data as a dictionary
     """
+    prompt_text = prompt_text or text_content
     try:
-        # Get structured LLM from app state
-        structured_llm = request.app.structured_llm
+        with get_metrics().stage("llm"):
+            if request.app.cv_batcher:
+                # Pack this CV into a batched LLM call with concurrent uploads
+                response = await request.app.cv_batcher.extract(prompt_text)
+            else:
+                # Get structured LLM from app state
+                structured_llm = request.app.structured_llm
+                
+                # Invoke LLM to extract CV data
+                async with request.app.llm_semaphore:
+                    response = await structured_llm.ainvoke(request.app.CV_DATA_PROMPT.format(cv_data=prompt_text))
         
-        # Invoke LLM to extract CV data
-        response = await structured_llm.ainvoke(request.app.CV_DATA_PROMPT.format(cv_data=text_content))
+        # Cache the structured result so identical uploads skip parsing and the LLM
+        if cache_key:
+            await request.app.cv_cache.set(cache_key, {
+                "cv_data": response.model_dump(),
+                "text_content": text_content
+            })
         
-        if file_type == "pdf":
-        # Convert Pydantic model to dictionary
-            return {
-                "name": response.name,
-                "email": response.email,
-                "phone": response.phone,
-                "address": getattr(response, "address", "Not Found"),
-                "education": response.education,
-                "experience": response.experience,
-                "skills": response.skills,
-                "linkedin_url": response.linkedin_url,
-                "file_url": blob_url
-            }
-        elif file_type == "docx":
-            return {
-                "name": response.name,
-                "email": response.email,
-                "phone": response.phone,
-                "address": getattr(response, "address", "Not Found"),
-                "education": response.education,
-                "experience": response.experience,
-                "skills": response.skills,
-                "linkedin_url": response.linkedin_url,
-                "file_url": f"https://view.officeapps.live.com/op/view.aspx?src={blob_url}"
-            }
+        return _format_cv_data(response, blob_url, file_type)
         
     except Exception as e:
         # Log LLM processing error
@@ -265,7 +349,7 @@ async def _extract_cv_data(request: Request, text_content: str, filename: str, u
         }
 
 
-async def _store_cv_metadata(request: Request, file: UploadFile, file_content: bytes,
+async def _store_cv_metadata(request: Request, file: UploadFile, upload: IngestedUpload,
                            text_content: str, extracted_data: dict, user_id: str,
                            user_email: str, blob_url: str):
     """
@@ -274,7 +358,7 @@ async def _store_cv_metadata(request: Request, file: UploadFile, file_content: b
     Args:
         request (Request): FastAPI request object
         file (UploadFile): The uploaded file
-        file_content (bytes): The file content
+        upload (IngestedUpload): The streamed file content
         text_content (str): The extracted text content
         extracted_data (dict): The extracted CV data
         user_id (str): The ID of the user
@@ -284,20 +368,38 @@ async def _store_cv_metadata(request: Request, file: UploadFile, file_content: b
     Returns:
         None
     """
-    # Create metadata dictionary
-    metadata_dict = {
-        "file_name": file.filename,
-        "file_size": len(file_content),
-        "file_type": file.content_type,
-        "file_url": blob_url,
-        "extracted_text": text_content,
-        "user_id": user_id,
-        "user_email": user_email,
-        "uploaded_at": datetime.now(),
-        "extracted_data": extracted_data,
-        **extracted_data  # Flatten extracted data for direct field access
-    }
+    metrics = get_metrics()
+    with metrics.stage("insert"):
+        # Create metadata dictionary in the compact layout
+        metadata_dict = build_cv_document(
+            file_name=file.filename,
+            file_size=upload.size,
+            file_type=file.content_type,
+            file_url=blob_url,
+            user_id=user_id,
+            user_email=user_email,
+            uploaded_at=datetime.now(),
+            extracted_data=extracted_data,
+            text_fields=await store_text(text_content, user_id, request.app.blob_storage)
+        )
+        
+        # Queue for a bulk write to MongoDB
+        await request.app.write_buffers.insert("cv-data", metadata_dict)
     
-    # Store in MongoDB
-    collection = request.app.mongodb["cv-data"]
-    await collection.insert_one(metadata_dict)
+    # Add the CV to the user's matching index
+    try:
+        with metrics.stage("index"):
+            await request.app.cv_matcher.add_cv(
+                user_id,
+                str(metadata_dict["_id"]),
+                cv_match_text(extracted_data, text_content),
+                collection=request.app.mongodb["cv-data"]
+            )
+    except Exception as e:
+        await log_error(
+            request=request,
+            error=f"Error indexing CV {file.filename}: {str(e)}",
+            endpoint="index-cv",
+            user_id=user_id,
+            user_email=user_email
+        )
@@ -0,0 +1,120 @@
+import os
+import time
+import hashlib
+import tempfile
+from fastapi import UploadFile
+
+
+class UploadTooLarge(Exception):
+    """
+    Raised when an upload goes over its size limit.
+    """
+
+
+class IngestedUpload:
+    """
+    An uploaded file read once, in chunks.
+
+    Each chunk is hashed and spooled as it arrives. Content stays in memory up
+    to spool_threshold bytes and is moved to a file in spool_dir beyond that,
+    so large files are handed to text extraction by path. Files wait at the
+    parse and LLM stages after ingestion, so the threshold is kept small
+    (1 MiB, like Starlette's upload spooling) to bound the memory of a batch.
+    """
+
+    def __init__(self, spool_threshold: int, spool_dir: str = None):
+        self.spool_threshold = spool_threshold
+        self.spool_dir = spool_dir
+        self.size = 0
+        self.path = None
+        self.spool_seconds = 0.0
+        self._hash = hashlib.sha256()
+        self._chunks = []
+        self._file = None
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        if self._file is None and self.size > self.spool_threshold:
+            start = time.perf_counter()
+            fd, self.path = tempfile.mkstemp(prefix="cv-", dir=self.spool_dir)
+            self._file = os.fdopen(fd, "wb")
+            self._file.writelines(self._chunks)
+            self._chunks = []
+            self.spool_seconds += time.perf_counter() - start
+        if self._file is not None:
+            start = time.perf_counter()
+            self._file.write(chunk)
+            self.spool_seconds += time.perf_counter() - start
+        else:
+            self._chunks.append(chunk)
+
+    def finish(self):
+        if self._file is not None:
+            self._file.close()
+        elif len(self._chunks) > 1:
+            self._chunks = [b"".join(self._chunks)]
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def source(self):
+        """
+        The content (bytes) or, once spooled, the path of the spool file.
+        """
+        if self.path is not None:
+            return self.path
+        return self._chunks[0] if self._chunks else b""
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def ingest_upload(file: UploadFile, blob_storage, blob_path: str, max_size: int,
+                        chunk_size: int = 1024 * 1024, spool_threshold: int = 1024 * 1024,
+                        spool_dir: str = None):
+    """
+    Stream an upload to blob storage while hashing and spooling it.
+
+    Args:
+        file (UploadFile): The uploaded file
+        blob_storage: The blob storage backend
+        blob_path (str): Path of the blob to write
+        max_size (int): Largest accepted file size in bytes
+        chunk_size (int): Size of the chunks read from the upload
+        spool_threshold (int): Size above which the content is spooled to disk
+        spool_dir (str): Directory of the spool files
+
+    Returns:
+        tuple: (IngestedUpload, blob_url)
+
+    Raises:
+        UploadTooLarge: If the file is larger than max_size
+    """
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLarge(f"{file.filename} is {file.size} bytes, the limit is {max_size}")
+
+    upload = IngestedUpload(spool_threshold, spool_dir)
+
+    async def chunks():
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            if upload.size + len(chunk) > max_size:
+                raise UploadTooLarge(f"{file.filename} is larger than {max_size} bytes")
+            upload.write(chunk)
+            yield chunk
+
+    try:
+        blob_url = await blob_storage.upload_stream(blob_path, chunks(), file.content_type)
+        upload.finish()
+    except BaseException:
+        upload.close()
+        raise
+    return upload, blob_url
@@ -0,0 +1,231 @@
+import re
+import zlib
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from app.utils.cache import TieredCache
+from app.utils.settings import get_settings
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_NUMBER_RE = re.compile(r"\d+")
+
+# Mersenne prime 2^31 - 1 for the MinHash permutations; shingle hashes are
+# reduced below it so a * x + b fits in 64 bits
+_PRIME = (1 << 31) - 1
+
+
+def normalize_requirements(text: str) -> str:
+    """
+    Normalize user requirements for caching: lowercase, punctuation and
+    whitespace differences removed.
+    """
+    return " ".join(token.rstrip(".") for token in _TOKEN_RE.findall((text or "").lower()))
+
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles of normalized text.
+
+    The fraction of equal positions in two signatures estimates the Jaccard
+    similarity of their shingle sets. The permutations are seeded, so
+    signatures are stable across processes.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 4, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        size = self.shingle_size
+        shingles = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) % _PRIME for shingle in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        return float(np.mean(first == second))
+
+
+class MinHashIndex:
+    """
+    In-memory LSH index of MinHash signatures, capped at max_size entries.
+
+    Signatures are split into bands; entries sharing a band bucket with the
+    query are candidates, and the most similar candidate is returned.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, max_size: int = 1024):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._buckets = {}
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, key: str, signature: np.ndarray, numbers: tuple):
+        self.remove(key)
+        self._entries[key] = (signature, numbers)
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self.remove(next(iter(self._entries)))
+
+    def remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band_key in self._band_keys(entry[0]):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def query(self, signature: np.ndarray, numbers: tuple):
+        """
+        Return (key, similarity) of the closest entry with the same numbers, or (None, 0.0).
+        """
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        best_key, best_similarity = None, 0.0
+        for key in candidates:
+            candidate_signature, candidate_numbers = self._entries[key]
+            # "5 years" and "8 years" differ by one character but are different jobs
+            if candidate_numbers != numbers:
+                continue
+            similarity = MinHasher.similarity(signature, candidate_signature)
+            if similarity > best_similarity:
+                best_key, best_similarity = key, similarity
+        return best_key, best_similarity
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class JDGenerationCache:
+    """
+    Cache of generated job descriptions, keyed by the normalized requirements.
+
+    Exact matches are looked up in a TieredCache (LRU in front of MongoDB).
+    With similarity_threshold set, requirements that are near-duplicates of a
+    cached entry (estimated Jaccard similarity of their shingles at or above
+    the threshold, and the same numbers) are served from that entry too. The
+    near-duplicate index is in-process and rebuilt from MongoDB by prepare().
+    """
+
+    def __init__(self, cache: TieredCache, similarity_threshold: float = 0.0,
+                 num_perm: int = 64, bands: int = 16):
+        self.cache = cache
+        self.similarity_threshold = similarity_threshold
+        self.hasher = MinHasher(num_perm)
+        self.index = MinHashIndex(num_perm, bands, max_size=cache.memory.max_size)
+
+        # Metrics
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def key(normalized: str) -> str:
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _index(self, key: str, normalized: str):
+        if self.similarity_threshold:
+            numbers = tuple(_NUMBER_RE.findall(normalized))
+            self.index.add(key, self.hasher.signature(normalized), numbers)
+
+    async def prepare(self, limit: int = None):
+        """
+        Prepare the Mongo tier and load the most recent entries into the near-duplicate index.
+        """
+        await self.cache.prepare()
+        if not self.similarity_threshold:
+            return
+        try:
+            cursor = self.cache.collection.find(
+                {"version": self.cache.version}, {"value.requirements": 1}
+            ).sort("created_at", -1).limit(limit or self.index.max_size)
+            documents = await cursor.to_list(length=None)
+        except Exception as e:
+            print(f"JD cache index load failed: {str(e)}")
+            return
+        for document in reversed(documents):
+            self._index(document["_id"], document["value"]["requirements"])
+
+    async def get(self, requirements: str):
+        """
+        Look up a generated job description.
+
+        Args:
+            requirements (str): The requirements given by the user
+
+        Returns:
+            tuple: (job description dict or None, "exact" | "similar" | None)
+        """
+        normalized = normalize_requirements(requirements)
+        key = self.key(normalized)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            self.exact_hits += 1
+            return cached["jd"], "exact"
+
+        if self.similarity_threshold and len(self.index):
+            numbers = tuple(_NUMBER_RE.findall(normalized))
+            similar_key, similarity = self.index.query(self.hasher.signature(normalized), numbers)
+            if similar_key is not None and similarity >= self.similarity_threshold:
+                cached = await self.cache.get(similar_key)
+                if cached is not None:
+                    self.similar_hits += 1
+                    return cached["jd"], "similar"
+                self.index.remove(similar_key)
+
+        self.misses += 1
+        return None, None
+
+    async def set(self, requirements: str, jd: dict):
+        normalized = normalize_requirements(requirements)
+        key = self.key(normalized)
+        await self.cache.set(key, {"jd": jd, "requirements": normalized})
+        self._index(key, normalized)
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round((self.exact_hits + self.similar_hits) / lookups, 3) if lookups else None,
+            "similarity_threshold": self.similarity_threshold,
+            "indexed": len(self.index),
+            "tiers": self.cache.stats(),
+        }
+
+
+def create_jd_cache(collection, version: str) -> JDGenerationCache:
+    """
+    Create the JD generation cache configured by the JD_CACHE_* settings.
+    """
+    settings = get_settings()
+    return JDGenerationCache(
+        TieredCache(
+            collection,
+            version=version,
+            max_size=settings.jd_cache_size,
+            ttl_seconds=settings.jd_cache_ttl_seconds,
+        ),
+        similarity_threshold=settings.jd_cache_similarity_threshold,
+    )
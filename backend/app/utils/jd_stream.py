@@ -0,0 +1,45 @@
+from app.schemas.jd import JD
+
+
+def create_streaming_jd_llm(llm):
+    """
+    Bind a chat model to the JD schema as a forced tool call, so its arguments
+    can be streamed and parsed while they are generated.
+    """
+    return llm.bind_tools([JD], tool_choice=JD.__name__)
+
+
+async def stream_jd(llm, prompt):
+    """
+    Stream a job description from a model bound with create_streaming_jd_llm.
+
+    The tool call chunks are merged as they arrive and their partial JSON
+    arguments are parsed, so each field is sent as soon as the model starts
+    writing it. The complete arguments are validated against JD at the end.
+
+    Args:
+        llm: The bound model (or a ScheduledLLM wrapping it)
+        prompt: The prompt passed to astream
+
+    Yields:
+        tuple: ("partial", dict of the fields that changed since the last
+               partial) while generating, then ("final", JD)
+    """
+    message = None
+    sent = {}
+    async for chunk in llm.astream(prompt):
+        message = chunk if message is None else message + chunk
+        if not message.tool_calls:
+            continue
+        arguments = message.tool_calls[0]["args"]
+        changed = {
+            field: value for field, value in arguments.items()
+            if field in JD.model_fields and isinstance(value, str) and sent.get(field) != value
+        }
+        if changed:
+            sent.update(changed)
+            yield "partial", changed
+
+    if message is None or not message.tool_calls:
+        raise ValueError("The model did not return a job description")
+    yield "final", JD.model_validate(message.tool_calls[0]["args"])
@@ -0,0 +1,39 @@
+from fastapi import FastAPI
+
+
+class LazyFastAPI(FastAPI):
+    """
+    FastAPI app whose shared clients are built on first use.
+
+    Each client is registered with provide(name, factory). The first access to
+    app.<name> (or request.app.<name>) calls factory(app) and stores the result
+    as a plain attribute, so later accesses cost nothing. Factories may use
+    other lazy clients, e.g. app.mongodb inside the write buffers factory.
+    Assigning the attribute directly bypasses the factory.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._providers = {}
+
+    def provide(self, name: str, factory):
+        self._providers[name] = factory
+
+    def __getattr__(self, name: str):
+        # Only called when the attribute is not set yet
+        providers = self.__dict__.get("_providers", {})
+        if name not in providers:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        value = providers[name](self)
+        setattr(self, name, value)
+        print(f"{name} is initialized")
+        return value
+
+    def is_warm(self, name: str) -> bool:
+        """
+        Whether the client has been built (or assigned).
+        """
+        return name in self.__dict__
+
+    def warm_clients(self) -> dict:
+        return {name: self.is_warm(name) for name in self._providers}
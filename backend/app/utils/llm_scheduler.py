@@ -0,0 +1,392 @@
+import time
+import random
+import asyncio
+from collections import deque
+from app.utils.cv_batcher import estimate_tokens
+from app.utils.settings import get_settings
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised without calling the model while the circuit breaker is open.
+    """
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at rate_per_minute.
+
+    Waiters are served in arrival order; a request larger than the bucket is
+    clamped to its capacity so it can still go through.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def release(self, amount: float):
+        """
+        Give back tokens taken by try_acquire for a call that was not made.
+        """
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    def try_acquire(self, amount: float) -> bool:
+        amount = min(amount, self.capacity)
+        if self._lock.locked():
+            return False
+        self._refill()
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+    async def acquire(self, amount: float) -> float:
+        """
+        Wait until amount tokens are available and take them.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        amount = min(amount, self.capacity)
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return time.monotonic() - start
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive transient failures and rejects
+    calls for reset_timeout seconds, then lets one trial call through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.opens = 0
+        # Start of the half-open trial call; a trial that never reports back
+        # (e.g. cancelled) expires after reset_timeout
+        self._trial_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        if state == "half-open" and (self._trial_at is None or now - self._trial_at >= self.reset_timeout):
+            self._trial_at = now
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_at is not None:
+                self.opens += 1
+            self.opened_at = time.monotonic()
+            self._trial_at = None
+
+
+def _is_retryable(error: Exception) -> bool:
+    # Rate limits, timeouts, connection errors and server errors are transient;
+    # anything else (bad request, auth, output validation) fails immediately
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in (408, 409, 429) or status_code >= 500
+    return type(error).__name__ in ("APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError")
+
+
+def _retry_after(error: Exception) -> float:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    """
+    Shared gate in front of every LLM call.
+
+    Each call waits for the request and token buckets (tokens estimated from
+    the prompt plus expected_output_tokens), runs with a timeout, and is
+    retried with full-jitter exponential backoff on transient errors. A 429
+    with Retry-After pauses all calls, not only the one that hit it. With
+    hedge_after set, a second identical request is sent when the first has
+    not answered within that many seconds and quota is available; the first
+    answer wins and the other is cancelled.
+    """
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 200000,
+                 max_retries: int = 4, base_delay: float = 0.5, max_delay: float = 20.0,
+                 timeout: float = 60.0, hedge_after: float = 0, expected_output_tokens: int = 400,
+                 breaker: CircuitBreaker = None):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.expected_output_tokens = expected_output_tokens
+        self.breaker = breaker or CircuitBreaker()
+        self._paused_until = 0.0
+
+        # Metrics
+        self.calls = {}
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.short_circuited = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.queue_wait = 0.0
+        self._latencies = deque(maxlen=1000)
+
+    async def _admit(self, tokens: int):
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        self.queue_wait += await self.request_bucket.acquire(1)
+        self.queue_wait += await self.token_bucket.acquire(tokens)
+
+    def _try_admit_hedge(self, tokens: int) -> bool:
+        # Take quota from both buckets or from neither
+        if not self.request_bucket.try_acquire(1):
+            return False
+        if self.token_bucket.try_acquire(tokens):
+            return True
+        self.request_bucket.release(1)
+        return False
+
+    async def _attempt(self, llm, prompt, tokens: int):
+        first = asyncio.create_task(asyncio.wait_for(llm.ainvoke(prompt), self.timeout))
+        hedge = None
+        try:
+            if not self.hedge_after:
+                return await first
+
+            done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+            if done or not self._try_admit_hedge(tokens):
+                return await first
+
+            self.hedges += 1
+            hedge = asyncio.create_task(asyncio.wait_for(llm.ainvoke(prompt), self.timeout))
+            pending = {first, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both failed; surface the error of the original request
+            return first.result()
+        finally:
+            # Also reached when the caller is cancelled; cancelling a finished task is a no-op
+            first.cancel()
+            if hedge is not None:
+                hedge.cancel()
+
+    async def run(self, llm, prompt, name: str = "llm"):
+        """
+        Call llm.ainvoke(prompt) under the rate limits, retries and circuit breaker.
+
+        Args:
+            llm: A runnable with ainvoke, e.g. a structured-output model
+            prompt: The prompt passed to ainvoke
+            name (str): Label used in the metrics
+
+        Returns:
+            The model response
+        """
+        self.calls[name] = self.calls.get(name, 0) + 1
+        tokens = estimate_tokens(str(prompt)) + self.expected_output_tokens
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self.short_circuited += 1
+                raise CircuitOpenError("LLM circuit breaker is open")
+
+            await self._admit(tokens)
+            start = time.monotonic()
+            try:
+                response = await self._attempt(llm, prompt, tokens)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                self.retries += 1
+                print(f"LLM call {name} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            else:
+                self._record_success(start)
+                return response
+
+    async def stream(self, llm, prompt, name: str = "llm"):
+        """
+        Stream llm.astream(prompt) under the rate limits, retries and circuit breaker.
+
+        A failure before the first chunk is retried like in run(); once chunks
+        have been yielded the error is raised to the caller. The timeout
+        applies to the wait for each chunk, and streams are never hedged.
+
+        Args:
+            llm: A runnable with astream, e.g. a model bound to a tool schema
+            prompt: The prompt passed to astream
+            name (str): Label used in the metrics
+
+        Yields:
+            The chunks of the model response
+        """
+        self.calls[name] = self.calls.get(name, 0) + 1
+        tokens = estimate_tokens(str(prompt)) + self.expected_output_tokens
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self.short_circuited += 1
+                raise CircuitOpenError("LLM circuit breaker is open")
+
+            await self._admit(tokens)
+            start = time.monotonic()
+            started = False
+            chunks = llm.astream(prompt).__aiter__()
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    started = True
+                    yield chunk
+            except Exception as e:
+                # Chunks already sent cannot be taken back, so a started stream is not retried
+                delay = self._retry_delay(e, self.max_retries if started else attempt)
+                if delay is None:
+                    raise
+                self.retries += 1
+                print(f"LLM stream {name} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            else:
+                self._record_success(start)
+                return
+            finally:
+                if hasattr(chunks, "aclose"):
+                    await chunks.aclose()
+
+    def _record_success(self, start: float):
+        self.breaker.record_success()
+        self.succeeded += 1
+        self._latencies.append(time.monotonic() - start)
+
+    def _retry_delay(self, error: Exception, attempt: int):
+        # Records a failed attempt and returns the backoff before the next one,
+        # or None when the error is final
+        if not _is_retryable(error):
+            # The model answered, so the circuit stays healthy
+            self.breaker.record_success()
+            self.failed += 1
+            return None
+        self.breaker.record_failure()
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+            self.timeouts += 1
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if getattr(error, "status_code", None) == 429:
+            self.rate_limited += 1
+            retry_after = _retry_after(error)
+            if retry_after:
+                delay = max(delay, retry_after)
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        if attempt == self.max_retries:
+            self.failed += 1
+            return None
+        return delay
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        percentile = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3) if latencies else None
+        return {
+            "calls": self.calls,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "timeouts": self.timeouts,
+            "short_circuited": self.short_circuited,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "queue_wait_seconds": round(self.queue_wait, 3),
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "breaker": {"state": self.breaker.state, "opens": self.breaker.opens},
+        }
+
+
+class ScheduledLLM:
+    """
+    Drop-in wrapper that routes ainvoke and astream through an LLMScheduler.
+    """
+
+    def __init__(self, llm, scheduler: LLMScheduler, name: str):
+        self.llm = llm
+        self.scheduler = scheduler
+        self.name = name
+
+    async def ainvoke(self, prompt):
+        return await self.scheduler.run(self.llm, prompt, self.name)
+
+    def astream(self, prompt):
+        return self.scheduler.stream(self.llm, prompt, self.name)
+
+
+def create_llm_scheduler() -> LLMScheduler:
+    """
+    Create the LLM scheduler configured by the LLM_* settings.
+    """
+    settings = get_settings()
+    return LLMScheduler(
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        max_retries=settings.llm_max_retries,
+        base_delay=settings.llm_retry_base_delay,
+        max_delay=settings.llm_retry_max_delay,
+        timeout=settings.llm_timeout,
+        hedge_after=settings.llm_hedge_after,
+        expected_output_tokens=settings.llm_expected_output_tokens,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.llm_breaker_threshold,
+            reset_timeout=settings.llm_breaker_reset_seconds,
+        ),
+    )
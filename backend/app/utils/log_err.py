@@ -1,5 +1,4 @@
 from datetime import datetime
-from app.database.get_client import get_client
 from fastapi import Request
 
 # Updated error logging function to use app-wide MongoDB connection
@@ -21,8 +20,8 @@ async def log_error(request: Request, error, endpoint, **additional_info):
     }
     
     try:
-        error_collection = request.app.mongodb["error-log"]
-        await error_collection.insert_one(error_dict)
+        # Queue on the write-behind buffer; errors are flushed in bulk
+        await request.app.write_buffers.insert("error-log", error_dict)
     except Exception as e:
         # If we can't log to DB, print to console as fallback
         print(f"Error logging failed: {str(e)}")
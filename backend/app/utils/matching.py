@@ -0,0 +1,318 @@
+import os
+import re
+import json
+import math
+import zlib
+import asyncio
+import tempfile
+from pathlib import Path
+from collections import Counter
+import numpy as np
+from app.utils.settings import get_settings
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+class HashingEmbedder:
+    """
+    Offline stand-in for an embedding model.
+
+    Hashes word unigrams and bigrams into a fixed number of signed buckets with
+    sublinear term frequency, then L2-normalizes, so the dot product of two
+    vectors is their cosine similarity. crc32 keeps buckets stable across processes.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        tokens = _TOKEN_RE.findall((text or "").lower())
+        features = Counter(tokens)
+        features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in features.items():
+            hashed = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if hashed & 0x80000000 else -1.0
+            vector[hashed % self.dim] += sign * (1.0 + math.log(count))
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def aembed(self, texts: list) -> np.ndarray:
+        return await asyncio.to_thread(lambda: np.vstack([self._embed_one(text) for text in texts]))
+
+
+class OpenAIEmbedder:
+    """
+    Embeddings from the OpenAI API, normalized for cosine scoring.
+    """
+
+    def __init__(self, model: str = "text-embedding-3-small"):
+        from langchain_openai import OpenAIEmbeddings
+
+        self.model = OpenAIEmbeddings(model=model)
+        self.name = model
+
+    async def aembed(self, texts: list) -> np.ndarray:
+        vectors = np.asarray(await self.model.aembed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class VectorIndex:
+    """
+    Persistent, memory-mapped matrix of CV vectors for one user.
+
+    Vectors live in a float32 file of shape (capacity, dim) and CV ids in a
+    parallel fixed-width file; capacity doubles as CVs are added. The meta file
+    holds the row count and is written last, so a crash mid-append never
+    exposes a half-written row. It also records whether the index was ever
+    built from the full collection; only a reset (rebuild) sets that flag.
+    Writers take an exclusive file lock and readers remap whenever another
+    process has grown the index.
+    """
+
+    def __init__(self, path_prefix: Path, dim: int, initial_capacity: int = 1024):
+        self.path_prefix = path_prefix
+        self.dim = dim
+        self.initial_capacity = initial_capacity
+        self._vectors_path = self._path(".f32")
+        self._ids_path = self._path(".ids")
+        self._meta_path = self._path(".json")
+        self._lock_path = self._path(".lock")
+        self._meta_mtime = None
+        self.complete = False
+        self.count = 0
+        self.capacity = 0
+        self.vectors = None
+        self.ids = None
+
+    def _path(self, suffix: str) -> Path:
+        return self.path_prefix.parent / (self.path_prefix.name + suffix)
+
+    def exists(self) -> bool:
+        return self._meta_path.exists()
+
+    def is_complete(self) -> bool:
+        """
+        Whether the index holds every CV of the user, i.e. it was built by a reset
+        and only appended to since.
+        """
+        self._refresh()
+        return self.complete
+
+    def _refresh(self):
+        if not self._meta_path.exists():
+            return
+        mtime = self._meta_path.stat().st_mtime_ns
+        if mtime == self._meta_mtime:
+            return
+        meta = json.loads(self._meta_path.read_text())
+        if meta["capacity"] != self.capacity or self.vectors is None:
+            self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(meta["capacity"], self.dim))
+            self.ids = np.memmap(self._ids_path, dtype="S24", mode="r+", shape=(meta["capacity"],))
+        self.count, self.capacity, self._meta_mtime = meta["count"], meta["capacity"], mtime
+        # Indexes written before the flag existed are treated as incomplete
+        self.complete = meta.get("complete", False)
+
+    def _write_meta(self):
+        temp_path = self._path(".json.tmp")
+        temp_path.write_text(json.dumps({
+            "count": self.count, "capacity": self.capacity, "dim": self.dim, "complete": self.complete
+        }))
+        os.replace(temp_path, self._meta_path)
+        self._meta_mtime = self._meta_path.stat().st_mtime_ns
+
+    def _grow(self, capacity: int):
+        vectors = np.memmap(self._path(".f32.tmp"), dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        ids = np.memmap(self._path(".ids.tmp"), dtype="S24", mode="w+", shape=(capacity,))
+        if self.count:
+            vectors[:self.count] = self.vectors[:self.count]
+            ids[:self.count] = self.ids[:self.count]
+        vectors.flush()
+        ids.flush()
+        os.replace(self._path(".f32.tmp"), self._vectors_path)
+        os.replace(self._path(".ids.tmp"), self._ids_path)
+        self.vectors, self.ids, self.capacity = vectors, ids, capacity
+
+    def _locked(self):
+        import fcntl
+
+        self.path_prefix.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self._lock_path, "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def add(self, ids: list, vectors: np.ndarray, reset: bool = False):
+        """
+        Append rows to the index, or replace its content and mark it complete
+        when reset is True.
+        """
+        with self._locked():
+            if reset:
+                self.count, self.capacity, self.vectors, self.ids = 0, 0, None, None
+                self.complete = True
+            else:
+                self._refresh()
+            needed = self.count + len(ids)
+            # A reset allocates the files even for a user without CVs
+            if needed > self.capacity or self.vectors is None:
+                capacity = max(self.initial_capacity, self.capacity)
+                while capacity < needed:
+                    capacity *= 2
+                self._grow(capacity)
+            self.vectors[self.count:needed] = vectors
+            self.ids[self.count:needed] = [cv_id.encode("ascii") for cv_id in ids]
+            self.vectors.flush()
+            self.ids.flush()
+            self.count = needed
+            self._write_meta()
+
+    def search(self, query: np.ndarray, top_k: int) -> list:
+        """
+        Score every CV against the query with one matrix-vector product.
+
+        Returns:
+            list: (cv_id, score) tuples, best first
+        """
+        self._refresh()
+        if not self.count:
+            return []
+        scores = self.vectors[:self.count] @ query
+        top_k = min(top_k, self.count)
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[row].decode("ascii"), float(scores[row])) for row in top]
+
+
+class CVMatcher:
+    """
+    Ranks a user's CVs against a job description using per-user vector indexes.
+
+    blob_storage is needed to read the text of CVs stored with
+    CV_TEXT_STORAGE=blob when the index is rebuilt, so that rebuilt vectors
+    match those added by add_cv.
+    """
+
+    def __init__(self, index_dir: str, embedder, blob_storage=None):
+        self.index_dir = Path(index_dir)
+        self.embedder = embedder
+        self.blob_storage = blob_storage
+        self._indexes = {}
+        self._locks = {}
+        self._dim = None
+
+    async def _index(self, user_id: str) -> VectorIndex:
+        if self._dim is None:
+            self._dim = (await self.embedder.aembed(["dimension probe"])).shape[1]
+        if user_id not in self._indexes:
+            safe_user_id = re.sub(r"[^A-Za-z0-9_-]", "_", user_id)
+            self._indexes[user_id] = VectorIndex(self.index_dir / f"{safe_user_id}.{self.embedder.name}", self._dim)
+            # Serializes rebuilds and appends of one user, so a rebuild never drops a concurrent append
+            self._locks[user_id] = asyncio.Lock()
+        return self._indexes[user_id]
+
+    async def add_cv(self, user_id: str, cv_id: str, text: str, collection=None):
+        """
+        Embed a newly stored CV and append it to the user's index.
+
+        When the index has never been built from collection (e.g. the first
+        upload after a deploy), it is rebuilt first so that CVs stored earlier
+        are not left out.
+        """
+        index = await self._index(user_id)
+        vectors = await self.embedder.aembed([text])
+        async with self._locks[user_id]:
+            if collection is not None and not await asyncio.to_thread(index.is_complete):
+                # The new CV is usually still in the write buffer, so the rebuild misses it
+                if cv_id in await self._rebuild(user_id, collection):
+                    return
+            await asyncio.to_thread(index.add, [cv_id], vectors)
+
+    async def rebuild(self, user_id: str, collection, batch_size: int = 256) -> int:
+        """
+        Rebuild the user's index from the cv-data collection.
+
+        Returns:
+            int: Number of indexed CVs
+        """
+        await self._index(user_id)
+        async with self._locks[user_id]:
+            return len(await self._rebuild(user_id, collection, batch_size))
+
+    async def _rebuild(self, user_id: str, collection, batch_size: int = 256) -> set:
+        from app.database.cv_documents import load_text
+
+        index = self._indexes[user_id]
+        ids, vectors = [], []
+        batch_ids, batch_texts = [], []
+        async for document in collection.find({"user_id": user_id}):
+            batch_ids.append(str(document["_id"]))
+            batch_texts.append(cv_match_text(document.get("extracted_data") or {}, await load_text(document, self.blob_storage)))
+            if len(batch_ids) == batch_size:
+                ids.extend(batch_ids)
+                vectors.append(await self.embedder.aembed(batch_texts))
+                batch_ids, batch_texts = [], []
+        if batch_ids:
+            ids.extend(batch_ids)
+            vectors.append(await self.embedder.aembed(batch_texts))
+
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, self._dim), dtype=np.float32)
+        await asyncio.to_thread(index.add, ids, matrix, True)
+        return set(ids)
+
+    async def rank(self, user_id: str, jd_text: str, top_k: int = 20, collection=None) -> list:
+        """
+        Return the user's best matching CVs for a job description.
+
+        The index is built from collection when it has never been built.
+
+        Returns:
+            list: (cv_id, score) tuples, best first
+        """
+        index = await self._index(user_id)
+        if collection is not None and not await asyncio.to_thread(index.is_complete):
+            async with self._locks[user_id]:
+                # Another request may have built it while this one waited
+                if not await asyncio.to_thread(index.is_complete):
+                    await self._rebuild(user_id, collection)
+        query = (await self.embedder.aembed([jd_text]))[0]
+        return await asyncio.to_thread(index.search, query, top_k)
+
+
+def cv_match_text(extracted_data: dict, text_content: str = None) -> str:
+    """
+    Text of a CV used for matching: the extracted skills, experience and
+    education, followed by the raw text.
+    """
+    parts = [extracted_data.get(field) for field in ("skills", "experience", "education")]
+    parts.append(text_content)
+    return "\n".join(part for part in parts if part and part != "Not Found")
+
+
+def jd_match_text(job_data: dict) -> str:
+    """
+    Text of a job description used for matching.
+    """
+    fields = ("job_title", "job_skills", "job_description", "job_responsibilities", "job_experience", "job_education")
+    return "\n".join(job_data.get(field) for field in fields if job_data.get(field))
+
+
+def create_cv_matcher(blob_storage=None) -> CVMatcher:
+    """
+    Create the CV matcher configured by the MATCH_* settings.
+    """
+    settings = get_settings()
+    embedder_name = settings.match_embedder
+    if embedder_name == "openai":
+        embedder = OpenAIEmbedder(settings.embedding_model)
+    elif embedder_name == "hashing":
+        embedder = HashingEmbedder(settings.match_embedding_dim)
+    else:
+        raise ValueError(f"Unknown MATCH_EMBEDDER: {embedder_name}")
+    # The index is derived from cv-data and rebuilt when missing, so by default it
+    # lives in the temp directory rather than wherever the server was started
+    index_dir = settings.match_index_dir or os.path.join(tempfile.gettempdir(), "hr-first-match-index")
+    return CVMatcher(index_dir, embedder, blob_storage)
@@ -0,0 +1,329 @@
+import os
+import re
+import json
+import time
+from bisect import bisect_left
+from app.utils.settings import get_settings
+
+# Latency buckets in seconds, from cache hits (ms) to slow LLM calls (minutes)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with a fixed set of labels.
+
+    observe() is a bisect and a few additions, cheap enough for every file of
+    every request. It is meant to be called from the event loop thread.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            # Per-bucket counts (non-cumulative), then +Inf, count and sum
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0, 0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def snapshot(self) -> dict:
+        """
+        Count, sum and approximate p50/p95/p99 (bucket upper bounds) per label set.
+        """
+        summary = {}
+        for labels, series in self._series.items():
+            count = series[-2]
+            quantiles = {}
+            for q in (0.5, 0.95, 0.99):
+                seen = 0
+                for index, bucket_count in enumerate(series[:-2]):
+                    seen += bucket_count
+                    if seen >= q * count:
+                        quantiles[f"p{int(q * 100)}"] = self.buckets[index] if index < len(self.buckets) else None
+                        break
+            summary[",".join(labels) or "all"] = {
+                "count": count,
+                "avg_seconds": round(series[-1] / count, 4) if count else None,
+                **quantiles,
+            }
+        return summary
+
+    def state(self) -> list:
+        return [[list(labels), list(series)] for labels, series in self._series.items()]
+
+    def merge(self, state: list):
+        """
+        Add the series of another process (from state()) to this histogram.
+        """
+        for labels, series in state:
+            own = self._series.setdefault(tuple(labels), [0] * (len(self.buckets) + 1) + [0, 0.0])
+            for index, value in enumerate(series):
+                own[index] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), series[:-2]):
+                cumulative += bucket_count
+                label_text = _labels(self.labelnames + ("le",), labels + (bound,))
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_count{label_text} {series[-2]}")
+            lines.append(f"{self.name}_sum{label_text} {series[-1]}")
+        return lines
+
+
+class Counter:
+    """
+    Prometheus-style counter with a fixed set of labels.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self) -> dict:
+        return {",".join(labels) or "all": value for labels, value in self._values.items()}
+
+    def state(self) -> list:
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+    def merge(self, state: list):
+        for labels, value in state:
+            self.inc(*labels, amount=value)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+def render_stats(prefix: str, stats: dict, labels: str = "") -> list:
+    """
+    Render the numeric leaves of a nested stats dict as Prometheus gauges.
+
+    {"cv_cache": {"memory": {"hits": 3}}} becomes prefix_cv_cache_memory_hits 3.
+    Booleans become 0/1; strings, lists and None are skipped. labels (e.g.
+    '{worker="12"}') is added to every sample.
+    """
+    lines = []
+    for key, value in stats.items():
+        name = f"{prefix}_{_NAME_RE.sub('_', str(key))}"
+        if isinstance(value, dict):
+            lines.extend(render_stats(name, value, labels))
+        elif isinstance(value, bool):
+            lines.append(f"{name}{labels} {int(value)}")
+        elif isinstance(value, (int, float)):
+            lines.append(f"{name}{labels} {value}")
+    return lines
+
+
+class _Stage:
+    """
+    Context manager that times one pipeline stage and, when tracing is on,
+    wraps it in an OpenTelemetry span.
+    """
+
+    __slots__ = ("metrics", "stage", "attributes", "span", "start")
+
+    def __init__(self, metrics, stage: str, attributes: dict):
+        self.metrics = metrics
+        self.stage = stage
+        self.attributes = attributes
+        self.span = None
+
+    def __enter__(self):
+        if self.metrics.tracer is not None:
+            self.span = self.metrics.tracer.start_as_current_span(f"cv.{self.stage}", attributes=self.attributes)
+            self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.metrics.stage_seconds.observe(elapsed, self.stage)
+        if exc_type is not None:
+            self.metrics.stage_errors.inc(self.stage)
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, tb)
+        return False
+
+
+class PipelineMetrics:
+    """
+    Per-stage timings of the CV pipeline.
+
+    stage() times a block into the hrfirst_cv_stage_seconds histogram (and an
+    OpenTelemetry span when tracing is enabled); observe() records a duration
+    measured elsewhere. render() produces the Prometheus text exposition.
+    """
+
+    def __init__(self, tracing: bool = False):
+        self.stage_seconds = Histogram(
+            "hrfirst_cv_stage_seconds", "Time spent in each CV pipeline stage.", ("stage",)
+        )
+        self.stage_errors = Counter(
+            "hrfirst_cv_stage_errors_total", "CV pipeline stages that raised.", ("stage",)
+        )
+        self.files = Counter(
+            "hrfirst_cv_files_total", "Processed CV files by type and outcome.", ("type", "outcome")
+        )
+        self.prompt_tokens = Counter(
+            "hrfirst_cv_prompt_tokens_total",
+            "Tokens of the extracted CV text (raw) and of the text sent to the LLM (prompt).", ("text",)
+        )
+        self.tracer = None
+        if tracing:
+            try:
+                from opentelemetry import trace
+
+                self.tracer = trace.get_tracer("hr-first")
+            except ImportError:
+                print("OpenTelemetry is not installed, tracing is disabled")
+
+    def stage(self, stage: str, **attributes) -> _Stage:
+        return _Stage(self, stage, attributes)
+
+    def observe(self, stage: str, seconds: float):
+        self.stage_seconds.observe(seconds, stage)
+
+    def record_prompt_tokens(self, report: dict):
+        """
+        Count the raw and prompt tokens of one CV (the report of CVTextPreparer.prepare).
+        """
+        self.prompt_tokens.inc("raw", amount=report["raw_tokens"])
+        self.prompt_tokens.inc("prompt", amount=report["prompt_tokens"])
+
+    def stats(self) -> dict:
+        return {
+            "stages": self.stage_seconds.snapshot(),
+            "errors": self.stage_errors.snapshot(),
+            "files": self.files.snapshot(),
+            "prompt_tokens": self.prompt_tokens.snapshot(),
+            "tracing": self.tracer is not None,
+        }
+
+    def _families(self) -> tuple:
+        return self.stage_seconds, self.stage_errors, self.files, self.prompt_tokens
+
+    def state(self) -> dict:
+        return {family.name: family.state() for family in self._families()}
+
+    def merge(self, state: dict):
+        for family in self._families():
+            family.merge(state.get(family.name, []))
+
+    def render(self) -> list:
+        return [line for family in self._families() for line in family.render()]
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class MultiProcessMetrics:
+    """
+    Metrics of every worker process of one server, shared through a directory.
+
+    serve.py runs several workers behind one port, so a scrape reaches one of
+    them at random. Each worker writes its histograms, counters and pipeline
+    stats to <directory>/<pid>.json (periodically and right before answering a
+    scrape), and the scraped worker renders the sum of all files:
+
+    - histograms and counters are summed over every file, including those of
+      workers that have exited, so they never go backwards when a worker is
+      restarted (as in prometheus_client's multiprocess mode);
+    - the pipeline stats gauges are rendered per live worker with a worker
+      label, since e.g. cache sizes of different processes cannot be summed.
+
+    Values of the other workers are at most one write interval old.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}.json")
+
+    def write(self, state: dict, stats: dict):
+        """
+        Write this process' metrics (PipelineMetrics.state(), taken on the
+        event loop) and stats (blocking).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as output:
+            json.dump({"pid": os.getpid(), "metrics": state, "stats": stats}, output, default=str)
+        os.replace(temp_path, self.path)
+
+    def render(self, state: dict, stats: dict, prefix: str) -> list:
+        """
+        Write this process' snapshot, then render the aggregate of every worker (blocking).
+        """
+        self.write(state, stats)
+        merged = PipelineMetrics()
+        gauges = []
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as source:
+                    snapshot = json.load(source)
+            except (OSError, ValueError):
+                # Removed or being replaced by its worker
+                continue
+            merged.merge(snapshot["metrics"])
+            if _process_alive(snapshot["pid"]):
+                gauges.extend(render_stats(prefix, snapshot["stats"], f'{{worker="{snapshot["pid"]}"}}'))
+        # Samples of one metric must be consecutive in the exposition format
+        gauges.sort(key=lambda line: line.split("{", 1)[0])
+        return merged.render() + gauges
+
+
+def create_multiprocess_metrics():
+    """
+    Metrics shared across worker processes when METRICS_DIR is set (serve.py
+    sets it for more than one worker), otherwise None.
+    """
+    directory = get_settings().metrics_dir
+    return MultiProcessMetrics(directory) if directory else None
+
+
+_metrics = None
+
+
+def get_metrics() -> PipelineMetrics:
+    """
+    Process-wide pipeline metrics; OTEL_TRACING=true also emits spans.
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = PipelineMetrics(tracing=get_settings().otel_tracing)
+    return _metrics
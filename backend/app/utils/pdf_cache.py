@@ -0,0 +1,192 @@
+import json
+import asyncio
+import hashlib
+import zipfile
+import tempfile
+from io import BytesIO
+from app.utils.cache import LRUCache
+from app.utils.settings import get_settings
+
+# Bump when the PDF layout changes so cached renders are not reused
+PDF_RENDER_VERSION = "1"
+
+# Job description fields that never appear in the rendered PDF
+_NON_RENDERED_FIELDS = ("_id", "is_exported", "uploaded_at", "user_id", "user_email")
+
+
+def jd_content_hash(job_data: dict) -> str:
+    """
+    Hash of the job description fields that make up the PDF, used as its ETag.
+    """
+    content = {key: value for key, value in job_data.items() if key not in _NON_RENDERED_FIELDS}
+    payload = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(f"{PDF_RENDER_VERSION}:{payload}".encode("utf-8")).hexdigest()
+
+
+class JDPdfCache:
+    """
+    Rendered job description PDFs, cached by job id and content hash.
+
+    An in-process LRU tier sits in front of the blob store. Each job id keeps
+    only the render matching its current content hash, so an edited JD is
+    re-rendered on its next download. ReportLab is pure Python and holds the
+    GIL, so renders run on executor (the extraction process pool) when one is
+    given, and on a worker thread otherwise.
+    """
+
+    def __init__(self, blob_storage, max_size: int = 256, executor=None):
+        self.blob_storage = blob_storage
+        self.executor = executor
+        self.memory = LRUCache(max_size)
+        self.renders = 0
+        self.blob_hits = 0
+
+    async def get_or_render(self, job_id: str, job_data: dict):
+        """
+        Return the PDF of a job description, rendering it only on a cache miss.
+
+        Args:
+            job_id (str): The ID of the job description
+            job_data (dict): The job description document
+
+        Returns:
+            tuple: (pdf_bytes, content_hash)
+        """
+        content_hash = jd_content_hash(job_data)
+        cached = self.memory.get(job_id)
+        if cached and cached[0] == content_hash:
+            return cached[1], content_hash
+
+        blob_path = f"jd-pdfs/{job_id}/{content_hash}.pdf"
+        try:
+            pdf_bytes = await self.blob_storage.download(blob_path)
+            self.blob_hits += 1
+        except Exception:
+            pdf_bytes = await self._render(job_data)
+            self.renders += 1
+            try:
+                await self.blob_storage.upload(blob_path, pdf_bytes, "application/pdf", "attachment")
+            except Exception as e:
+                print(f"Failed to store rendered PDF {blob_path}: {str(e)}")
+
+        self.memory.set(job_id, (content_hash, pdf_bytes))
+        return pdf_bytes, content_hash
+
+    async def _render(self, job_data: dict) -> bytes:
+        from app.utils.pdf_gen import render_pdf
+
+        if self.executor is not None:
+            return await self.executor.run(render_pdf, job_data)
+        return await asyncio.to_thread(render_pdf, job_data)
+
+    async def prepare(self):
+        """
+        Build the shared renderer where renders run: in every process of the
+        executor's pool, or in this process.
+        """
+        from app.utils.pdf_gen import warm_renderer
+
+        if self.executor is None:
+            await asyncio.to_thread(warm_renderer)
+        else:
+            # One call per worker; the pool hands them out to idle workers
+            await asyncio.gather(*(self.executor.run(warm_renderer) for _ in range(self.executor.max_workers)))
+
+    def invalidate(self, job_id: str):
+        self.memory.delete(job_id)
+
+    def stats(self) -> dict:
+        return {"renders": self.renders, "blob_hits": self.blob_hits, "memory": self.memory.stats()}
+
+
+class _ZipStreamBuffer:
+    """
+    Write-only file object for zipfile that hands out what was written so far.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _pdf_filename(job_data: dict) -> str:
+    safe_title = job_data.get("job_title", "job-description").replace(" ", "-").replace("/", "-").lower()
+    return f"{safe_title}-{job_data['_id']}.pdf"
+
+
+async def _render_all(pdf_cache: JDPdfCache, jobs: list, concurrency: int):
+    # Yields (index, job_data, pdf_bytes) in completion order with at most
+    # `concurrency` renders in flight
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _render(index: int, job_data: dict):
+        async with semaphore:
+            pdf_bytes, _ = await pdf_cache.get_or_render(str(job_data["_id"]), job_data)
+        return index, job_data, pdf_bytes
+
+    tasks = [asyncio.create_task(_render(index, job_data)) for index, job_data in enumerate(jobs)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def stream_jd_zip(pdf_cache: JDPdfCache, jobs: list, concurrency: int = 4):
+    """
+    Stream a ZIP archive of job description PDFs.
+
+    Each PDF is written to the archive and sent as soon as it is rendered, so
+    only the renders in flight are held in memory.
+    """
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for _, job_data, pdf_bytes in _render_all(pdf_cache, jobs, concurrency):
+            archive.writestr(_pdf_filename(job_data), pdf_bytes)
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+async def stream_merged_jd_pdf(pdf_cache: JDPdfCache, jobs: list, concurrency: int = 4,
+                               chunk_size: int = 1024 * 1024):
+    """
+    Render job descriptions in parallel and stream them merged into one PDF, in input order.
+
+    Each render is appended to the merged document as soon as the renders
+    before it are in, so only out-of-order renders are buffered. The merged
+    document itself is built by pypdf in memory: a PDF ends with the offsets
+    of all its objects, so nothing can be sent before the last page is
+    appended. Its output is spooled to a temporary file and streamed in
+    chunks, so the bytes of the merged PDF are never held in memory as a whole.
+    """
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    pending, next_index = {}, 0
+    async for index, _, pdf_bytes in _render_all(pdf_cache, jobs, concurrency):
+        pending[index] = pdf_bytes
+        while next_index in pending:
+            await asyncio.to_thread(writer.append, BytesIO(pending.pop(next_index)))
+            next_index += 1
+
+    with tempfile.SpooledTemporaryFile(max_size=chunk_size) as output:
+        await asyncio.to_thread(writer.write, output)
+        writer = None
+        output.seek(0)
+        while chunk := await asyncio.to_thread(output.read, chunk_size):
+            yield chunk
+
+
+def create_pdf_cache(blob_storage, executor=None) -> JDPdfCache:
+    return JDPdfCache(blob_storage, max_size=get_settings().pdf_cache_size, executor=executor)
@@ -4,161 +4,218 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from io import BytesIO
 
-async def generate_pdf(job_data):
-    """
-    Generate a PDF from job description data
-    """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, 
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=18)
-    
-    # Container for the 'Flowable' objects
-    elements = []
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = styles['Heading1']
-    heading_style = styles['Heading2']
-    normal_style = styles['Normal']
-    
-    # Custom styles
-    company_style = ParagraphStyle(
-        'Company',
-        parent=styles['Heading3'],
-        textColor=colors.darkblue,
-    )
-    
-    section_style = ParagraphStyle(
-        'Section',
-        parent=styles['Heading3'],
-        textColor=colors.darkblue,
-        spaceBefore=12,
-        spaceAfter=6,
-    )
-    
-    # Title
-    elements.append(Paragraph(job_data.get("job_title", "Job Description"), title_style))
-    elements.append(Spacer(1, 12))
-    
-    # Company information
-    if job_data.get("company_name"):
-        elements.append(Paragraph(f"Company: {job_data.get('company_name')}", company_style))
-        elements.append(Spacer(1, 6))
-    
-    if job_data.get("company_location") or job_data.get("job_location"):
-        location = job_data.get("company_location") or job_data.get("job_location", "")
-        elements.append(Paragraph(f"Location: {location}", normal_style))
-        elements.append(Spacer(1, 6))
-    
-    # Job details table
-    job_details = []
-    
-    # Add job details if available
-    if job_data.get("job_type"):
-        job_details.append(["Job Type", job_data.get("job_type")])
-    
-    if job_data.get("salary"):
-        job_details.append(["Salary", job_data.get("salary")])
-    
-    if job_data.get("job_category"):
-        job_details.append(["Category", job_data.get("job_category")])
-        
-    if job_data.get("application_deadline"):
-        job_details.append(["Application Deadline", job_data.get("application_deadline")])
-    
-    # Add job details table if we have entries
-    if job_details:
-        job_details_table = Table(job_details, colWidths=[100, 350])
-        job_details_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('PADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(job_details_table)
-        elements.append(Spacer(1, 12))
-    
-    # Job description
-    if job_data.get("job_description"):
-        elements.append(Paragraph("Job Description", section_style))
-        elements.append(Paragraph(job_data.get("job_description"), normal_style))
-        elements.append(Spacer(1, 12))
-    
-    # Responsibilities
-    if job_data.get("job_responsibilities"):
-        elements.append(Paragraph("Responsibilities", section_style))
-        responsibilities = job_data.get("job_responsibilities")
-        # Check if this is a string and try to format as bullet points if it contains line breaks
-        if isinstance(responsibilities, str) and "\n" in responsibilities:
-            for item in responsibilities.split("\n"):
-                if item.strip():
-                    elements.append(Paragraph(f"• {item.strip()}", normal_style))
-        else:
-            elements.append(Paragraph(responsibilities, normal_style))
-        elements.append(Spacer(1, 12))
-    
-    # Skills
-    if job_data.get("job_skills"):
-        elements.append(Paragraph("Skills", section_style))
-        skills = job_data.get("job_skills")
-        # Check if this is a string and try to format as bullet points if it contains line breaks
-        if isinstance(skills, str) and "\n" in skills:
-            for item in skills.split("\n"):
-                if item.strip():
-                    elements.append(Paragraph(f"• {item.strip()}", normal_style))
-        else:
-            elements.append(Paragraph(skills, normal_style))
-        elements.append(Spacer(1, 12))
-    
-    # Education and Experience
-    if job_data.get("job_education") or job_data.get("job_experience"):
-        elements.append(Paragraph("Education & Experience", section_style))
-        if job_data.get("job_education"):
-            elements.append(Paragraph(f"Education: {job_data.get('job_education')}", normal_style))
-        if job_data.get("job_experience"):
-            elements.append(Paragraph(f"Experience: {job_data.get('job_experience')}", normal_style))
-        elements.append(Spacer(1, 12))
-    
-    # Benefits
-    if job_data.get("job_benefits") or job_data.get("company_benefits"):
-        elements.append(Paragraph("Benefits", section_style))
-        benefits = job_data.get("job_benefits") or job_data.get("company_benefits", "")
-        # Check if this is a string and try to format as bullet points if it contains line breaks
-        if isinstance(benefits, str) and "\n" in benefits:
-            for item in benefits.split("\n"):
-                if item.strip():
-                    elements.append(Paragraph(f"• {item.strip()}", normal_style))
+
+class Heading:
+    """
+    Title of the document, from the first field that is set.
+    """
+
+    def __init__(self, *fields, default: str = None):
+        self.fields = fields
+        self.default = default
+
+    def flowables(self, renderer, job_data: dict) -> list:
+        text = _first(job_data, self.fields) or self.default
+        if not text:
+            return []
+        return [Paragraph(text, renderer.title_style), Spacer(1, 12)]
+
+
+class Line:
+    """
+    One labelled line, e.g. "Company: Acme", from the first field that is set.
+    """
+
+    def __init__(self, label: str, *fields, style: str = "normal"):
+        self.label = label
+        self.fields = fields
+        self.style = style
+
+    def flowables(self, renderer, job_data: dict) -> list:
+        value = _first(job_data, self.fields)
+        if not value:
+            return []
+        return [Paragraph(f"{self.label}: {value}", renderer.style(self.style)), Spacer(1, 6)]
+
+
+class DetailsTable:
+    """
+    Two-column table of (label, field) rows, skipping fields that are not set.
+    """
+
+    def __init__(self, rows: list, spacer: bool = True):
+        self.rows = rows
+        self.spacer = spacer
+
+    def flowables(self, renderer, job_data: dict) -> list:
+        details = [[label, job_data.get(field)] for label, field in self.rows if job_data.get(field)]
+        if not details:
+            return []
+        table = Table(details, colWidths=[100, 350])
+        table.setStyle(renderer.details_table_style)
+        return [table, Spacer(1, 12)] if self.spacer else [table]
+
+
+class Section:
+    """
+    Titled section with the first field that is set as its body.
+
+    With bullets=True, multi-line text is rendered as one bullet per line.
+    """
+
+    def __init__(self, title: str, *fields, bullets: bool = False):
+        self.title = title
+        self.fields = fields
+        self.bullets = bullets
+
+    def flowables(self, renderer, job_data: dict) -> list:
+        value = _first(job_data, self.fields)
+        if not value:
+            return []
+        elements = [Paragraph(self.title, renderer.section_style)]
+        if self.bullets and isinstance(value, str) and "\n" in value:
+            elements.extend(
+                Paragraph(f"• {item.strip()}", renderer.normal_style)
+                for item in value.split("\n") if item.strip()
+            )
         else:
-            elements.append(Paragraph(benefits, normal_style))
+            elements.append(Paragraph(value, renderer.normal_style))
         elements.append(Spacer(1, 12))
-    
-    # Company description
-    if job_data.get("company_description"):
-        elements.append(Paragraph("About the Company", section_style))
-        elements.append(Paragraph(job_data.get("company_description"), normal_style))
-        elements.append(Spacer(1, 12))
-    
-    # Company details (industry, size, website)
-    company_details = []
-    if job_data.get("company_industry"):
-        company_details.append(["Industry", job_data.get("company_industry")])
-    if job_data.get("company_size"):
-        company_details.append(["Company Size", job_data.get("company_size")])
-    if job_data.get("company_website"):
-        company_details.append(["Website", job_data.get("company_website")])
-    
-    if company_details:
-        company_details_table = Table(company_details, colWidths=[100, 350])
-        company_details_table.setStyle(TableStyle([
+        return elements
+
+
+class LabeledSection:
+    """
+    Titled section with one "Label: value" line per field that is set.
+    """
+
+    def __init__(self, title: str, rows: list):
+        self.title = title
+        self.rows = rows
+
+    def flowables(self, renderer, job_data: dict) -> list:
+        lines = [f"{label}: {job_data.get(field)}" for label, field in self.rows if job_data.get(field)]
+        if not lines:
+            return []
+        return [
+            Paragraph(self.title, renderer.section_style),
+            *(Paragraph(line, renderer.normal_style) for line in lines),
+            Spacer(1, 12),
+        ]
+
+
+# Default job description layout. New JD fields are added by adding a section here.
+JD_LAYOUT = [
+    Heading("job_title", default="Job Description"),
+    Line("Company", "company_name", style="company"),
+    Line("Location", "company_location", "job_location"),
+    DetailsTable([
+        ("Job Type", "job_type"),
+        ("Salary", "salary"),
+        ("Category", "job_category"),
+        ("Application Deadline", "application_deadline"),
+    ]),
+    Section("Job Description", "job_description"),
+    Section("Responsibilities", "job_responsibilities", bullets=True),
+    Section("Skills", "job_skills", bullets=True),
+    LabeledSection("Education & Experience", [("Education", "job_education"), ("Experience", "job_experience")]),
+    Section("Benefits", "job_benefits", "company_benefits", bullets=True),
+    Section("About the Company", "company_description"),
+    DetailsTable([
+        ("Industry", "company_industry"),
+        ("Company Size", "company_size"),
+        ("Website", "company_website"),
+    ], spacer=False),
+]
+
+
+class JDRenderer:
+    """
+    Renders job descriptions to PDF with a section layout.
+
+    Paragraph and table styles are built once and shared by every render; they
+    are only read while rendering, so one renderer can be used from several
+    threads.
+    """
+
+    def __init__(self, layout: list = None):
+        self.layout = layout if layout is not None else JD_LAYOUT
+
+        styles = getSampleStyleSheet()
+        self.title_style = styles['Heading1']
+        self.normal_style = styles['Normal']
+
+        # Custom styles
+        self.company_style = ParagraphStyle(
+            'Company',
+            parent=styles['Heading3'],
+            textColor=colors.darkblue,
+        )
+
+        self.section_style = ParagraphStyle(
+            'Section',
+            parent=styles['Heading3'],
+            textColor=colors.darkblue,
+            spaceBefore=12,
+            spaceAfter=6,
+        )
+
+        self.details_table_style = TableStyle([
             ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
             ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
             ('PADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(company_details_table)
-    
-    # Build the PDF
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
\ No newline at end of file
+        ])
+
+    def style(self, name: str) -> ParagraphStyle:
+        return getattr(self, f"{name}_style")
+
+    def render(self, job_data: dict) -> bytes:
+        """
+        Render job description data to PDF bytes (blocking)
+        """
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter,
+                               rightMargin=72, leftMargin=72,
+                               topMargin=72, bottomMargin=18)
+
+        elements = []
+        for section in self.layout:
+            elements.extend(section.flowables(self, job_data))
+
+        doc.build(elements)
+        return buffer.getvalue()
+
+
+def _first(job_data: dict, fields: tuple):
+    for field in fields:
+        if job_data.get(field):
+            return job_data.get(field)
+    return None
+
+
+_renderer = None
+
+
+def get_renderer() -> JDRenderer:
+    """
+    Shared JD renderer, built on first use.
+    """
+    global _renderer
+    if _renderer is None:
+        _renderer = JDRenderer()
+    return _renderer
+
+
+def warm_renderer():
+    """
+    Build the shared renderer of this process ahead of the first render.
+    """
+    get_renderer()
+
+
+def render_pdf(job_data) -> bytes:
+    """
+    Render job description data to PDF bytes (blocking)
+    """
+    return get_renderer().render(job_data)
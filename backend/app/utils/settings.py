@@ -0,0 +1,258 @@
+import os
+from typing import Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Application settings, read from the environment (and .env) once per process.
+
+    Every env variable of the app is read here (see .env.example); the create_*
+    factories and helpers take their tuning values from get_settings() instead
+    of the environment. serve.py reads its own WEB_* options before the app is
+    imported.
+    """
+    mongodb_url: str
+    mongodb_database: str
+    openai_api_key: str
+    llm_model: str
+    # "openai", or "fake" for the local stand-in model (app/utils/fake_llm.py)
+    llm_backend: str
+    # Clients built in the background right after startup instead of on first use
+    preload_clients: tuple
+    # Upload size limits (bytes) and the chunk size uploads are streamed with
+    max_upload_file_bytes: int
+    max_upload_request_bytes: int
+    upload_chunk_size: int
+    # Uploaded files larger than this are spooled to a temp file in upload_spool_dir
+    # (None: the system temp directory) while they wait for parsing
+    upload_spool_threshold: int
+    upload_spool_dir: Optional[str]
+
+    # Upload pipeline concurrency limits (shared across requests)
+    blob_upload_concurrency: int
+    parse_concurrency: int
+    llm_concurrency: int
+
+    # Blob storage
+    storage_backend: str
+    azure_storage_connection_string: Optional[str]
+    container_name: Optional[str]
+    blob_pool_size: int
+    blob_upload_max_concurrency: int
+    blob_max_block_size: int
+    blob_max_single_put_size: int
+    local_storage_dir: str
+    local_storage_base_url: Optional[str]
+
+    # Text extraction executor
+    extraction_executor: str
+    extraction_workers: Optional[int]
+    extraction_timeout: float
+    extraction_memory_limit_mb: Optional[int]
+    extraction_spill_threshold: int
+    extraction_spill_dir: Optional[str]
+
+    # Caches
+    cv_cache_size: int
+    cv_cache_ttl_seconds: int
+    jd_cache_size: int
+    jd_cache_ttl_seconds: int
+    jd_cache_similarity_threshold: float
+    pdf_cache_size: int
+    pdf_render_concurrency: int
+
+    # Batched CV extraction
+    cv_batch_extraction: bool
+    cv_batch_max_tokens: int
+    cv_batch_max_size: int
+    cv_batch_max_cv_tokens: int
+    cv_batch_max_wait: float
+    cv_prompt_max_tokens: int
+
+    # Background upload jobs
+    job_store: str
+    job_workers: int
+    job_poll_interval: float
+    job_lease_seconds: int
+    job_drain_seconds: float
+
+    # Write-behind buffers
+    write_buffer_batch_size: int
+    write_buffer_flush_interval: float
+    write_buffer_max_pending: int
+
+    # Extracted CV text storage
+    cv_text_storage: str
+    cv_text_codec: str
+
+    # CV-to-JD matching
+    match_embedder: str
+    match_embedding_dim: int
+    embedding_model: str
+    match_index_dir: Optional[str]
+
+    # Shared MongoDB client
+    mongo_max_pool_size: int
+    mongo_min_pool_size: int
+    mongo_max_idle_time_ms: int
+    mongo_max_connecting: int
+    mongo_connect_timeout_ms: int
+    mongo_server_selection_timeout_ms: int
+    mongo_wait_queue_timeout_ms: int
+    mongo_socket_timeout_ms: Optional[int]
+    mongo_read_preference: str
+    mongo_read_concern: Optional[str]
+    mongo_write_concern: Optional[str]
+    mongo_retry_writes: bool
+    # Empty disables the stable API (servers older than 5.0)
+    mongo_server_api: str
+
+    # Fake LLM
+    fake_llm_latency: float
+    fake_llm_jitter: float
+    fake_llm_rate_limit_rate: float
+    fake_llm_error_rate: float
+    fake_llm_slow_rate: float
+
+    # LLM scheduler
+    llm_requests_per_minute: float
+    llm_tokens_per_minute: float
+    llm_expected_output_tokens: int
+    llm_max_retries: int
+    llm_retry_base_delay: float
+    llm_retry_max_delay: float
+    llm_timeout: float
+    llm_hedge_after: float
+    llm_breaker_threshold: int
+    llm_breaker_reset_seconds: float
+
+    # Metrics
+    otel_tracing: bool
+    # Set by serve.py when it runs several workers
+    metrics_dir: Optional[str]
+    metrics_write_seconds: float
+
+
+def _flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def _optional(name: str) -> Optional[str]:
+    # Unset and empty both mean "not configured"
+    return os.getenv(name) or None
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    load_dotenv()
+    return Settings(
+        mongodb_url=os.getenv("uri"),
+        mongodb_database=os.getenv("MONGODB_DATABASE", "hr-first"),
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        llm_model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
+        llm_backend=os.getenv("LLM_BACKEND", "openai").lower(),
+        preload_clients=tuple(name.strip() for name in os.getenv("PRELOAD_CLIENTS", "").split(",") if name.strip()),
+        max_upload_file_bytes=int(os.getenv("MAX_UPLOAD_FILE_BYTES", str(20 * 1024 * 1024))),
+        max_upload_request_bytes=int(os.getenv("MAX_UPLOAD_REQUEST_BYTES", str(200 * 1024 * 1024))),
+        upload_chunk_size=int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024))),
+        upload_spool_threshold=int(os.getenv("UPLOAD_SPOOL_THRESHOLD", str(1024 * 1024))),
+        upload_spool_dir=_optional("UPLOAD_SPOOL_DIR"),
+
+        blob_upload_concurrency=int(os.getenv("BLOB_UPLOAD_CONCURRENCY", "8")),
+        parse_concurrency=int(os.getenv("PARSE_CONCURRENCY", "4")),
+        llm_concurrency=int(os.getenv("LLM_CONCURRENCY", "8")),
+
+        storage_backend=os.getenv("STORAGE_BACKEND", "azure").lower(),
+        azure_storage_connection_string=os.getenv("AZURE_STORAGE_CONNECTION_STRING"),
+        container_name=os.getenv("CONTAINER_NAME"),
+        blob_pool_size=int(os.getenv("BLOB_POOL_SIZE", "100")),
+        blob_upload_max_concurrency=int(os.getenv("BLOB_UPLOAD_MAX_CONCURRENCY", "4")),
+        blob_max_block_size=int(os.getenv("BLOB_MAX_BLOCK_SIZE", str(4 * 1024 * 1024))),
+        blob_max_single_put_size=int(os.getenv("BLOB_MAX_SINGLE_PUT_SIZE", str(8 * 1024 * 1024))),
+        local_storage_dir=os.getenv("LOCAL_STORAGE_DIR", "local-blobs"),
+        local_storage_base_url=os.getenv("LOCAL_STORAGE_BASE_URL"),
+
+        extraction_executor=os.getenv("EXTRACTION_EXECUTOR", "process").lower(),
+        extraction_workers=_optional_int("EXTRACTION_WORKERS"),
+        extraction_timeout=float(os.getenv("EXTRACTION_TIMEOUT", "60")),
+        extraction_memory_limit_mb=_optional_int("EXTRACTION_MEMORY_LIMIT_MB"),
+        extraction_spill_threshold=int(os.getenv("EXTRACTION_SPILL_THRESHOLD", str(10 * 1024 * 1024))),
+        extraction_spill_dir=_optional("EXTRACTION_SPILL_DIR"),
+
+        cv_cache_size=int(os.getenv("CV_CACHE_SIZE", "1024")),
+        cv_cache_ttl_seconds=int(os.getenv("CV_CACHE_TTL_SECONDS", str(30 * 24 * 3600))),
+        jd_cache_size=int(os.getenv("JD_CACHE_SIZE", "1024")),
+        jd_cache_ttl_seconds=int(os.getenv("JD_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+        jd_cache_similarity_threshold=float(os.getenv("JD_CACHE_SIMILARITY_THRESHOLD", "0")),
+        pdf_cache_size=int(os.getenv("PDF_CACHE_SIZE", "256")),
+        pdf_render_concurrency=int(os.getenv("PDF_RENDER_CONCURRENCY", "4")),
+
+        cv_batch_extraction=_flag("CV_BATCH_EXTRACTION"),
+        cv_batch_max_tokens=int(os.getenv("CV_BATCH_MAX_TOKENS", "12000")),
+        cv_batch_max_size=int(os.getenv("CV_BATCH_MAX_SIZE", "8")),
+        cv_batch_max_cv_tokens=int(os.getenv("CV_BATCH_MAX_CV_TOKENS", "3000")),
+        cv_batch_max_wait=float(os.getenv("CV_BATCH_MAX_WAIT", "0.05")),
+        cv_prompt_max_tokens=int(os.getenv("CV_PROMPT_MAX_TOKENS", "6000")),
+
+        job_store=os.getenv("JOB_STORE", "mongo").lower(),
+        job_workers=int(os.getenv("JOB_WORKERS", "2")),
+        job_poll_interval=float(os.getenv("JOB_POLL_INTERVAL", "2")),
+        job_lease_seconds=int(os.getenv("JOB_LEASE_SECONDS", "300")),
+        job_drain_seconds=float(os.getenv("JOB_DRAIN_SECONDS", "30")),
+
+        write_buffer_batch_size=int(os.getenv("WRITE_BUFFER_BATCH_SIZE", "500")),
+        write_buffer_flush_interval=float(os.getenv("WRITE_BUFFER_FLUSH_INTERVAL", "1.0")),
+        write_buffer_max_pending=int(os.getenv("WRITE_BUFFER_MAX_PENDING", "10000")),
+
+        cv_text_storage=os.getenv("CV_TEXT_STORAGE", "inline").lower(),
+        cv_text_codec=os.getenv("CV_TEXT_CODEC", "zlib").lower(),
+
+        match_embedder=os.getenv("MATCH_EMBEDDER", "hashing").lower(),
+        match_embedding_dim=int(os.getenv("MATCH_EMBEDDING_DIM", "512")),
+        embedding_model=os.getenv("EMBEDDING_MODEL", "text-embedding-3-small"),
+        match_index_dir=_optional("MATCH_INDEX_DIR"),
+
+        mongo_max_pool_size=int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        mongo_min_pool_size=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        mongo_max_idle_time_ms=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+        mongo_max_connecting=int(os.getenv("MONGO_MAX_CONNECTING", "2")),
+        mongo_connect_timeout_ms=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000")),
+        mongo_server_selection_timeout_ms=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000")),
+        mongo_wait_queue_timeout_ms=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000")),
+        mongo_socket_timeout_ms=_optional_int("MONGO_SOCKET_TIMEOUT_MS"),
+        mongo_read_preference=os.getenv("MONGO_READ_PREFERENCE", "primary"),
+        mongo_read_concern=_optional("MONGO_READ_CONCERN"),
+        mongo_write_concern=_optional("MONGO_WRITE_CONCERN"),
+        mongo_retry_writes=_flag("MONGO_RETRY_WRITES", "true"),
+        mongo_server_api=os.getenv("MONGO_SERVER_API", "1"),
+
+        fake_llm_latency=float(os.getenv("FAKE_LLM_LATENCY", "0.2")),
+        fake_llm_jitter=float(os.getenv("FAKE_LLM_JITTER", "0.1")),
+        fake_llm_rate_limit_rate=float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0")),
+        fake_llm_error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+        fake_llm_slow_rate=float(os.getenv("FAKE_LLM_SLOW_RATE", "0")),
+
+        llm_requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500")),
+        llm_tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "200000")),
+        llm_expected_output_tokens=int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "400")),
+        llm_max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+        llm_retry_base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+        llm_retry_max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "20")),
+        llm_timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+        llm_hedge_after=float(os.getenv("LLM_HEDGE_AFTER", "0")),
+        llm_breaker_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+        llm_breaker_reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+
+        otel_tracing=_flag("OTEL_TRACING"),
+        metrics_dir=_optional("METRICS_DIR"),
+        metrics_write_seconds=float(os.getenv("METRICS_WRITE_SECONDS", "5")),
+    )
@@ -0,0 +1,359 @@
+import uuid
+import asyncio
+from io import BytesIO
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId #type: ignore
+from fastapi import Request, UploadFile
+from starlette.datastructures import Headers
+from app.utils.file_pro import _process_file
+from app.utils.settings import get_settings
+
+FINISHED_FILE_STATUSES = ("done", "failed")
+
+
+def _new_job(user_id: str, user_email: str, files: list) -> dict:
+    now = datetime.now()
+    return {
+        "user_id": user_id,
+        "user_email": user_email,
+        "status": "queued",
+        "created_at": now,
+        "updated_at": now,
+        "lease_until": None,
+        "total": len(files),
+        "processed": 0,
+        "succeeded": 0,
+        "files": files,
+    }
+
+
+class MongoJobStore:
+    """
+    Upload job store backed by the upload-jobs collection, with file content in GridFS.
+
+    Jobs are claimed atomically with a lease, so several workers (or app
+    processes) can share the queue and a job left running by a crashed
+    process is picked up again once its lease expires.
+    """
+
+    def __init__(self, db):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket #type: ignore
+
+        self.collection = db["upload-jobs"]
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name="upload-job-files")
+
+    async def create_job(self, user_id: str, user_email: str, files: list) -> str:
+        """
+        Store the files of a new job and queue it.
+
+        Args:
+            user_id (str): The ID of the user uploading the files
+            user_email (str): The email of the user uploading the files
+            files (list): (filename, content_type, source, size) tuples, where
+                          source is the content or a file object to stream it from
+
+        Returns:
+            str: The job id
+        """
+        file_entries = []
+        for index, (filename, content_type, source, size) in enumerate(files):
+            file_id = await self.bucket.upload_from_stream(filename, source)
+            file_entries.append({
+                "index": index,
+                "filename": filename,
+                "content_type": content_type,
+                "size": size,
+                "file_id": file_id,
+                "status": "queued",
+                "data": None,
+            })
+        result = await self.collection.insert_one(_new_job(user_id, user_email, file_entries))
+        return str(result.inserted_id)
+
+    async def get_job(self, job_id: str, user_id: str):
+        if not ObjectId.is_valid(job_id):
+            return None
+        job = await self.collection.find_one({"_id": ObjectId(job_id), "user_id": user_id})
+        if job:
+            job["_id"] = str(job["_id"])
+        return job
+
+    async def claim_next_job(self, lease_seconds: int):
+        now = datetime.now()
+        job = await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": "running", "lease_until": now + timedelta(seconds=lease_seconds), "updated_at": now}},
+            sort=[("created_at", 1)],
+            return_document=True
+        )
+        if job:
+            job["_id"] = str(job["_id"])
+        return job
+
+    async def renew_lease(self, job_id: str, lease_seconds: int):
+        await self.collection.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {"lease_until": datetime.now() + timedelta(seconds=lease_seconds)}}
+        )
+
+    async def load_file(self, job: dict, index: int) -> bytes:
+        stream = await self.bucket.open_download_stream(job["files"][index]["file_id"])
+        return await stream.read()
+
+    async def set_file_status(self, job_id: str, index: int, status: str, data: dict = None):
+        update = {"$set": {
+            f"files.{index}.status": status,
+            f"files.{index}.data": data,
+            "updated_at": datetime.now(),
+        }}
+        if status in FINISHED_FILE_STATUSES:
+            update["$inc"] = {"processed": 1, "succeeded": 1 if status == "done" else 0}
+        await self.collection.update_one({"_id": ObjectId(job_id)}, update)
+
+    async def finish_job(self, job: dict):
+        for file_entry in job["files"]:
+            try:
+                await self.bucket.delete(file_entry["file_id"])
+            except Exception as e:
+                print(f"Failed to delete job file {file_entry['file_id']}: {str(e)}")
+        await self.collection.update_one(
+            {"_id": ObjectId(job["_id"])},
+            {"$set": {"status": "completed", "lease_until": None, "updated_at": datetime.now()}}
+        )
+
+    async def prepare(self):
+        await self.collection.create_index([("status", 1), ("created_at", 1)])
+
+
+class LocalJobStore:
+    """
+    In-memory stand-in for MongoJobStore, for offline development and benchmarking.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self.contents = {}
+
+    async def create_job(self, user_id: str, user_email: str, files: list) -> str:
+        job_id = uuid.uuid4().hex
+        file_entries = []
+        for index, (filename, content_type, source, size) in enumerate(files):
+            self.contents[(job_id, index)] = source.read() if hasattr(source, "read") else source
+            file_entries.append({
+                "index": index,
+                "filename": filename,
+                "content_type": content_type,
+                "size": size,
+                "status": "queued",
+                "data": None,
+            })
+        self.jobs[job_id] = {"_id": job_id, **_new_job(user_id, user_email, file_entries)}
+        return job_id
+
+    async def get_job(self, job_id: str, user_id: str):
+        job = self.jobs.get(job_id)
+        return job if job is not None and job["user_id"] == user_id else None
+
+    async def claim_next_job(self, lease_seconds: int):
+        for job in self.jobs.values():
+            if job["status"] == "queued":
+                job["status"] = "running"
+                job["updated_at"] = datetime.now()
+                return job
+        return None
+
+    async def renew_lease(self, job_id: str, lease_seconds: int):
+        pass
+
+    async def load_file(self, job: dict, index: int) -> bytes:
+        return self.contents[(job["_id"], index)]
+
+    async def set_file_status(self, job_id: str, index: int, status: str, data: dict = None):
+        job = self.jobs[job_id]
+        job["files"][index]["status"] = status
+        job["files"][index]["data"] = data
+        job["updated_at"] = datetime.now()
+        if status in FINISHED_FILE_STATUSES:
+            job["processed"] += 1
+            job["succeeded"] += 1 if status == "done" else 0
+
+    async def finish_job(self, job: dict):
+        for file_entry in job["files"]:
+            self.contents.pop((job["_id"], file_entry["index"]), None)
+        self.jobs[job["_id"]]["status"] = "completed"
+
+    async def prepare(self):
+        pass
+
+
+class UploadJobQueue:
+    """
+    Worker pool that processes queued upload jobs through the CV pipeline.
+
+    Workers claim jobs from the store, so queued work survives restarts and
+    client disconnects. Files of a job are processed concurrently, bounded by
+    the same per-stage semaphores as the synchronous upload endpoint.
+    """
+
+    def __init__(self, app, store, workers: int = 2, poll_interval: float = 2.0, lease_seconds: int = 300):
+        self.app = app
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._wakeup = asyncio.Event()
+        self._progress = asyncio.Condition()
+        self._tasks = []
+        self._stopping = False
+
+    async def start(self):
+        """
+        Start the workers. They do not wait for the store: claim errors (e.g.
+        MongoDB not reachable yet) are logged and retried every poll_interval.
+        """
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def prepare(self):
+        """
+        Create the indexes of the job store.
+        """
+        await self.store.prepare()
+
+    async def stop(self, drain_timeout: float = 0):
+        """
+        Stop the workers.
+
+        Args:
+            drain_timeout (float): Seconds to let running jobs finish before
+                                   they are cancelled; no new job is claimed
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._tasks and drain_timeout > 0:
+            await asyncio.wait(self._tasks, timeout=drain_timeout)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, user_id: str, user_email: str, files: list) -> str:
+        """
+        Store the files of a new job and wake up a worker.
+
+        Returns:
+            str: The job id
+        """
+        job_id = await self.store.create_job(user_id, user_email, files)
+        self._wakeup.set()
+        return job_id
+
+    async def _worker(self):
+        while not self._stopping:
+            try:
+                job = await self.store.claim_next_job(self.lease_seconds)
+            except Exception as e:
+                print(f"Failed to claim upload job: {str(e)}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run_job(job)
+            except Exception as e:
+                print(f"Upload job {job['_id']} failed: {str(e)}")
+
+    async def _run_job(self, job: dict):
+        # A minimal request scope so the pipeline can reach app state
+        request = Request({"type": "http", "app": self.app})
+        heartbeat = asyncio.create_task(self._heartbeat(job["_id"]))
+        try:
+            await asyncio.gather(*(
+                self._run_file(request, job, file_entry)
+                for file_entry in job["files"]
+                if file_entry["status"] not in FINISHED_FILE_STATUSES
+            ))
+        finally:
+            heartbeat.cancel()
+        await self.store.finish_job(job)
+        await self._notify()
+
+    async def _run_file(self, request: Request, job: dict, file_entry: dict):
+        index = file_entry["index"]
+        await self.store.set_file_status(job["_id"], index, "processing")
+        try:
+            content = await self.store.load_file(job, index)
+            file = UploadFile(
+                file=BytesIO(content),
+                filename=file_entry["filename"],
+                headers=Headers({"content-type": file_entry["content_type"] or ""})
+            )
+            result = await _process_file(
+                request=request,
+                file=file,
+                user_id=job["user_id"],
+                user_email=job["user_email"]
+            )
+        except Exception as e:
+            print(f"Failed to process {file_entry['filename']} of job {job['_id']}: {str(e)}")
+            result = {"success": False, "data": None}
+
+        await self.store.set_file_status(
+            job["_id"], index, "done" if result["success"] else "failed", result["data"]
+        )
+        await self._notify()
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.store.renew_lease(job_id, self.lease_seconds)
+            except Exception as e:
+                # Keep renewing: the lease outlives a few missed renewals, and letting
+                # it expire would make another worker process the job again
+                print(f"Failed to renew the lease of upload job {job_id}: {str(e)}")
+
+    async def _notify(self):
+        async with self._progress:
+            self._progress.notify_all()
+
+    async def wait_for_progress(self):
+        """
+        Wait until a file finishes in this process, or poll_interval passes
+        (progress made by other processes is only seen by polling).
+        """
+        async with self._progress:
+            try:
+                await asyncio.wait_for(self._progress.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def create_upload_job_queue(app) -> UploadJobQueue:
+    """
+    Create the upload job queue with the store selected by the JOB_STORE setting.
+    """
+    settings = get_settings()
+    backend = settings.job_store
+    if backend == "local":
+        store = LocalJobStore()
+    elif backend == "mongo":
+        store = MongoJobStore(app.mongodb)
+    else:
+        raise ValueError(f"Unknown JOB_STORE: {backend}")
+    return UploadJobQueue(
+        app,
+        store,
+        workers=settings.job_workers,
+        poll_interval=settings.job_poll_interval,
+        lease_seconds=settings.job_lease_seconds,
+    )
@@ -0,0 +1,62 @@
+import json
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware that rejects request bodies larger than max_body_size with 413.
+
+    A declared Content-Length over the limit is rejected before any of the
+    body is read. Otherwise the body is counted as it streams in and, once it
+    goes over the limit, the client gets a 413 and the app sees a disconnect,
+    so multipart parsing stops without spooling the rest.
+    """
+
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"Request body is larger than {self.max_body_size} bytes"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.max_body_size:
+            return await self.app(scope, receive, send)
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            return await self._reject(send)
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    rejected = True
+                    if not response_started:
+                        await self._reject(send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                # The 413 has been sent; drop the app's own error response
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
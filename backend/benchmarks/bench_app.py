@@ -0,0 +1,13 @@
+"""
+The app wired to the offline stand-ins, as an import string for server
+processes started by benchmarks.server. The environment is prepared by
+benchmarks.endpoints.configure_environment in the parent process.
+"""
+import os
+from main import app
+
+if os.getenv("BENCHMARK_MOCK_MONGO"):
+    from mongomock_motor import AsyncMongoMockClient #type: ignore
+
+    # One in-memory database per worker process
+    app.mongodb_client = AsyncMongoMockClient()
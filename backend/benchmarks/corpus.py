@@ -0,0 +1,151 @@
+"""
+Synthetic CV corpus for the offline benchmarks.
+
+Builds seeded, reproducible CVs as PDF (ReportLab) and DOCX (minimal
+WordprocessingML) with a realistic mix of sizes: one to three pages of
+contact details, experience, skills, education and extra sections. Every
+generated file has distinct content, so uploads are never served from the
+CV extraction cache unless a file is sent twice on purpose.
+
+Usage (from the backend directory):
+    python -m benchmarks.corpus --out /tmp/cv-corpus [--files 100] [--docx-ratio 0.3]
+"""
+import os
+import random
+import zipfile
+import argparse
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+_FIRST_NAMES = ["Alex", "Sam", "Maria", "Wei", "Priya", "John", "Fatima", "Lukas", "Ana", "Kenji", "Olu", "Sara"]
+_LAST_NAMES = ["Smith", "Garcia", "Chen", "Patel", "Kowalski", "Okafor", "Silva", "Tanaka", "Novak", "Haddad"]
+_CITIES = ["Berlin", "London", "Austin", "Toronto", "Warsaw", "Lagos", "Lisbon", "Singapore", "Remote"]
+_SKILLS = ["Python", "FastAPI", "Django", "Go", "Rust", "Java", "Kotlin", "TypeScript", "React", "AWS",
+           "Azure", "GCP", "Kubernetes", "Docker", "Terraform", "PostgreSQL", "MongoDB", "Redis", "Kafka",
+           "Spark", "Airflow", "PyTorch", "Pandas", "GraphQL", "gRPC", "CI/CD", "Linux", "SQL"]
+_TITLES = ["Software Engineer", "Backend Developer", "Data Engineer", "DevOps Engineer", "ML Engineer",
+           "Full-Stack Developer", "Platform Engineer", "QA Automation Engineer"]
+_COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Soylent"]
+_VERBS = ["Designed", "Built", "Migrated", "Led", "Optimized", "Automated", "Maintained", "Scaled", "Shipped"]
+_OBJECTS = ["a payments API", "the data platform", "CI pipelines", "a search service", "the monolith to services",
+            "real-time dashboards", "an event-driven ingestion layer", "internal developer tooling"]
+
+
+def _sections(rng: random.Random, index: int) -> list:
+    """
+    Build the (heading, lines) sections of one CV; the first section has no heading.
+    """
+    name = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+    contact = [
+        name,
+        f"{name.lower().replace(' ', '.')}.{index}@example.com | +1 555 {rng.randint(1000000, 9999999)}",
+        f"{rng.choice(_CITIES)} | linkedin.com/in/candidate-{index}",
+    ]
+    jobs = []
+    for _ in range(rng.randint(2, 6)):
+        start = rng.randint(2008, 2021)
+        jobs.append(f"{rng.choice(_TITLES)} - {rng.choice(_COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        jobs.extend(f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} for {rng.randint(2, 90)} teams"
+                    for _ in range(rng.randint(3, 8)))
+    sections = [
+        (None, contact),
+        ("Summary", [f"{rng.choice(_TITLES)} with {rng.randint(1, 15)} years of experience. " * rng.randint(1, 3)]),
+        ("Experience", jobs),
+        ("Skills", [", ".join(rng.sample(_SKILLS, rng.randint(5, 14)))]),
+        ("Education", [f"BSc Computer Science, University of {rng.choice(_CITIES)} ({rng.randint(2000, 2018)})"]),
+    ]
+    if rng.random() < 0.5:
+        sections.append(("Projects", [f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)}" for _ in range(rng.randint(2, 10))]))
+    if rng.random() < 0.3:
+        sections.append(("Interests", ["Climbing, chess, open source, cooking"]))
+    return sections
+
+
+def build_pdf(sections: list) -> bytes:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+    styles = getSampleStyleSheet()
+    elements = []
+    for heading, lines in sections:
+        if heading:
+            elements.append(Paragraph(heading, styles["Heading2"]))
+        elements.extend(Paragraph(escape(line), styles["Normal"]) for line in lines)
+        elements.append(Spacer(1, 8))
+    buffer = BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter).build(elements)
+    return buffer.getvalue()
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def build_docx(sections: list) -> bytes:
+    paragraphs = []
+    for heading, lines in sections:
+        for line in ([heading] if heading else []) + lines:
+            paragraphs.append(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>')
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(paragraphs)}</w:body></w:document>'
+    )
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _RELS)
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def generate_corpus(count: int, docx_ratio: float = 0.3, seed: int = 42) -> list:
+    """
+    Generate count synthetic CVs.
+
+    Returns:
+        list: (filename, content_type, content) tuples
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(count):
+        sections = _sections(rng, index)
+        if rng.random() < docx_ratio:
+            corpus.append((f"cv-{index:05d}.docx", DOCX_TYPE, build_docx(sections)))
+        else:
+            corpus.append((f"cv-{index:05d}.pdf", PDF_TYPE, build_pdf(sections)))
+    return corpus
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--docx-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    corpus = generate_corpus(args.files, args.docx_ratio, args.seed)
+    for filename, _, content in corpus:
+        with open(os.path.join(args.out, filename), "wb") as output:
+            output.write(content)
+    print(f"Wrote {len(corpus)} files ({sum(len(content) for _, _, content in corpus) // 1024} KiB) to {args.out}")
@@ -0,0 +1,276 @@
+"""
+Offline end-to-end benchmark of the upload and job description endpoints.
+
+Drives the FastAPI app in-process (httpx ASGI transport, real startup and
+shutdown) with local stand-ins: the fake LLM (LLM_BACKEND=fake, configurable
+latency), local blob storage in a temp directory, and mongomock (or a local
+mongod with --mongo-uri). Uploads use the synthetic corpus from
+benchmarks.corpus. Scenarios:
+
+    upload         POST /api/upload-files-process/ with new CVs
+    upload_cached  the same uploads again (CV extraction cache hits)
+    create_jd      POST /api/create-job-description/ with new requirements
+    create_jd_cached  the same requirements again (JD cache hits)
+    jd_pdf         GET /api/get-job-description-pdf/{job_id}
+
+Each scenario reports throughput, p50/p95/p99 latency and the peak RSS of
+the process so far; the largest peak RSS of the extraction worker
+processes is reported at the end. The run fails (exit code 1)
+when a result breaks a limit in --thresholds or regresses by more than
+--tolerance against a --baseline saved earlier with --output. The limits in
+benchmarks/thresholds.json are set for the default arguments, with
+headroom for slower machines.
+
+Needs httpx and mongomock-motor (or a local mongod) besides the app requirements.
+
+Usage (from the backend directory):
+    python -m benchmarks.endpoints [--uploads 20] [--files-per-upload 5] [--jds 40] [--pdfs 80]
+        [--concurrency 8] [--llm-latency 0.2] [--executor process] [--mongo-uri mongodb://localhost:27017]
+        [--thresholds benchmarks/thresholds.json] [--output results.json] [--baseline results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import tempfile
+import multiprocessing
+import statistics
+from benchmarks.corpus import generate_corpus, _TITLES, _CITIES, _SKILLS
+
+
+def percentile(latencies: list, q: float) -> float:
+    return statistics.quantiles(latencies, n=100)[int(q) - 1] if len(latencies) > 1 else latencies[0]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def workers_peak_rss_mb() -> float:
+    """
+    Largest peak RSS (VmHWM) of the live extraction worker processes (Linux only).
+    """
+    peak = 0
+    for child in multiprocessing.active_children():
+        try:
+            with open(f"/proc/{child.pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        peak = max(peak, int(line.split()[1]))
+        except OSError:
+            continue
+    return round(peak / 1024, 1)
+
+
+def configure_environment(args, work_dir: str):
+    """
+    Point the app at the local stand-ins. Must run before main is imported;
+    variables already set in the environment win.
+    """
+    defaults = {
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "FAKE_LLM_JITTER": str(args.llm_latency / 4),
+        # The benchmark measures the app, not the provider quota
+        "LLM_REQUESTS_PER_MINUTE": "1000000",
+        "LLM_TOKENS_PER_MINUTE": "1000000000",
+        "STORAGE_BACKEND": "local",
+        "LOCAL_STORAGE_DIR": os.path.join(work_dir, "blobs"),
+        "MATCH_INDEX_DIR": os.path.join(work_dir, "match-index"),
+        "JOB_STORE": "local",
+        "EXTRACTION_EXECUTOR": args.executor,
+        "MONGODB_DATABASE": f"benchmark-{int(time.time())}",
+    }
+    if args.mongo_uri:
+        defaults["uri"] = args.mongo_uri
+    else:
+        # Read by benchmarks.bench_app in server processes
+        defaults["BENCHMARK_MOCK_MONGO"] = "1"
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+async def drive(name: str, calls: list, concurrency: int, items_per_call: int = 1) -> dict:
+    """
+    Run the request coroutine factories in calls with at most concurrency in flight.
+    """
+    latencies, errors = [], 0
+    queue = iter(calls)
+
+    async def worker():
+        nonlocal errors
+        for call in queue:
+            start = time.perf_counter()
+            try:
+                response = await call()
+                ok = response.status_code < 400
+            except Exception as e:
+                print(f"{name}: request failed: {str(e)[:200]}")
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(calls),
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "throughput": round(len(calls) / elapsed, 2),
+        "items_per_sec": round(len(calls) * items_per_call / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def requirements(rng: random.Random, index: int) -> str:
+    return (f"{rng.choice(['Junior', 'Mid-level', 'Senior', 'Lead'])} {rng.choice(_TITLES)} #{index}, "
+            f"{rng.choice(_CITIES)}, {rng.randint(1, 12)}+ years, {', '.join(rng.sample(_SKILLS, 4))}")
+
+
+async def run(args) -> dict:
+    import httpx
+    import main
+
+    app = main.app
+    if not args.mongo_uri:
+        from mongomock_motor import AsyncMongoMockClient #type: ignore
+
+        app.mongodb_client = AsyncMongoMockClient()
+
+    corpus = generate_corpus(args.uploads * args.files_per_upload, args.docx_ratio)
+    batches = [corpus[i:i + args.files_per_upload] for i in range(0, len(corpus), args.files_per_upload)]
+    rng = random.Random(7)
+    jd_inputs = [requirements(rng, index) for index in range(args.jds)]
+    form = {"session_cookie": "benchmark"}
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+
+            def upload(batch):
+                files = [("files", (filename, content, content_type)) for filename, content_type, content in batch]
+                return lambda: client.post("/api/upload-files-process/", files=files, data=form)
+
+            results["upload"] = await drive("upload", [upload(batch) for batch in batches],
+                                            args.concurrency, args.files_per_upload)
+            results["upload_cached"] = await drive("upload_cached", [upload(batch) for batch in batches],
+                                                   args.concurrency, args.files_per_upload)
+
+            job_ids = []
+
+            def create_jd(information):
+                async def call():
+                    response = await client.post("/api/create-job-description/",
+                                                 data={"information": information, **form})
+                    if response.status_code == 200:
+                        job_ids.append(response.json()["job_description"]["_id"])
+                    return response
+                return call
+
+            results["create_jd"] = await drive("create_jd", [create_jd(text) for text in jd_inputs], args.concurrency)
+            results["create_jd_cached"] = await drive("create_jd_cached", [create_jd(text) for text in jd_inputs],
+                                                      args.concurrency)
+
+            if job_ids:
+                pdf_calls = [
+                    (lambda job_id: lambda: client.get(f"/api/get-job-description-pdf/{job_id}"))(job_ids[i % len(job_ids)])
+                    for i in range(args.pdfs)
+                ]
+                results["jd_pdf"] = await drive("jd_pdf", pdf_calls, args.concurrency)
+
+            stats = (await client.get("/api/pipeline-stats/")).json()
+            results["_pipeline"] = {"stages": stats["stages"]["stages"], "llm_calls": (stats["llm"] or {}).get("calls")}
+            results["_process"] = {"peak_rss_mb": peak_rss_mb(), "workers_peak_rss_mb": workers_peak_rss_mb()}
+    return results
+
+
+def check(results: dict, thresholds: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare results with absolute thresholds and a baseline run.
+
+    Returns:
+        list: Descriptions of the limits that were broken
+    """
+    failures = []
+    thresholds = thresholds or {}
+    for scenario, limits in thresholds.get("scenarios", {}).items():
+        result = results.get(scenario)
+        if result is None:
+            continue
+        if result["errors"] > limits.get("max_errors", 0):
+            failures.append(f"{scenario}: {result['errors']} errors")
+        if "min_throughput" in limits and result["throughput"] < limits["min_throughput"]:
+            failures.append(f"{scenario}: throughput {result['throughput']}/s < {limits['min_throughput']}/s")
+        for q in ("p50_ms", "p95_ms", "p99_ms"):
+            if f"max_{q}" in limits and result[q] > limits[f"max_{q}"]:
+                failures.append(f"{scenario}: {q} {result[q]} > {limits[f'max_{q}']}")
+    for name in ("peak_rss_mb", "workers_peak_rss_mb"):
+        limit = thresholds.get(f"max_{name}")
+        if limit is not None and results["_process"][name] > limit:
+            failures.append(f"{name} {results['_process'][name]} > {limit}")
+
+    for scenario, old in (baseline or {}).items():
+        new = results.get(scenario)
+        if scenario.startswith("_") or new is None:
+            continue
+        if new["throughput"] < old["throughput"] * (1 - tolerance):
+            failures.append(f"{scenario}: throughput {new['throughput']}/s regressed from {old['throughput']}/s")
+        if new["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            failures.append(f"{scenario}: p95 {new['p95_ms']} ms regressed from {old['p95_ms']} ms")
+        if new["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+            failures.append(f"{scenario}: peak RSS {new['peak_rss_mb']} MB regressed from {old['peak_rss_mb']} MB")
+    return failures
+
+
+def load_json(path: str):
+    if not path:
+        return None
+    with open(path) as source:
+        return json.load(source)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--files-per-upload", type=int, default=5)
+    parser.add_argument("--docx-ratio", type=float, default=0.3)
+    parser.add_argument("--jds", type=int, default=40)
+    parser.add_argument("--pdfs", type=int, default=80)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--executor", default="process", choices=["process", "thread"])
+    parser.add_argument("--mongo-uri")
+    parser.add_argument("--thresholds")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="hr-first-benchmark-") as work_dir:
+        configure_environment(args, work_dir)
+        results = asyncio.run(run(args))
+
+    for scenario, result in results.items():
+        if not scenario.startswith("_"):
+            print(f"{scenario:17s} {json.dumps(result)}")
+    print(f"{'process':17s} {json.dumps(results['_process'])}")
+    print(f"{'stages':17s} {json.dumps(results['_pipeline'])}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    failures = check(results, load_json(args.thresholds), load_json(args.baseline), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,77 @@
+"""
+Exercise the LLM scheduler against the fake model.
+
+Sends concurrent CV extraction calls to a fake model that injects rate
+limits, server errors and slow responses, once bare and once through the scheduler, and
+reports success rate, latency percentiles and the scheduler metrics.
+
+Usage (from the backend directory):
+    python -m benchmarks.llm_scheduler [--calls 200] [--concurrency 32] [--rate-limit-rate 0.1] [--slow-rate 0.05] [--hedge-after 0.3]
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from app.schemas.file_uploads import CVUserData
+from app.utils.fake_llm import FakeStructuredLLM
+from app.utils.llm_scheduler import LLMScheduler, CircuitBreaker, ScheduledLLM
+
+
+async def run(llm, calls: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def call(i):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await llm.ainvoke(f"Extract the CV data: candidate {i}")
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(calls)))
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "succeeded": len(latencies),
+        "failed": failures,
+        "seconds": round(time.perf_counter() - start, 2),
+        "p50_ms": round(quantiles[49] * 1000) if latencies else None,
+        "p99_ms": round(quantiles[98] * 1000) if latencies else None,
+    }
+
+
+async def main(args):
+    fake = FakeStructuredLLM(CVUserData, latency=args.latency, jitter=args.jitter,
+                             rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate,
+                             slow_rate=args.slow_rate)
+    print(f"bare:      {await run(fake, args.calls, args.concurrency)}")
+
+    scheduler = LLMScheduler(
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+        base_delay=0.05,
+        max_delay=1.0,
+        timeout=5.0,
+        hedge_after=args.hedge_after,
+        breaker=CircuitBreaker(failure_threshold=20, reset_timeout=1.0),
+    )
+    print(f"scheduled: {await run(ScheduledLLM(fake, scheduler, 'cv'), args.calls, args.concurrency)}")
+    print(f"metrics:   {scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.09)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--hedge-after", type=float, default=0)
+    parser.add_argument("--requests-per-minute", type=float, default=6000)
+    parser.add_argument("--tokens-per-minute", type=float, default=2000000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Load test for the shared MongoDB client.
+
+Runs concurrent insert + find_one round trips through the shared client and,
+for comparison, through a new client per operation (what get_client used to
+do). Reports throughput, latency percentiles and connection pool statistics.
+
+Usage (from the backend directory):
+    python -m benchmarks.mongo_pool --uri mongodb://localhost:27017 [--concurrency 64] [--operations 5000]
+    python -m benchmarks.mongo_pool --mock    # in-memory stand-in, no pool statistics
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from app.database.get_client import get_mongo_client, close_clients, client_options, pool_stats
+
+
+def percentile(latencies: list, q: float) -> float:
+    return statistics.quantiles(latencies, n=100)[int(q) - 1] if len(latencies) > 1 else latencies[0]
+
+
+async def run(get_collection, concurrency: int, operations: int) -> dict:
+    latencies = []
+    queue = iter(range(operations))
+
+    async def worker():
+        for i in queue:
+            start = time.perf_counter()
+            collection = get_collection()
+            result = await collection.insert_one({"n": i, "payload": "x" * 256})
+            await collection.find_one({"_id": result.inserted_id})
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "ops_per_sec": round(operations / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def main(args):
+    if args.mock:
+        from mongomock_motor import AsyncMongoMockClient #type: ignore
+
+        client = AsyncMongoMockClient()
+        modes = {"shared": lambda: client["benchmark"]["mongo-pool"]}
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient #type: ignore
+
+        per_call_clients = []
+
+        def per_call():
+            per_call_clients.append(AsyncIOMotorClient(args.uri, **client_options()))
+            return per_call_clients[-1]["benchmark"]["mongo-pool"]
+
+        modes = {
+            "shared": lambda: get_mongo_client(args.uri)["benchmark"]["mongo-pool"],
+            "per-call": per_call,
+        }
+
+    try:
+        for mode, get_collection in modes.items():
+            operations = args.operations if mode == "shared" else max(args.operations // 10, 1)
+            print(f"{mode:9s} {operations} ops: {await run(get_collection, args.concurrency, operations)}")
+            if not args.mock:
+                # Cumulative over the modes run so far
+                print(f"{'':9s} pool: {pool_stats.stats()}")
+            if mode == "per-call":
+                for client in per_call_clients:
+                    client.close()
+        await modes["shared"]().drop()
+    finally:
+        close_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--mock", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--operations", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
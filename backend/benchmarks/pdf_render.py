@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for job description PDF rendering.
+
+Compares building the ReportLab styles on every render (the previous
+behaviour, a new JDRenderer per call) with the shared renderer.
+
+Usage (from the backend directory):
+    python -m benchmarks.pdf_render [--renders 500]
+"""
+import time
+import argparse
+from app.utils.pdf_gen import JDRenderer, get_renderer
+
+SAMPLE_JD = {
+    "job_title": "Senior Backend Engineer",
+    "company_name": "Acme",
+    "job_location": "Remote",
+    "job_type": "Full-time",
+    "salary": "$150k - $180k",
+    "job_description": "Build and operate the services behind our hiring platform.",
+    "job_responsibilities": "Design APIs\nOwn services in production\nReview code\nMentor engineers",
+    "job_skills": "Python\nFastAPI\nMongoDB\nAzure",
+    "job_education": "BSc in Computer Science or equivalent",
+    "job_experience": "5+ years",
+    "company_benefits": "Health insurance\nLearning budget",
+    "company_description": "Acme builds tools for recruiters.",
+    "company_industry": "Software",
+    "company_website": "https://acme.example",
+}
+
+
+def bench(render, renders: int) -> float:
+    """
+    Returns:
+        float: Renders per second
+    """
+    render(SAMPLE_JD)  # warm up
+    start = time.perf_counter()
+    for _ in range(renders):
+        render(SAMPLE_JD)
+    return renders / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--renders", type=int, default=500)
+    args = parser.parse_args()
+
+    before = bench(lambda job_data: JDRenderer().render(job_data), args.renders)
+    after = bench(get_renderer().render, args.renders)
+    print(f"styles per render: {before:8.1f} renders/sec")
+    print(f"shared renderer:   {after:8.1f} renders/sec ({after / before:.2f}x)")
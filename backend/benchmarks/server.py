@@ -0,0 +1,130 @@
+"""
+Load test of the production server (serve.py) against the development mode.
+
+Starts the app over real TCP in two modes, one after the other:
+
+    dev         python -m uvicorn ... --reload, what `python main.py` runs
+                (one process plus the file watcher)
+    production  python serve.py (WEB_WORKERS processes, uvloop/httptools
+                when installed, tuned keep-alive)
+
+and drives the same load against each with keep-alive connections:
+GET /ready (framework overhead), POST /api/create-job-description/ (fake
+LLM) and POST /api/upload-files-process/ (synthetic CVs). The app uses the
+same offline stand-ins as benchmarks.endpoints. With mongomock every worker
+has its own in-memory database, which is fine for these write-only
+scenarios.
+
+Usage (from the backend directory):
+    python -m benchmarks.server [--workers 4] [--concurrency 32] [--requests 400] [--uploads 40]
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import httpx
+from serve import available_cpus
+from benchmarks.corpus import generate_corpus
+from benchmarks.endpoints import configure_environment, drive, requirements
+
+APP = "benchmarks.bench_app:app"
+
+
+def start_server(mode: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, PORT=str(port), APP_MODULE=APP)
+    if mode == "dev":
+        command = [sys.executable, "-m", "uvicorn", APP, "--port", str(port), "--reload"]
+    else:
+        env["WEB_WORKERS"] = str(workers)
+        command = [sys.executable, "serve.py"]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+
+async def load(port: int, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+        await wait_ready(client)
+        form = {"session_cookie": "benchmark"}
+        rng = random.Random(port)
+        corpus = generate_corpus(args.uploads * args.files_per_upload, seed=port)
+        batches = [corpus[i:i + args.files_per_upload] for i in range(0, len(corpus), args.files_per_upload)]
+
+        def upload(batch):
+            files = [("files", (filename, content, content_type)) for filename, content_type, content in batch]
+            return lambda: client.post("/api/upload-files-process/", files=files, data=form)
+
+        def create_jd(information):
+            return lambda: client.post("/api/create-job-description/", data={"information": information, **form})
+
+        # Warm every worker's clients before measuring
+        await drive("warm-up", [create_jd(requirements(rng, -i)) for i in range(args.concurrency)], args.concurrency)
+        return {
+            "ready": await drive("ready", [lambda: client.get("/ready")] * args.requests, args.concurrency),
+            "create_jd": await drive("create_jd", [create_jd(requirements(rng, i)) for i in range(args.requests)],
+                                     args.concurrency),
+            "upload": await drive("upload", [upload(batch) for batch in batches], args.concurrency,
+                                  args.files_per_upload),
+        }
+
+
+def stop_server(process: subprocess.Popen):
+    # SIGTERM to the whole group, as a container runtime would
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=90)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def main(args):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="hr-first-server-benchmark-") as work_dir:
+        configure_environment(argparse.Namespace(llm_latency=args.llm_latency, executor="process", mongo_uri=None),
+                              work_dir)
+        for index, mode in enumerate(("dev", "production")):
+            port = args.port + index
+            process = start_server(mode, port, args.workers)
+            try:
+                results[mode] = asyncio.run(load(port, args))
+            finally:
+                stop_server(process)
+            for scenario, result in results[mode].items():
+                # The RSS measured by drive() is the load generator's own
+                result.pop("peak_rss_mb")
+                print(f"{mode:10s} {scenario:9s} {json.dumps(result)}")
+
+    for scenario in results["dev"]:
+        dev, production = results["dev"][scenario], results["production"][scenario]
+        print(f"{scenario:9s} throughput x{production['throughput'] / dev['throughput']:.2f}, "
+              f"p95 {dev['p95_ms']} -> {production['p95_ms']} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=available_cpus())
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--uploads", type=int, default=40)
+    parser.add_argument("--files-per-upload", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--port", type=int, default=8701)
+    main(parser.parse_args())
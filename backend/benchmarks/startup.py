@@ -0,0 +1,52 @@
+"""
+Startup benchmark based on `python -X importtime`.
+
+Imports main in fresh interpreters and reports the median wall time of the
+import and the modules with the largest cumulative import time.
+
+Usage (from the backend directory):
+    python -m benchmarks.startup [--runs 5] [--top 15]
+"""
+import sys
+import argparse
+import statistics
+import subprocess
+
+
+def import_main() -> tuple:
+    """
+    Import main in a fresh interpreter.
+
+    Returns:
+        tuple: (wall seconds, {module: cumulative microseconds})
+    """
+    code = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|", 2)
+        if cumulative.strip().isdigit():
+            modules[module.strip()] = int(cumulative)
+    return float(result.stdout.strip().splitlines()[-1]), modules
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [import_main() for _ in range(args.runs)]
+    print(f"import main: {statistics.median(wall for wall, _ in runs) * 1000:.0f} ms (median of {args.runs})")
+
+    # -X importtime itself adds overhead, so the breakdown is relative
+    _, modules = runs[-1]
+    for module, cumulative in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{cumulative / 1000:10.1f} ms  {module}")
+    heavy = [name for name in ("langchain_openai", "openai", "reportlab", "pypdf", "motor", "azure.storage.blob") if name in modules]
+    print(f"heavy client libraries imported at startup: {', '.join(heavy) or 'none'}")
@@ -1,26 +1,128 @@
-from fastapi import FastAPI, Request, APIRouter
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import file_uploads
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from motor.motor_asyncio import AsyncIOMotorClient # type: ignore
-from azure.storage.blob import BlobServiceClient #type: ignore
-from langchain_openai import ChatOpenAI
-from app.schemas.file_uploads import CVUserData
+from app.schemas.file_uploads import CVUserData, CVUserDataBatch
 from app.schemas.jd import JD
-from app.prompts.prompts import CV_DATA_PROMPT,JD_PROMPT
+from app.prompts.prompts import CV_DATA_PROMPT,CV_BATCH_DATA_PROMPT,JD_PROMPT
+from app.utils.blob_storage import create_blob_storage
+from app.utils.extraction import create_extraction_executor
+from app.utils.cache import TieredCache, content_version
+from app.utils.cv_batcher import create_cv_batcher
+from app.utils.upload_jobs import create_upload_job_queue
+from app.database.write_buffer import create_write_buffers
+from app.database.cv_documents import ensure_cv_indexes
+from app.utils.matching import create_cv_matcher
+from app.utils.cv_text import create_cv_text_preparer
+from app.utils.pdf_cache import create_pdf_cache
+from app.utils.jd_cache import create_jd_cache
+from app.utils.jd_stream import create_streaming_jd_llm
+from app.utils.lazy_app import LazyFastAPI
+from app.utils.llm_scheduler import create_llm_scheduler, ScheduledLLM
+from app.utils.settings import get_settings
+from app.utils.upload_limits import BodySizeLimitMiddleware
+from app.utils.metrics import get_metrics, render_stats, create_multiprocess_metrics
 import os
-from dotenv import load_dotenv
+import asyncio
+from contextlib import asynccontextmanager
 
-# Load environment variables
-load_dotenv()
+# Load environment variables once
+settings = get_settings()
+# Set when serve.py runs several workers, so /metrics covers all of them
+multiprocess_metrics = create_multiprocess_metrics()
 
-# Get MongoDB connection string from environment variables
-MONGODB_URL = os.getenv("uri")
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Startup and shutdown of one server process. Each worker process runs its
+    own lifespan, so clients, pools and job workers are never shared across a fork.
+    """
+    await startup_db_client()
+    try:
+        yield
+    finally:
+        await shutdown_db_client()
 
-app = FastAPI(title="HR First.AI", description="Backend for HR First.AI")
-app.mongodb_client = None
-app.mongodb = None
+app = LazyFastAPI(title="HR First.AI", description="Backend for HR First.AI", lifespan=lifespan)
+app.warm_up_task = None
+app.metrics_task = None
+
+# Clients are built on first use (see LazyFastAPI); heavy client libraries are
+# imported inside the factories so they do not slow down process start
+def _mongodb_client(app):
+    from app.database.get_client import get_mongo_client
+    return get_mongo_client(settings.mongodb_url)
+
+def _llm(app):
+    if settings.llm_backend == "fake":
+        from app.utils.fake_llm import create_fake_chat_model
+        return create_fake_chat_model()
+    if settings.llm_backend != "openai":
+        raise ValueError(f"Unknown LLM_BACKEND: {settings.llm_backend}")
+    from langchain_openai import ChatOpenAI
+    if settings.openai_api_key:
+        os.environ["OPENAI_API_KEY"]=settings.openai_api_key
+    # Retries are handled by the LLM scheduler
+    return ChatOpenAI(model=settings.llm_model,temperature=0,max_retries=0)
+
+def _cv_cache(app):
+    # Content-addressed cache of CV extraction results, versioned by the single and
+    # batch prompts (both store results here), model and the prompt text limit
+    # (CV_PROMPT_MAX_TOKENS and the truncation rules)
+    return TieredCache(
+        app.mongodb["cv-cache"],
+        version=content_version(
+            CV_DATA_PROMPT,
+            CV_BATCH_DATA_PROMPT,
+            settings.llm_model if settings.llm_backend == "openai" else settings.llm_backend,
+            app.cv_text.version
+        ),
+        max_size=settings.cv_cache_size,
+        ttl_seconds=settings.cv_cache_ttl_seconds,
+    )
+
+def _jd_cache(app):
+    # Generated job descriptions by normalized requirements, versioned by prompt and model
+    return create_jd_cache(
+        app.mongodb["jd-cache"],
+        version=content_version(JD_PROMPT, settings.llm_model if settings.llm_backend == "openai" else settings.llm_backend),
+    )
+
+def _pdf_cache(app):
+    # Renders share the extraction process pool; ReportLab would serialize on the GIL in threads
+    return create_pdf_cache(app.blob_storage, app.extraction_executor)
+
+app.provide("mongodb_client", _mongodb_client)
+app.provide("mongodb", lambda app: app.mongodb_client[settings.mongodb_database])
+app.provide("write_buffers", lambda app: create_write_buffers(app.mongodb))
+app.provide("blob_storage", lambda app: create_blob_storage())
+app.provide("pdf_cache", _pdf_cache)
+app.provide("llm", _llm)
+app.provide("llm_jd", _llm)
+# Every structured-output call goes through one shared scheduler (rate limits, retries, circuit breaker)
+app.provide("llm_scheduler", lambda app: create_llm_scheduler())
+app.provide("structured_llm", lambda app: ScheduledLLM(app.llm.with_structured_output(CVUserData), app.llm_scheduler, "cv"))
+app.provide("structured_llm_batch", lambda app: ScheduledLLM(app.llm.with_structured_output(CVUserDataBatch), app.llm_scheduler, "cv_batch"))
+app.provide("structured_llm_jd", lambda app: ScheduledLLM(app.llm_jd.with_structured_output(JD), app.llm_scheduler, "jd"))
+app.provide("streaming_llm_jd", lambda app: ScheduledLLM(create_streaming_jd_llm(app.llm_jd), app.llm_scheduler, "jd_stream"))
+app.provide("cv_batcher", lambda app: create_cv_batcher(
+    app.structured_llm, app.structured_llm_batch, CV_DATA_PROMPT, CV_BATCH_DATA_PROMPT, app.llm_semaphore
+))
+app.provide("extraction_executor", lambda app: create_extraction_executor())
+app.provide("cv_cache", _cv_cache)
+app.provide("jd_cache", _jd_cache)
+# The blob storage is only needed to rebuild indexes of CVs with offloaded text
+app.provide("cv_matcher", lambda app: create_cv_matcher(app.blob_storage if settings.cv_text_storage == "blob" else None))
+app.provide("cv_text", lambda app: create_cv_text_preparer(settings.llm_model))
+app.provide("upload_jobs", create_upload_job_queue)
+
+app.CV_DATA_PROMPT=CV_DATA_PROMPT
+app.JD_PROMPT=JD_PROMPT
+
+# Reject oversized request bodies before they are parsed
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=settings.max_upload_request_bytes)
 
 # Configure CORS
 app.add_middleware(
@@ -37,31 +139,121 @@ templates = Jinja2Templates(directory="templates")
 # Serve templates
 app.mount("/templates", StaticFiles(directory="templates"), name="templates")
 
-# Database connection events
-@app.on_event("startup") 
+async def warm_up():
+    """
+    Prepare the PDF renderer, the database and the clients listed in
+    PRELOAD_CLIENTS after startup, without delaying it. Each step runs on its
+    own, so one failing step (e.g. the blob client) does not skip the others.
+    """
+    steps = (
+        ("PDF renderer", lambda: app.pdf_cache.prepare()),
+        ("upload job store", lambda: app.upload_jobs.prepare()),
+        ("CV indexes", lambda: ensure_cv_indexes(app.mongodb["cv-data"])),
+        ("CV cache", lambda: app.cv_cache.prepare()),
+        ("JD cache", lambda: app.jd_cache.prepare()),
+    )
+    for step, prepare in steps:
+        try:
+            await prepare()
+            print(f"{step} is initialized")
+        except Exception as e:
+            print(f"Warm-up of the {step} failed: {str(e)}")
+    for name in settings.preload_clients:
+        try:
+            getattr(app, name)
+        except Exception as e:
+            print(f"Warm-up of the {name} client failed: {str(e)}")
+        # Let requests run between clients
+        await asyncio.sleep(0)
+
+# Database connection events, run by the lifespan handler
 async def startup_db_client():
-    app.mongodb_client = AsyncIOMotorClient(MONGODB_URL)
-    app.mongodb = app.mongodb_client["hr-first"]
-    print("Connected to MongoDB")
-    CONNECTION_STRING=os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-    CONTAINER_NAME=os.getenv("CONTAINER_NAME")
-    app.blob_container_client = BlobServiceClient.from_connection_string(CONNECTION_STRING).get_container_client(CONTAINER_NAME)
-    print("Connected to Blob Storage")
-    os.environ["OPENAI_API_KEY"]=os.getenv("OPENAI_API_KEY")
-    llm=ChatOpenAI(model="gpt-4o-mini",temperature=0)
-    llm_jd=ChatOpenAI(model="gpt-4o-mini",temperature=0) 
-    app.structured_llm=llm.with_structured_output(CVUserData)
-    app.structured_llm_jd=llm_jd.with_structured_output(JD)
-    print("GPT4o mini and GPT4o are initialized")
-    app.CV_DATA_PROMPT=CV_DATA_PROMPT
-    app.JD_PROMPT=JD_PROMPT
-    print("Prompts are initialized")
-
-@app.on_event("shutdown")
+    # Per-stage concurrency limits shared by every upload request
+    app.blob_semaphore=asyncio.Semaphore(settings.blob_upload_concurrency)
+    app.parse_semaphore=asyncio.Semaphore(settings.parse_concurrency)
+    app.llm_semaphore=asyncio.Semaphore(settings.llm_concurrency)
+    print("Pipeline concurrency limits are initialized")
+    # Workers start right away to pick up jobs left by a previous process; they
+    # retry on their own while MongoDB is unreachable, so startup never waits for it
+    try:
+        await app.upload_jobs.start()
+        print("Upload job workers are started")
+    except Exception as e:
+        print(f"Failed to start upload job workers: {str(e)}")
+    app.warm_up_task = asyncio.create_task(warm_up())
+    if multiprocess_metrics:
+        app.metrics_task = asyncio.create_task(write_metrics())
+
 async def shutdown_db_client():
-    if app.mongodb_client:
-        app.mongodb_client.close()
+    if app.warm_up_task:
+        app.warm_up_task.cancel()
+    if app.metrics_task:
+        app.metrics_task.cancel()
+        # Keep the counters of this worker in the totals after it exits
+        await asyncio.to_thread(multiprocess_metrics.write, get_metrics().state(), _metrics_stats())
+    if app.is_warm("upload_jobs"):
+        # Let running upload jobs finish; unfinished ones are picked up again once their lease expires
+        await app.upload_jobs.stop(drain_timeout=settings.job_drain_seconds)
+        print("Upload job workers stopped")
+    if app.is_warm("write_buffers"):
+        await app.write_buffers.close()
+        print("Write buffers drained")
+    if app.is_warm("mongodb_client"):
+        from app.database.get_client import close_clients
+        close_clients()
         print("MongoDB connection closed")
+    if app.is_warm("blob_storage"):
+        await app.blob_storage.close()
+        print("Blob Storage connection closed")
+    if app.is_warm("extraction_executor"):
+        app.extraction_executor.shutdown()
+        print("Extraction executor shut down")
+
+# Readiness probe
+@app.get("/ready")
+async def ready():
+    """
+    Report readiness and which clients have been built so far.
+    """
+    return {
+        "status": "ready",
+        "warm_up_done": app.warm_up_task is not None and app.warm_up_task.done(),
+        "clients": app.warm_clients(),
+    }
+
+def _metrics_stats() -> dict:
+    stats = file_uploads._pipeline_stats(app)
+    # The stage histograms are rendered from the metrics themselves
+    stats.pop("stages")
+    return stats
+
+async def write_metrics():
+    """
+    Share the metrics of this worker with the other workers of the server.
+    """
+    while True:
+        await asyncio.sleep(settings.metrics_write_seconds)
+        try:
+            await asyncio.to_thread(multiprocess_metrics.write, get_metrics().state(), _metrics_stats())
+        except Exception as e:
+            print(f"Failed to write metrics: {str(e)}")
+
+# Prometheus scrape endpoint
+@app.get("/metrics")
+async def metrics():
+    """
+    Export the per-stage histograms and the pipeline statistics in the
+    Prometheus text format.
+
+    Under serve.py with several workers, histograms and counters are summed
+    over all workers and the pipeline statistics get a worker label (see
+    MultiProcessMetrics).
+    """
+    if multiprocess_metrics:
+        lines = await asyncio.to_thread(multiprocess_metrics.render, get_metrics().state(), _metrics_stats(), "hrfirst")
+    else:
+        lines = get_metrics().render() + render_stats("hrfirst", _metrics_stats())
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
 # Home route 
 @app.get("/")
@@ -72,5 +264,6 @@ async def home(request: Request):
 app.include_router(file_uploads.app, prefix="/api")
 
 if __name__ == "__main__":
+    # Development server with auto-reload; use serve.py in production
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Rewrite legacy cv-data documents to the compact layout.
+
+Usage (from the backend directory):
+    python -m scripts.migrate_cv_data [--batch-size 500] [--dry-run]
+"""
+import asyncio
+import argparse
+from app.database.get_client import get_mongo_client, close_clients
+from app.database.cv_documents import migrate_cv_documents
+from app.utils.blob_storage import create_blob_storage
+from app.utils.settings import get_settings
+
+
+async def main(batch_size: int, dry_run: bool):
+    client = get_mongo_client()
+    blob_storage = create_blob_storage() if get_settings().cv_text_storage == "blob" else None
+    try:
+        collection = client[get_settings().mongodb_database]["cv-data"]
+        count = await migrate_cv_documents(collection, batch_size=batch_size, blob_storage=blob_storage, dry_run=dry_run)
+        print(f"{'Would migrate' if dry_run else 'Migrated'} {count} cv-data documents")
+    finally:
+        close_clients()
+        if blob_storage:
+            await blob_storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run))
@@ -0,0 +1,105 @@
+"""
+Production entry point: a multi-process uvicorn server.
+
+Runs WEB_WORKERS processes (default: the CPUs available to the container)
+under uvicorn's supervisor, which restarts workers that die. Every worker
+imports the app and runs its own lifespan, so MongoDB clients, blob storage
+sessions, extraction pools and upload job workers are created per process.
+uvloop and httptools are used when installed.
+
+On SIGTERM each worker stops accepting connections, lets in-flight
+requests finish for up to WEB_GRACEFUL_TIMEOUT seconds, then runs the
+lifespan shutdown, which drains running upload jobs for up to
+JOB_DRAIN_SECONDS and flushes the write buffers.
+
+All workers share one port, so a /metrics scrape reaches one of them at
+random. With more than one worker, each worker writes its metrics to
+METRICS_DIR (default: a fresh temporary directory) every
+METRICS_WRITE_SECONDS, and the scraped worker serves the sum over all of
+them: histograms and counters are totals of the server (including restarted
+workers), the pipeline statistics are per live worker with a worker label.
+/api/pipeline-stats/ still reports the worker that answers the request.
+
+Usage (from the backend directory):
+    python serve.py
+
+main.py keeps the single-process development server with auto-reload.
+"""
+import os
+import math
+import tempfile
+import uvicorn
+from dotenv import load_dotenv
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may use: the affinity mask, capped by a cgroup v2 CPU quota.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def server_options() -> dict:
+    """
+    uvicorn options from the WEB_* env variables.
+    """
+    limit_concurrency = os.getenv("WEB_LIMIT_CONCURRENCY")
+    return {
+        "host": os.getenv("HOST", "0.0.0.0"),
+        "port": int(os.getenv("PORT", "8000")),
+        "workers": int(os.getenv("WEB_WORKERS") or available_cpus()),
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        # Longer than the idle timeout of the load balancer, so it never reuses a closed connection
+        "timeout_keep_alive": int(os.getenv("WEB_KEEP_ALIVE", "75")),
+        # Per worker; requests above it get 503 instead of queueing without bound
+        "limit_concurrency": int(limit_concurrency) if limit_concurrency else None,
+        "backlog": int(os.getenv("WEB_BACKLOG", "2048")),
+        "timeout_graceful_shutdown": int(os.getenv("WEB_GRACEFUL_TIMEOUT", "60")),
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        "access_log": os.getenv("WEB_ACCESS_LOG", "false").lower() in ("1", "true", "yes"),
+        "log_level": os.getenv("WEB_LOG_LEVEL", "info"),
+    }
+
+
+def main():
+    load_dotenv()
+    options = server_options()
+    # Each worker has its own extraction process pool; share the CPUs between
+    # them instead of starting a full pool per worker
+    if options["workers"] > 1 and not os.getenv("EXTRACTION_WORKERS"):
+        os.environ["EXTRACTION_WORKERS"] = str(max(1, available_cpus() // options["workers"]))
+    if options["workers"] > 1:
+        # Workers aggregate their metrics through this directory; files of a previous run are stale
+        metrics_dir = os.getenv("METRICS_DIR") or tempfile.mkdtemp(prefix="hr-first-metrics-")
+        os.environ["METRICS_DIR"] = metrics_dir
+        os.makedirs(metrics_dir, exist_ok=True)
+        for filename in os.listdir(metrics_dir):
+            if filename.endswith((".json", ".json.tmp")):
+                os.remove(os.path.join(metrics_dir, filename))
+    print(f"Starting {options['workers']} workers ({options['loop']}, {options['http']})")
+    uvicorn.run(os.getenv("APP_MODULE", "main:app"), **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import asyncio
+from pymongo.errors import OperationFailure #type: ignore
+from mongomock_motor import AsyncMongoMockClient #type: ignore
+from app.utils.cache import TieredCache, content_version
+
+
+class IndexConflictCollection:
+    """
+    Collection whose TTL index already exists with another expireAfterSeconds.
+    """
+
+    def __init__(self, collection, code: int = 85):
+        self.collection = collection
+        self.name = collection.name
+        self.code = code
+        self.commands = []
+        self.database = self
+
+    async def create_index(self, *args, **kwargs):
+        raise OperationFailure("Index with name: created_at_1 already exists with different options", code=self.code)
+
+    async def command(self, command):
+        self.commands.append(command)
+        return {"ok": 1}
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+def test_content_version_changes_with_any_part():
+    assert content_version("prompt", "model") == content_version("prompt", "model")
+    assert content_version("prompt", "model") != content_version("prompt", "other-model")
+    assert content_version("ab", "c") != content_version("a", "bc")
+
+
+def test_get_falls_back_to_mongo_and_fills_memory():
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"]["cache"]
+        await TieredCache(collection, version="v1").set("key", {"answer": 42})
+        cache = TieredCache(collection, version="v1")
+        return cache, await cache.get("key"), await cache.get("key"), await cache.get("missing")
+
+    cache, first, second, missing = asyncio.run(scenario())
+    assert first == second == {"answer": 42} and missing is None
+    assert cache.memory.stats()["size"] == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_prepare_removes_other_versions():
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"]["cache"]
+        await TieredCache(collection, version="v1").set("old", {"answer": 1})
+        await TieredCache(collection, version="v2").set("new", {"answer": 2})
+        await TieredCache(collection, version="v2").prepare()
+        return [document["_id"] async for document in collection.find({})]
+
+    assert asyncio.run(scenario()) == ["new"]
+
+
+def test_changed_ttl_is_applied_with_collmod_and_stale_entries_removed():
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"]["cache"]
+        await TieredCache(collection, version="v1").set("old", {"answer": 1})
+        conflicting = IndexConflictCollection(collection)
+        await TieredCache(conflicting, version="v2", ttl_seconds=60).prepare()
+        return conflicting.commands, await collection.count_documents({})
+
+    commands, remaining = asyncio.run(scenario())
+    assert commands == [{
+        "collMod": "cache",
+        "index": {"keyPattern": {"created_at": 1}, "expireAfterSeconds": 60},
+    }]
+    assert remaining == 0
+
+
+def test_index_errors_do_not_skip_invalidation():
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"]["cache"]
+        await TieredCache(collection, version="v1").set("old", {"answer": 1})
+        failing = IndexConflictCollection(collection, code=13)
+        await TieredCache(failing, version="v2").prepare()
+        return failing.commands, await collection.count_documents({})
+
+    commands, remaining = asyncio.run(scenario())
+    assert commands == [] and remaining == 0
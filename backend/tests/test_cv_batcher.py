@@ -0,0 +1,124 @@
+import re
+import asyncio
+import pytest
+from app.schemas.file_uploads import CVBatchItem, CVUserData, CVUserDataBatch
+from app.utils.cv_batcher import CVBatchExtractor
+
+CV_PROMPT = "Extract this CV:\n{cv_data}"
+BATCH_PROMPT = "Extract these CVs:\n{cvs}"
+CV_RE = re.compile(r'<cv id="(\d+)">\n(.*?)\n</cv>', re.DOTALL)
+
+
+def cv_data(name: str) -> dict:
+    return dict(name=name, email=f"{name}@test.com", phone="", address="", education="",
+                experience="", skills="", linkedin_url="")
+
+
+class StructuredLLM:
+    """
+    Answers single-CV prompts with the CV text as the name, failing for the texts in fail.
+    """
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        text = prompt[len(CV_PROMPT.format(cv_data="")):]
+        if text in self.fail:
+            raise ValueError(f"Could not parse {text}")
+        return CVUserData(**cv_data(text))
+
+
+class BatchLLM:
+    """
+    Answers batch prompts with one item per <cv> block, in reverse order.
+    answer(blocks) can rewrite the (document_id, text) pairs, an exception is raised.
+    """
+
+    def __init__(self, answer=None, error=None):
+        self.answer = answer or (lambda blocks: blocks)
+        self.error = error
+        self.batches = []
+
+    async def ainvoke(self, prompt):
+        blocks = CV_RE.findall(prompt)
+        self.batches.append([text for _, text in blocks])
+        if self.error:
+            raise self.error
+        return CVUserDataBatch(cvs=[CVBatchItem(document_id=document_id, **cv_data(text))
+                                    for document_id, text in reversed(self.answer(blocks))])
+
+
+def extractor(single=None, batch=None, **kwargs) -> CVBatchExtractor:
+    return CVBatchExtractor(single or StructuredLLM(), batch or BatchLLM(), CV_PROMPT, BATCH_PROMPT, **kwargs)
+
+
+def extract_all(batcher: CVBatchExtractor, texts: list) -> list:
+    async def scenario():
+        return await asyncio.gather(*(batcher.extract(text) for text in texts), return_exceptions=True)
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_cvs_share_one_batch_call():
+    single, batch = StructuredLLM(), BatchLLM()
+    batcher = extractor(single, batch)
+    results = extract_all(batcher, ["alice", "bob", "carol"])
+
+    assert [result.name for result in results] == ["alice", "bob", "carol"]
+    assert batch.batches == [["alice", "bob", "carol"]] and single.prompts == []
+    assert batcher.stats() == {"batch_calls": 1, "batched_cvs": 3, "single_calls": 0, "fallbacks": 0, "pending": 0}
+
+
+def test_batches_are_split_by_size_and_tokens():
+    batch = BatchLLM()
+    extract_all(extractor(batch=batch, max_batch_size=2), ["a", "b", "c", "d"])
+    assert batch.batches == [["a", "b"], ["c", "d"]]
+
+    batch = BatchLLM()
+    extract_all(extractor(batch=batch, max_batch_tokens=60), ["a" * 100, "b" * 100, "c" * 100])
+    assert batch.batches == [["a" * 100, "b" * 100]]
+
+
+def test_long_cv_is_extracted_on_its_own():
+    single, batch = StructuredLLM(), BatchLLM()
+    results = extract_all(extractor(single, batch, max_cv_tokens=10), ["x" * 100])
+    assert results[0].name == "x" * 100
+    assert len(single.prompts) == 1 and batch.batches == []
+
+
+def test_mismatched_batch_response_falls_back_for_missing_and_duplicate_ids():
+    # Drops "bob", answers "carol" twice and adds an id that was never sent
+    def answer(blocks):
+        return [blocks[0], blocks[2], blocks[2], ("7", "mallory")]
+
+    single = StructuredLLM()
+    batcher = extractor(single, BatchLLM(answer))
+    results = extract_all(batcher, ["alice", "bob", "carol"])
+
+    assert [result.name for result in results] == ["alice", "bob", "carol"]
+    assert sorted(single.prompts) == [CV_PROMPT.format(cv_data="bob"), CV_PROMPT.format(cv_data="carol")]
+    assert batcher.batched_cvs == 1 and batcher.fallbacks == 2
+
+
+def test_failed_batch_falls_back_to_per_cv_calls():
+    single = StructuredLLM(fail=["bob"])
+    batcher = extractor(single, BatchLLM(error=ValueError("Invalid batch output")))
+    results = extract_all(batcher, ["alice", "bob", "carol"])
+
+    assert results[0].name == "alice" and results[2].name == "carol"
+    assert isinstance(results[1], ValueError)
+    assert batcher.fallbacks == 3 and batcher.single_calls == 2
+
+
+def test_single_cv_batch_skips_the_batch_prompt():
+    single, batch = StructuredLLM(), BatchLLM()
+    assert extract_all(extractor(single, batch), ["alice"])[0].name == "alice"
+    assert batch.batches == [] and len(single.prompts) == 1
+
+
+def test_single_call_errors_reach_the_caller():
+    with pytest.raises(ValueError):
+        asyncio.run(extractor(StructuredLLM(fail=["x" * 100]), max_cv_tokens=10).extract("x" * 100))
@@ -0,0 +1,100 @@
+import pytest
+from app.utils.cv_batcher import estimate_tokens
+from app.utils.cv_text import CVTextPreparer, normalize_cv_text
+
+
+@pytest.fixture
+def preparer(monkeypatch):
+    # Estimated token counts keep the budgets independent of tiktoken
+    preparer = CVTextPreparer(max_tokens=60)
+    monkeypatch.setattr(preparer, "_encoder", lambda: None)
+    return preparer
+
+
+def test_collapses_whitespace_and_blank_lines():
+    assert normalize_cv_text(["  John   Doe \n\n\n Python\tdeveloper  \n"]) == "John Doe\nPython developer"
+
+
+def test_keeps_numbers_inside_the_page():
+    page = "John Doe\nEducation\nBSc Computer Science\n2019\nMIT\nPhone\n5551234567\n1"
+    text = normalize_cv_text([page, "Experience\nAcme\n2"])
+    lines = text.split("\n")
+    assert "2019" in lines and "5551234567" in lines
+    assert "1" not in lines and "2" not in lines
+
+
+def test_single_bare_number_is_kept():
+    # One page cannot show that the number counts pages
+    assert normalize_cv_text(["John Doe\nSkills\nPython\n3"]).endswith("\n3")
+
+
+def test_bare_numbers_must_count_the_pages():
+    text = normalize_cv_text(["John Doe\nSkills\n12", "Experience\nAcme\n40"])
+    assert text.split("\n")[-1] == "40" and "12" in text.split("\n")
+
+
+def test_drops_explicit_page_labels_at_page_edges():
+    text = normalize_cv_text(["Page 1 of 2\nJohn Doe\nSkills", "Experience\nAcme\n- Page 2 of 2 -"])
+    assert text == "John Doe\nSkills\nExperience\nAcme"
+
+
+def test_page_label_inside_the_page_is_kept():
+    text = normalize_cv_text(["John Doe\nProjects\nPage 3 of the report\nSkills"])
+    assert "Page 3 of the report" in text
+
+
+def test_repeated_headers_keep_first_occurrence():
+    body = "\n".join(["Experience", "Acme", "Built a search service", "Led the platform team", "Python", "Go"])
+    pages = [f"John Doe - Curriculum Vitae\n{body}\nPage {index + 1}" for index in range(3)]
+    text = normalize_cv_text(pages)
+    assert text.count("John Doe - Curriculum Vitae") == 1
+    assert text.count("Built a search service") == 3 and "Page" not in text
+
+
+def test_distinct_years_at_page_edges_are_not_repeated_headers():
+    text = normalize_cv_text(["Education\nBSc\n2015", "Experience\nAcme\n2019", "Projects\nSearch\n2021"])
+    assert all(year in text.split("\n") for year in ("2015", "2019", "2021"))
+
+
+def test_truncate_keeps_short_text(preparer):
+    text = "John Doe\nSkills\nPython"
+    assert preparer.truncate(text) == text
+
+
+def test_truncate_disabled_with_zero_budget(preparer):
+    preparer.max_tokens = 0
+    text = "word " * 1000
+    assert preparer.truncate(text) == text
+
+
+def test_truncate_keeps_sections_by_priority(preparer):
+    text = "\n".join([
+        "John Doe", "john@example.com",
+        "Interests", "chess " * 40,
+        "Experience", "Built a payments API at Acme",
+        "Skills", "Python, FastAPI, MongoDB",
+    ])
+    truncated = preparer.truncate(text)
+    lines = truncated.split("\n")
+    assert lines[:2] == ["John Doe", "john@example.com"]
+    assert "Built a payments API at Acme" in lines and "Python, FastAPI, MongoDB" in lines
+    # The interests section is cut where the budget runs out and keeps its place
+    assert lines.index("Interests") < lines.index("Experience")
+    assert "[...]" in lines
+    assert sum(estimate_tokens(line) + 1 for line in lines) <= preparer.max_tokens
+
+
+def test_truncate_cuts_inside_a_long_line(preparer):
+    truncated = preparer.truncate("John Doe\n" + "x" * 1000)
+    lines = truncated.split("\n")
+    assert lines[0] == "John Doe" and lines[-1] == "[...]"
+    assert 0 < len(lines[1]) < 1000
+
+
+def test_prepare_reports_token_counts(preparer):
+    pages = ["John Doe\nExperience\n" + "Built things. " * 60 + "\n1", "Skills\nPython\n2"]
+    text_content, prompt_text, report = preparer.prepare(pages)
+    assert "\n1" not in text_content
+    assert report["truncated"] and prompt_text != text_content
+    assert report["saved_tokens"] == report["raw_tokens"] - report["prompt_tokens"] > 0
+    assert preparer.stats()["files"] == 1 and preparer.stats()["truncated"] == 1
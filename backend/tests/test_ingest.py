@@ -0,0 +1,136 @@
+import os
+import json
+import asyncio
+import hashlib
+from io import BytesIO
+import pytest
+from fastapi import UploadFile
+from app.utils.ingest import UploadTooLarge, ingest_upload
+from app.utils.upload_limits import BodySizeLimitMiddleware
+
+
+class BlobStorage:
+    def __init__(self, fail: bool = False):
+        self.blobs = {}
+        self.fail = fail
+
+    async def upload_stream(self, blob_path, chunks, content_type):
+        data = b""
+        async for chunk in chunks:
+            data += chunk
+            if self.fail:
+                raise ConnectionError("connection closed")
+        self.blobs[blob_path] = data
+        return f"https://blobs/{blob_path}"
+
+
+def upload_file(content: bytes, size=None) -> UploadFile:
+    return UploadFile(file=BytesIO(content), filename="cv.pdf", size=size)
+
+
+def ingest(content: bytes, blob_storage=None, **kwargs):
+    options = dict(max_size=1024 * 1024, chunk_size=1000, spool_threshold=4096)
+    options.update(kwargs)
+    return asyncio.run(ingest_upload(upload_file(content), blob_storage or BlobStorage(), "123/cv.pdf", **options))
+
+
+def test_small_upload_stays_in_memory():
+    blob_storage = BlobStorage()
+    content = os.urandom(3000)
+    upload, blob_url = ingest(content, blob_storage)
+    assert upload.path is None and upload.source == content
+    assert upload.size == 3000 and upload.digest == hashlib.sha256(content).hexdigest()
+    assert blob_storage.blobs["123/cv.pdf"] == content and blob_url == "https://blobs/123/cv.pdf"
+
+
+def test_large_upload_is_spooled_to_disk(tmp_path):
+    content = os.urandom(10000)
+    upload, _ = ingest(content, spool_dir=str(tmp_path))
+    assert upload.source == upload.path and os.path.dirname(upload.path) == str(tmp_path)
+    with open(upload.path, "rb") as spooled:
+        assert spooled.read() == content
+    upload.close()
+    assert not os.listdir(tmp_path)
+
+
+def test_default_spool_threshold_is_small():
+    upload, _ = asyncio.run(ingest_upload(upload_file(os.urandom(2 * 1024 * 1024)), BlobStorage(), "123/cv.pdf",
+                                          max_size=4 * 1024 * 1024))
+    assert upload.path is not None
+    upload.close()
+
+
+def test_declared_size_over_limit_is_rejected_before_reading():
+    blob_storage = BlobStorage()
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(ingest_upload(upload_file(b"x", size=2048), blob_storage, "123/cv.pdf", max_size=1024))
+    assert not blob_storage.blobs
+
+
+def test_streamed_size_over_limit_removes_spool_file(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        ingest(os.urandom(10000), max_size=8000, spool_dir=str(tmp_path))
+    assert not os.listdir(tmp_path)
+
+
+def test_failed_blob_upload_removes_spool_file(tmp_path):
+    with pytest.raises(ConnectionError):
+        ingest(os.urandom(10000), BlobStorage(fail=True), spool_threshold=10, spool_dir=str(tmp_path))
+    assert not os.listdir(tmp_path)
+
+
+async def echo_app(scope, receive, send):
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("client disconnected")
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": str(len(body)).encode()})
+
+
+def call(middleware, chunks: list, headers: list = ()):
+    messages = [{"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+                for index, chunk in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        try:
+            await middleware({"type": "http", "headers": list(headers)}, receive, send)
+        except ConnectionError:
+            pass
+
+    asyncio.run(run())
+    return sent[0]["status"], b"".join(message.get("body", b"") for message in sent[1:]), len(messages)
+
+
+def test_body_under_limit_passes_through():
+    status, body, _ = call(BodySizeLimitMiddleware(echo_app, 100), [b"a" * 50, b"b" * 50])
+    assert (status, body) == (200, b"100")
+
+
+def test_declared_content_length_over_limit_is_rejected_unread():
+    status, body, unread = call(BodySizeLimitMiddleware(echo_app, 100), [b"a" * 200], [(b"content-length", b"200")])
+    assert status == 413 and "100 bytes" in json.loads(body)["detail"]
+    assert unread == 1
+
+
+def test_streamed_body_over_limit_is_cut_off():
+    status, _, unread = call(BodySizeLimitMiddleware(echo_app, 100), [b"a" * 60, b"b" * 60, b"c" * 60, b"d" * 60])
+    assert status == 413
+    # The rest of the body is never read
+    assert unread == 2
+
+
+def test_zero_limit_disables_the_check():
+    status, body, _ = call(BodySizeLimitMiddleware(echo_app, 0), [b"a" * 500])
+    assert (status, body) == (200, b"500")
@@ -0,0 +1,112 @@
+import asyncio
+import numpy as np
+import pytest
+from mongomock_motor import AsyncMongoMockClient #type: ignore
+from app.utils.cache import TieredCache
+from app.utils.jd_cache import JDGenerationCache, MinHasher, MinHashIndex, normalize_requirements
+
+REQUIREMENTS = "Senior Python developer, Berlin, 5+ years, FastAPI, MongoDB, AWS and Kubernetes experience"
+
+
+def jd_cache(similarity_threshold: float = 0.8) -> JDGenerationCache:
+    collection = AsyncMongoMockClient()["test"]["jd-cache"]
+    return JDGenerationCache(TieredCache(collection, version="v1", max_size=16),
+                             similarity_threshold=similarity_threshold)
+
+
+def test_normalize_requirements_ignores_case_and_punctuation():
+    assert normalize_requirements("Senior  Python Dev.\n5+ years; C#, Node.js!") == \
+        "senior python dev 5+ years c# node.js"
+    assert normalize_requirements(None) == ""
+
+
+def test_signature_is_stable_and_estimates_similarity():
+    hasher = MinHasher()
+    first = hasher.signature(normalize_requirements(REQUIREMENTS))
+    assert np.array_equal(first, MinHasher().signature(normalize_requirements(REQUIREMENTS)))
+    near = hasher.signature(normalize_requirements(REQUIREMENTS.replace("Kubernetes", "Kubernetes, Terraform")))
+    unrelated = hasher.signature("junior accountant, lisbon, excel and sap reporting")
+    assert MinHasher.similarity(first, near) > 0.6
+    assert MinHasher.similarity(first, unrelated) < 0.2
+
+
+def test_index_returns_closest_candidate():
+    hasher = MinHasher()
+    index = MinHashIndex()
+    texts = {
+        "python": normalize_requirements(REQUIREMENTS),
+        "accountant": "junior accountant lisbon excel and sap reporting",
+    }
+    for key, text in texts.items():
+        index.add(key, hasher.signature(text), ("5",) if key == "python" else ())
+    query = normalize_requirements(REQUIREMENTS + " Docker")
+    key, similarity = index.query(hasher.signature(query), ("5",))
+    assert key == "python" and similarity > 0.6
+
+
+def test_index_requires_equal_numbers():
+    hasher = MinHasher()
+    index = MinHashIndex()
+    text = normalize_requirements(REQUIREMENTS)
+    index.add("five", hasher.signature(text), ("5",))
+    assert index.query(hasher.signature(text.replace("5+", "8+")), ("8",)) == (None, 0.0)
+
+
+def test_index_evicts_oldest_and_cleans_buckets():
+    hasher = MinHasher()
+    index = MinHashIndex(max_size=2)
+    for key in ("a", "b", "c"):
+        index.add(key, hasher.signature(f"requirements for role {key} " * 3), ())
+    assert len(index) == 2
+    assert index.query(hasher.signature("requirements for role a " * 3), ())[0] != "a"
+    index.remove("b")
+    index.remove("c")
+    assert len(index) == 0 and not index._buckets
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        MinHashIndex(num_perm=64, bands=10)
+
+
+def test_cache_serves_near_duplicates():
+    async def scenario():
+        cache = jd_cache()
+        await cache.set(REQUIREMENTS, {"job_title": "Senior Python Developer"})
+        exact = await cache.get(REQUIREMENTS.upper() + "!")
+        similar = await cache.get(REQUIREMENTS + ", Docker")
+        other_years = await cache.get(REQUIREMENTS.replace("5+", "8+"))
+        unrelated = await cache.get("Junior accountant in Lisbon, Excel and SAP")
+        return cache, exact, similar, other_years, unrelated
+
+    cache, exact, similar, other_years, unrelated = asyncio.run(scenario())
+    assert exact == ({"job_title": "Senior Python Developer"}, "exact")
+    assert similar == ({"job_title": "Senior Python Developer"}, "similar")
+    assert other_years == (None, None)
+    assert unrelated == (None, None)
+    assert (cache.exact_hits, cache.similar_hits, cache.misses) == (1, 1, 2)
+
+
+def test_cache_without_threshold_only_matches_exactly():
+    async def scenario():
+        cache = jd_cache(similarity_threshold=0)
+        await cache.set(REQUIREMENTS, {"job_title": "Senior Python Developer"})
+        return cache, await cache.get(REQUIREMENTS + ", Docker")
+
+    cache, result = asyncio.run(scenario())
+    assert result == (None, None)
+    assert len(cache.index) == 0
+
+
+def test_prepare_rebuilds_index_from_mongo():
+    async def scenario():
+        cache = jd_cache()
+        await cache.set(REQUIREMENTS, {"job_title": "Senior Python Developer"})
+        restarted = JDGenerationCache(TieredCache(cache.cache.collection, version="v1", max_size=16),
+                                      similarity_threshold=0.8)
+        await restarted.prepare()
+        return restarted, await restarted.get(REQUIREMENTS + ", Docker")
+
+    restarted, result = asyncio.run(scenario())
+    assert len(restarted.index) == 1
+    assert result == ({"job_title": "Senior Python Developer"}, "similar")
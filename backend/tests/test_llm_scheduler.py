@@ -0,0 +1,226 @@
+import asyncio
+import pytest
+from app.utils import llm_scheduler
+from app.utils.llm_scheduler import CircuitBreaker, CircuitOpenError, LLMScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = type("Response", (), {"headers": headers})()
+
+
+class ScriptedLLM:
+    """
+    Answers each ainvoke call with the next step: an exception is raised,
+    a (delay, value) tuple is returned after sleeping, anything else is returned.
+    """
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        step = self.steps[min(self.calls, len(self.steps) - 1)]
+        self.calls += 1
+        if isinstance(step, Exception):
+            raise step
+        if isinstance(step, tuple):
+            delay, step = step
+            await asyncio.sleep(delay)
+            if isinstance(step, Exception):
+                raise step
+        return step
+
+
+def scheduler(**kwargs) -> LLMScheduler:
+    options = dict(requests_per_minute=1e6, tokens_per_minute=1e9, base_delay=0, max_delay=0)
+    options.update(kwargs)
+    return LLMScheduler(**options)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_scheduler.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.opens == 1
+
+
+def test_breaker_half_open_allows_one_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    # A trial that never reports back expires after reset_timeout
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_breaker_trial_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_breaker_trial_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.opens == 2
+
+
+def test_retries_transient_errors():
+    llm = ScriptedLLM(TimeoutError(), StatusError(503), "answer")
+    gate = scheduler(max_retries=4)
+    assert asyncio.run(gate.run(llm, "prompt")) == "answer"
+    assert llm.calls == 3
+    assert gate.retries == 2
+    assert gate.timeouts == 1
+    assert gate.succeeded == 1 and gate.failed == 0
+    assert gate.breaker.state == "closed"
+
+
+def test_final_error_is_not_retried():
+    llm = ScriptedLLM(StatusError(400), "answer")
+    gate = scheduler(max_retries=4)
+    with pytest.raises(StatusError):
+        asyncio.run(gate.run(llm, "prompt"))
+    assert llm.calls == 1
+    assert gate.retries == 0 and gate.failed == 1
+    assert gate.breaker.failures == 0
+
+
+def test_gives_up_after_max_retries():
+    llm = ScriptedLLM(StatusError(500))
+    gate = scheduler(max_retries=2, breaker=CircuitBreaker(failure_threshold=10))
+    with pytest.raises(StatusError):
+        asyncio.run(gate.run(llm, "prompt"))
+    assert llm.calls == 3
+    assert gate.retries == 2 and gate.failed == 1
+
+
+def test_open_breaker_short_circuits():
+    llm = ScriptedLLM(StatusError(500))
+    gate = scheduler(max_retries=5, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(gate.run(llm, "prompt"))
+    assert llm.calls == 2
+    assert gate.short_circuited == 1
+
+
+def test_backoff_is_capped_full_jitter(monkeypatch):
+    monkeypatch.setattr(llm_scheduler.random, "uniform", lambda low, high: high)
+    gate = scheduler(max_retries=10, base_delay=0.5, max_delay=4,
+                     breaker=CircuitBreaker(failure_threshold=100))
+    delays = [gate._retry_delay(TimeoutError(), attempt) for attempt in range(6)]
+    assert delays == [0.5, 1.0, 2.0, 4, 4, 4]
+
+
+def test_retry_after_pauses_all_calls(clock):
+    gate = scheduler(max_retries=3, base_delay=0.5, max_delay=4)
+    delay = gate._retry_delay(StatusError(429, retry_after=7), 0)
+    assert delay >= 7
+    assert gate.rate_limited == 1
+    assert gate._paused_until == clock.now + 7
+
+
+def test_hedge_wins_when_original_is_slow():
+    llm = ScriptedLLM((1.0, "original"), (0.01, "hedge"))
+    gate = scheduler(hedge_after=0.05)
+    assert asyncio.run(gate.run(llm, "prompt")) == "hedge"
+    assert gate.hedges == 1 and gate.hedge_wins == 1
+
+
+def test_original_wins_when_it_answers_first():
+    llm = ScriptedLLM((0.1, "original"), (1.0, "hedge"))
+    gate = scheduler(hedge_after=0.05)
+    assert asyncio.run(gate.run(llm, "prompt")) == "original"
+    assert gate.hedges == 1 and gate.hedge_wins == 0
+
+
+def test_hedge_answer_used_when_original_fails():
+    llm = ScriptedLLM((0.1, StatusError(500)), (0.2, "hedge"))
+    gate = scheduler(hedge_after=0.05)
+    assert asyncio.run(gate.run(llm, "prompt")) == "hedge"
+    assert gate.hedge_wins == 1 and gate.retries == 0
+
+
+def test_no_hedge_before_hedge_after():
+    llm = ScriptedLLM((0.01, "original"), "hedge")
+    gate = scheduler(hedge_after=0.5)
+    assert asyncio.run(gate.run(llm, "prompt")) == "original"
+    assert llm.calls == 1 and gate.hedges == 0
+
+
+def test_refused_hedge_keeps_request_quota():
+    llm = ScriptedLLM((0.2, "original"), "hedge")
+    gate = scheduler(hedge_after=0.05, tokens_per_minute=1000)
+
+    async def scenario():
+        # The token bucket cannot cover a hedge
+        gate.token_bucket.tokens = 0
+        requests_before = gate.request_bucket.tokens
+        result = await gate._attempt(llm, "prompt", 500)
+        return result, requests_before - gate.request_bucket.tokens
+
+    result, taken = asyncio.run(scenario())
+    assert result == "original"
+    assert llm.calls == 1 and gate.hedges == 0
+    assert taken < 1e-3
+
+
+def test_cancelled_caller_cancels_the_original_request():
+    class SlowLLM:
+        cancelled = False
+
+        async def ainvoke(self, prompt):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+
+    llm = SlowLLM()
+    gate = scheduler(hedge_after=5)
+
+    async def scenario():
+        call = asyncio.create_task(gate._attempt(llm, "prompt", 10))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        # Let the cancelled request run its handler (asyncio.run would cancel it anyway on exit)
+        await asyncio.sleep(0.01)
+        return llm.cancelled
+
+    assert asyncio.run(scenario())
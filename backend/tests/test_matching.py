@@ -0,0 +1,151 @@
+import json
+import asyncio
+import multiprocessing
+import numpy as np
+from bson.objectid import ObjectId #type: ignore
+from mongomock_motor import AsyncMongoMockClient #type: ignore
+from app.database.cv_documents import compress_text
+from app.utils.matching import CVMatcher, HashingEmbedder, VectorIndex, cv_match_text
+
+
+def unit_vectors(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def cv_ids(count: int, start: int = 0) -> list:
+    return [f"{index:024x}" for index in range(start, start + count)]
+
+
+def append_rows(path_prefix, start: int, count: int):
+    index = VectorIndex(path_prefix, dim=8, initial_capacity=4)
+    for offset in range(count):
+        index.add(cv_ids(1, start + offset), unit_vectors(1, 8, seed=start + offset))
+
+
+def test_search_returns_best_matches_first(tmp_path):
+    vectors = unit_vectors(10, 16)
+    index = VectorIndex(tmp_path / "user", dim=16)
+    index.add(cv_ids(10), vectors, reset=True)
+
+    results = index.search(vectors[3], top_k=3)
+    assert len(results) == 3
+    assert results[0][0] == cv_ids(10)[3]
+    assert abs(results[0][1] - 1.0) < 1e-5
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_search_of_empty_index(tmp_path):
+    index = VectorIndex(tmp_path / "user", dim=16)
+    assert index.search(unit_vectors(1, 16)[0], top_k=5) == []
+    index.add([], np.zeros((0, 16), dtype=np.float32), reset=True)
+    assert index.search(unit_vectors(1, 16)[0], top_k=5) == []
+
+
+def test_append_grows_capacity_and_keeps_rows(tmp_path):
+    vectors = unit_vectors(11, 8)
+    ids = cv_ids(11)
+    index = VectorIndex(tmp_path / "user", dim=8, initial_capacity=4)
+    index.add(ids[:3], vectors[:3], reset=True)
+    for row in range(3, 11):
+        index.add([ids[row]], vectors[row:row + 1])
+
+    assert index.count == 11 and index.capacity == 16
+    reopened = VectorIndex(tmp_path / "user", dim=8, initial_capacity=4)
+    assert reopened.search(vectors[0], top_k=1)[0][0] == ids[0]
+    assert reopened.search(vectors[10], top_k=1)[0][0] == ids[10]
+    assert np.allclose(reopened.vectors[:11], vectors)
+
+
+def test_only_reset_marks_the_index_complete(tmp_path):
+    index = VectorIndex(tmp_path / "user", dim=8)
+    index.add(cv_ids(1), unit_vectors(1, 8))
+    assert index.exists() and not index.is_complete()
+
+    index.add(cv_ids(2, start=5), unit_vectors(2, 8, seed=1), reset=True)
+    assert index.is_complete() and index.count == 2
+    index.add(cv_ids(1, start=9), unit_vectors(1, 8, seed=2))
+    assert VectorIndex(tmp_path / "user", dim=8).is_complete()
+
+
+def test_index_without_flag_is_incomplete(tmp_path):
+    index = VectorIndex(tmp_path / "user", dim=8)
+    index.add(cv_ids(2), unit_vectors(2, 8), reset=True)
+    meta_path = tmp_path / "user.json"
+    meta = json.loads(meta_path.read_text())
+    del meta["complete"]
+    meta_path.write_text(json.dumps(meta))
+    assert not VectorIndex(tmp_path / "user", dim=8).is_complete()
+
+
+def test_reader_sees_rows_appended_by_another_instance(tmp_path):
+    reader = VectorIndex(tmp_path / "user", dim=8, initial_capacity=4)
+    writer = VectorIndex(tmp_path / "user", dim=8, initial_capacity=4)
+    vectors = unit_vectors(6, 8)
+    writer.add(cv_ids(2), vectors[:2], reset=True)
+    assert reader.search(vectors[0], top_k=10)[0][0] == cv_ids(2)[0]
+
+    # The second instance appends past the capacity the reader has mapped
+    for row in range(2, 6):
+        writer.add(cv_ids(1, start=row), vectors[row:row + 1])
+    results = reader.search(vectors[5], top_k=10)
+    assert len(results) == 6 and reader.capacity == 8
+    assert results[0][0] == cv_ids(1, start=5)[0]
+
+
+def test_concurrent_appends_from_processes(tmp_path):
+    VectorIndex(tmp_path / "user", dim=8, initial_capacity=4).add([], np.zeros((0, 8), dtype=np.float32), reset=True)
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=append_rows, args=(tmp_path / "user", start, 10)) for start in (0, 100, 200)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    index = VectorIndex(tmp_path / "user", dim=8)
+    index._refresh()
+    stored = {cv_id.decode("ascii") for cv_id in index.ids[:index.count]}
+    expected = set(cv_ids(10)) | set(cv_ids(10, start=100)) | set(cv_ids(10, start=200))
+    assert index.count == 30 and stored == expected
+    assert index.is_complete()
+
+
+def test_add_cv_builds_missing_index_from_collection(tmp_path):
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"]["cv-data"]
+        for skill in ("python", "java", "golang"):
+            await collection.insert_one({"user_id": "123", "extracted_data": {"skills": skill}})
+        await collection.insert_one({"user_id": "other", "extracted_data": {"skills": "python"}})
+        matcher = CVMatcher(tmp_path, HashingEmbedder(64))
+        await matcher.add_cv("123", str(ObjectId()), "python rust", collection=collection)
+        return await matcher.rank("123", "python", collection=collection)
+
+    assert len(asyncio.run(scenario())) == 4
+
+
+def test_rebuild_reads_offloaded_text_from_blob_storage(tmp_path):
+    class BlobStorage:
+        def __init__(self):
+            self.blobs = {}
+
+        async def download(self, path):
+            return self.blobs[path]
+
+    async def scenario():
+        blob_storage = BlobStorage()
+        blob_storage.blobs["123/extracted-text/cv.zlib"] = compress_text("Kubernetes operator in Go", "zlib")
+        collection = AsyncMongoMockClient()["test"]["cv-data"]
+        extracted = {"skills": "Go"}
+        await collection.insert_one({"user_id": "123", "extracted_data": extracted, "text_codec": "zlib",
+                                     "text_blob_path": "123/extracted-text/cv.zlib"})
+        embedder = HashingEmbedder(64)
+        matcher = CVMatcher(tmp_path, embedder, blob_storage)
+        await matcher.rebuild("123", collection)
+        expected = await embedder.aembed([cv_match_text(extracted, "Kubernetes operator in Go")])
+        return await matcher.rank("123", "Kubernetes operator in Go"), float(
+            (await embedder.aembed(["Kubernetes operator in Go"]))[0] @ expected[0])
+
+    ranked, expected_score = asyncio.run(scenario())
+    assert len(ranked) == 1
+    assert abs(ranked[0][1] - expected_score) < 1e-5
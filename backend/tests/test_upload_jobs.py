@@ -0,0 +1,40 @@
+import asyncio
+from app.utils.upload_jobs import LocalJobStore, UploadJobQueue
+
+FILES = [("cv.pdf", "application/pdf", b"%PDF-1.4", 8)]
+
+
+def test_jobs_are_only_visible_to_their_user():
+    async def scenario():
+        store = LocalJobStore()
+        job_id = await store.create_job("123", "test@test.com", FILES)
+        return (await store.get_job(job_id, "123"), await store.get_job(job_id, "456"),
+                await store.get_job("missing", "123"))
+
+    own, other, missing = asyncio.run(scenario())
+    assert own["user_id"] == "123" and own["total"] == 1
+    assert other is None and missing is None
+
+
+def test_heartbeat_survives_renewal_errors():
+    class FlakyStore(LocalJobStore):
+        renewals = 0
+
+        async def renew_lease(self, job_id, lease_seconds):
+            self.renewals += 1
+            if self.renewals <= 2:
+                raise ConnectionError("connection closed")
+
+    async def scenario():
+        store = FlakyStore()
+        queue = UploadJobQueue(app=None, store=store, lease_seconds=0.03)
+        heartbeat = asyncio.create_task(queue._heartbeat("job"))
+        await asyncio.sleep(0.1)
+        alive = not heartbeat.done()
+        heartbeat.cancel()
+        await asyncio.gather(heartbeat, return_exceptions=True)
+        return alive, store.renewals
+
+    alive, renewals = asyncio.run(scenario())
+    assert alive
+    assert renewals >= 3
@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from mongomock_motor import AsyncMongoMockClient #type: ignore
+from app.database import write_buffer
+from app.database.write_buffer import BufferedWriter, WriteBuffers
+
+
+class FlakyCollection:
+    """
+    Wraps a collection; the first failures insert_many calls write their
+    documents and then raise, like a connection lost before the reply.
+    """
+
+    def __init__(self, collection, failures: int = 1, write_before_failing: bool = True):
+        self.collection = collection
+        self.name = collection.name
+        self.failures = failures
+        self.write_before_failing = write_before_failing
+        self.calls = 0
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        if self.calls <= self.failures:
+            if self.write_before_failing:
+                await self.collection.insert_many(documents, ordered=ordered)
+            raise ConnectionError("connection closed")
+        return await self.collection.insert_many(documents, ordered=ordered)
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    async def sleep(delay):
+        pass
+    monkeypatch.setattr(write_buffer.asyncio, "sleep", sleep)
+
+
+def collection(name: str = "cv-data"):
+    return AsyncMongoMockClient()["test"][name]
+
+
+def test_flush_writes_in_batches():
+    async def scenario():
+        target = collection()
+        writer = BufferedWriter(target, max_batch=2, flush_interval=60)
+        for index in range(5):
+            await writer.insert({"n": index})
+        await writer.flush()
+        return writer.stats(), await target.count_documents({})
+
+    stats, count = asyncio.run(scenario())
+    assert count == 5
+    assert stats == {"pending": 0, "flushes": 3, "written": 5, "dropped": 0}
+
+
+def test_retry_after_partial_failure_is_not_a_drop(no_backoff):
+    async def scenario():
+        target = collection()
+        flaky = FlakyCollection(target)
+        writer = BufferedWriter(flaky, max_batch=10, flush_interval=60)
+        for index in range(4):
+            await writer.insert({"n": index})
+        await writer.flush()
+        return flaky.calls, writer.stats(), await target.count_documents({})
+
+    calls, stats, count = asyncio.run(scenario())
+    assert calls == 2
+    assert count == 4
+    assert stats["written"] == 4 and stats["dropped"] == 0
+
+
+def test_duplicates_on_first_attempt_are_dropped():
+    async def scenario():
+        target = collection()
+        await target.insert_one({"_id": "taken"})
+        writer = BufferedWriter(target, max_batch=10, flush_interval=60)
+        await writer.insert({"_id": "taken"})
+        await writer.insert({"_id": "free"})
+        await writer.flush()
+        return writer.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["written"] == 1 and stats["dropped"] == 1
+
+
+def test_batch_dropped_after_max_retries(no_backoff):
+    async def scenario():
+        flaky = FlakyCollection(collection(), failures=3, write_before_failing=False)
+        writer = BufferedWriter(flaky, max_batch=10, flush_interval=60, max_retries=3)
+        await writer.insert({"n": 1})
+        await writer.insert({"n": 2})
+        await writer.flush()
+        return flaky.calls, writer.stats()
+
+    calls, stats = asyncio.run(scenario())
+    assert calls == 3
+    assert stats["written"] == 0 and stats["dropped"] == 2
+
+
+def test_insert_blocks_at_max_pending():
+    async def scenario():
+        writer = BufferedWriter(collection(), max_batch=10, flush_interval=60, max_pending=2)
+        await writer.insert({"n": 1})
+        await writer.insert({"n": 2})
+        blocked = asyncio.create_task(writer.insert({"n": 3}))
+        await asyncio.sleep(0.01)
+        was_blocked = not blocked.done()
+        await writer.flush()
+        await asyncio.wait_for(blocked, 1)
+        return was_blocked, writer.stats()["pending"]
+
+    was_blocked, pending = asyncio.run(scenario())
+    assert was_blocked
+    assert pending == 1
+
+
+def test_write_buffers_flush_on_close():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        buffers = WriteBuffers(db, max_batch=100, flush_interval=60)
+        await buffers.insert("cv-data", {"n": 1})
+        await buffers.insert("job-descriptions", {"n": 2})
+        await buffers.close()
+        return buffers.stats(), await db["cv-data"].count_documents({}), await db["job-descriptions"].count_documents({})
+
+    stats, cvs, jds = asyncio.run(scenario())
+    assert cvs == 1 and jds == 1
+    assert all(writer["written"] == 1 for writer in stats.values())